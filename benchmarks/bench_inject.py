@@ -0,0 +1,49 @@
+"""比较局部修改与 tomlkit 完整解析在大型 pyproject.toml 上注入模块的耗时.
+
+    python benchmarks/bench_inject.py [--sizes 100 1000 10000] [--repeat 5]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fixtures import make_pyproject  # noqa: E402
+
+from graiax.cli.toml_patch import inject_load, patch_load_tomlkit  # noqa: E402
+
+COMMENT = "modules which will be loaded by graia-saya"
+
+
+def measure(func, *args, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    modules = [f"modules.m{i}" for i in range(10)]
+    print(f"{'size':>7}  {'KiB':>8}  {'patch ms':>10}  {'tomlkit ms':>11}  {'speedup':>8}")
+    for size in args.sizes:
+        text = make_pyproject(size)
+        patched, surgical = inject_load(text, modules, COMMENT)
+        assert surgical, "benchmark document should not need the fallback"
+        patch_time = measure(inject_load, text, modules, COMMENT, repeat=args.repeat)
+        tomlkit_time = measure(patch_load_tomlkit, text, modules, COMMENT, repeat=max(1, args.repeat // 2))
+        print(
+            f"{size:>7}  {len(text) / 1024:>8.0f}  {patch_time * 1000:>10.2f}"
+            f"  {tomlkit_time * 1000:>11.1f}  {tomlkit_time / patch_time:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
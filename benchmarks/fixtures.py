@@ -0,0 +1,100 @@
+"""基准测试使用的合成数据.
+
+- `make_module_tree`: 指定深度与宽度的包目录树
+- `make_pyproject`: 指定规模的 pyproject.toml
+- `make_plugins`: 指定数量与导入耗时的 Saya 插件
+"""
+from pathlib import Path
+from typing import List
+
+EVENTS_MODULE = """\
+from graia.broadcast.entities.dispatcher import BaseDispatcher
+from graia.broadcast.entities.event import Dispatchable
+
+
+class BenchEvent(Dispatchable):
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface):
+            pass
+"""
+
+PLUGIN_MODULE = """\
+import time
+
+from graia.saya import Channel
+from graia.saya.builtins.broadcast.schema import ListenerSchema
+
+from bench_events import BenchEvent
+{imports}
+channel = Channel.current()
+
+_until = time.perf_counter() + {cost}
+while time.perf_counter() < _until:  # 模拟导入第三方库等耗时操作
+    pass
+
+
+@channel.use(ListenerSchema(listening_events=[BenchEvent]))
+async def on_event_{index}():
+    pass
+"""
+
+
+def make_module_tree(root: Path, depth: int, width: int, modules: int = 5, package: str = "modules") -> int:
+    """在 root 下生成每层 width 个子包, 共 depth 层的包, 每个包含 modules 个模块, 返回模块总数"""
+    count = 0
+
+    def build(path: Path, level: int) -> None:
+        nonlocal count
+        path.mkdir(parents=True, exist_ok=True)
+        path.joinpath("__init__.py").write_text("")
+        for i in range(modules):
+            path.joinpath(f"m{i}.py").write_text(f"VALUE = {i}\n")
+        count += modules + 1
+        # 混入不应被扫描的文件与目录
+        path.joinpath("README.md").write_text("")
+        path.joinpath("__pycache__").mkdir(exist_ok=True)
+        if level < depth:
+            for i in range(width):
+                build(path.joinpath(f"p{i}"), level + 1)
+
+    build(root.joinpath(package), 1)
+    return count
+
+
+def make_pyproject(size: int, with_graiax: bool = True) -> str:
+    """生成含有 size 个依赖与 size 个类锁文件条目的 pyproject.toml"""
+    lines = ["[project]", 'name = "bench"', 'version = "0.1.0"', "dependencies = ["]
+    lines += [f'    "package-{i}>=1.{i % 10}",' for i in range(size)]
+    lines += ["]", ""]
+    for i in range(size):
+        lines += [
+            "[[tool.lock.package]]",
+            f'name = "package-{i}"',
+            f'version = "1.{i % 10}.{i}"',
+            f'summary = """Package {i}\n[not.a.table]\n"""',
+            f'files = [{{file = "package_{i}-1.0-py3-none-any.whl", hash = "sha256:{i:064x}"}}]',
+            "",
+        ]
+    if with_graiax:
+        lines += ["[tool.graiax]", "load = [", '    "modules.existing",', "]"]
+    lines += ["", "[tool.black]", "line-length = 110", ""]
+    return "\n".join(lines)
+
+
+def make_plugins(
+    root: Path, count: int, cost: float = 0.001, chain: int = 1, package: str = "plugins"
+) -> List[str]:
+    """在 root 下生成 count 个 Saya 插件, 每个在导入时忙等 cost 秒.
+
+    chain 大于 1 时, 每 chain 个插件组成一条导入链, 后一个导入前一个, 用于测试按依赖排序."""
+    path = root.joinpath(package)
+    path.mkdir(parents=True, exist_ok=True)
+    root.joinpath("bench_events.py").write_text(EVENTS_MODULE)
+    path.joinpath("__init__.py").write_text("")
+    modules = []
+    for i in range(count):
+        imports = f"import {package}.p{i - 1}  # noqa: F401\n" if chain > 1 and i % chain else ""
+        path.joinpath(f"p{i}.py").write_text(PLUGIN_MODULE.format(imports=imports, cost=cost, index=i))
+        modules.append(f"{package}.p{i}")
+    return modules
@@ -0,0 +1,261 @@
+"""CLI 启动, 模块扫描, 模块注入与 ignite 加载的基准测试.
+
+    python benchmarks/run.py run [--only cli scan inject load] [--repeat 5] [-o results.json]
+    python benchmarks/run.py compare base.json results.json [--threshold 0.1]
+
+结果以 JSON 保存, 每项记录各次运行的耗时 (秒) 及其统计值, 以及生成数据所用的参数.
+compare 在任一项的中位数变慢超过阈值时以状态码 1 退出, 可用于 CI."""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fixtures import make_module_tree, make_plugins, make_pyproject  # noqa: E402
+
+RESULTS_VERSION = 1
+
+LOAD_SCRIPT = """
+import json, sys, time
+from graiax.ignite import create_saya, require_modules
+modules = json.loads(sys.argv[1])
+saya = create_saya()
+start = time.perf_counter()
+with saya.module_context():
+    require_modules(saya, modules, workers=int(sys.argv[2]))
+print(time.perf_counter() - start)
+"""
+
+
+def summarize(times: List[float], **params: Any) -> Dict[str, Any]:
+    return {
+        "times": times,
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "params": params,
+    }
+
+
+def measure(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_python(args: List[str], env: Dict[str, str]) -> None:
+    subprocess.run([sys.executable, *args], env={**os.environ, **env}, check=True, stdout=subprocess.DEVNULL)
+
+
+def bench_cli(work: Path, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """`graiax --help` 的启动耗时. 冷启动时字节码缓存与命令清单缓存均为空"""
+    entry = str(ROOT.joinpath("entry.py"))
+    counter = iter(range(repeat))
+
+    def cold_env() -> Dict[str, str]:
+        run = next(counter)
+        return {
+            "PYTHONPYCACHEPREFIX": str(work.joinpath("pycache-cold", str(run))),
+            "GRAIAX_CACHE_DIR": str(work.joinpath("cache-cold", str(run))),
+        }
+
+    warm_env = {
+        "PYTHONPYCACHEPREFIX": str(work.joinpath("pycache-warm")),
+        "GRAIAX_CACHE_DIR": str(work.joinpath("cache-warm")),
+    }
+    run_python([entry, "--help"], warm_env)
+    envs: List[Dict[str, str]] = []
+    cold = measure(lambda: run_python([entry, "--help"], envs[-1]), repeat, lambda: envs.append(cold_env()))
+    warm = measure(lambda: run_python([entry, "--help"], warm_env), repeat)
+    return {"cli.cold": summarize(cold), "cli.warm": summarize(warm)}
+
+
+def bench_scan(work: Path, repeat: int, depth: int, width: int) -> Dict[str, Dict[str, Any]]:
+    """扫描模块树的耗时: 无索引缓存, 缓存完全命中, 以及修改一个目录后的增量扫描"""
+    from graiax.cli.index import get_index
+
+    root = work.joinpath("tree")
+    count = make_module_tree(root, depth, width)
+    changed = root.joinpath("modules", "__init__.py")
+    runs = iter(range(repeat))
+
+    def use_fresh_cache() -> None:
+        os.environ["GRAIAX_CACHE_DIR"] = str(work.joinpath("scan-cache", str(next(runs))))
+
+    def touch() -> None:
+        # 目录的 mtime 精度可能较粗, 直接设置为不同的值
+        stat = changed.parent.stat()
+        os.utime(changed.parent, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def scan() -> None:
+        assert len(get_index(str(root)).modules()) == count
+
+    previous = os.environ.get("GRAIAX_CACHE_DIR")
+    try:
+        cold = measure(scan, repeat, use_fresh_cache)
+        warm = measure(scan, repeat)
+        incremental = measure(scan, repeat, touch)
+    finally:
+        if previous is None:
+            os.environ.pop("GRAIAX_CACHE_DIR", None)
+        else:
+            os.environ["GRAIAX_CACHE_DIR"] = previous
+    params = {"depth": depth, "width": width, "modules": count}
+    return {
+        "scan.cold": summarize(cold, **params),
+        "scan.warm": summarize(warm, **params),
+        "scan.incremental": summarize(incremental, **params),
+    }
+
+
+def bench_inject(work: Path, repeat: int, sizes: List[int]) -> Dict[str, Dict[str, Any]]:
+    """读取, 注入模块, 原子写回并重新解析 pyproject.toml 的耗时"""
+    from graiax.cli.toml_patch import inject_load, tomllib
+    from graiax.cli.util import atomic_write
+
+    modules = [f"modules.m{i}" for i in range(10)]
+    results = {}
+    for size in sizes:
+        path = work.joinpath(f"pyproject-{size}.toml")
+        original = make_pyproject(size)
+
+        def reset() -> None:
+            path.write_text(original, encoding="utf-8")
+
+        def round_trip() -> None:
+            text, _ = inject_load(path.read_bytes().decode("utf-8"), modules)
+            atomic_write(path, text, newline="")
+            loaded = tomllib.loads(path.read_text(encoding="utf-8"))["tool"]["graiax"]["load"]
+            assert loaded[-1] == modules[-1]
+
+        times = measure(round_trip, repeat, reset)
+        results[f"inject.{size}"] = summarize(times, size=size, bytes=len(original.encode()))
+    return results
+
+
+def bench_load(work: Path, repeat: int, plugins: int, cost: float, chain: int) -> Dict[str, Dict[str, Any]]:
+    """在子进程中用 require_modules 加载合成插件的耗时, 不计解释器与 graia 的导入"""
+    root = work.joinpath("plugins-root")
+    modules = make_plugins(root, plugins, cost, chain)
+    env = {"PYTHONPATH": os.pathsep.join([str(root), str(ROOT)])}
+    results = {}
+    for name, workers in (("load.serial", 0), ("load.warm-threads", 4)):
+        times = []
+        for _ in range(repeat):
+            proc = subprocess.run(
+                [sys.executable, "-c", LOAD_SCRIPT, json.dumps(modules), str(workers)],
+                env={**os.environ, **env},
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            times.append(float(proc.stdout.strip().splitlines()[-1]))
+        results[name] = summarize(times, plugins=plugins, cost=cost, chain=chain, workers=workers)
+    return results
+
+
+def metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(args: argparse.Namespace) -> None:
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="graiax-bench-") as tmp:
+        work = Path(tmp)
+        suites: Dict[str, Callable[[], Dict[str, Dict[str, Any]]]] = {
+            "cli": lambda: bench_cli(work, args.repeat),
+            "scan": lambda: bench_scan(work, args.repeat, args.depth, args.width),
+            "inject": lambda: bench_inject(work, args.repeat, args.sizes),
+            "load": lambda: bench_load(work, args.repeat, args.plugins, args.import_cost / 1000, args.chain),
+        }
+        for name in args.only or suites:
+            print(f"running {name}...", file=sys.stderr)
+            results.update(suites[name]())
+    width = max(map(len, results))
+    for name, result in results.items():
+        print(f"{name:<{width}}  {result['median'] * 1000:>10.2f} ms  ± {result['stdev'] * 1000:.2f}")
+    if args.output:
+        Path(args.output).write_text(json.dumps({**metadata(), "results": results}, indent=2) + "\n")
+        print(f"results written to {args.output}", file=sys.stderr)
+
+
+def compare(args: argparse.Namespace) -> None:
+    base = json.loads(Path(args.base).read_text())
+    head = json.loads(Path(args.head).read_text())
+    names = [name for name in head["results"] if name in base["results"]]
+    if not names:
+        print("no common benchmarks", file=sys.stderr)
+        raise SystemExit(2)
+    width = max(map(len, names))
+    print(f"{'benchmark':<{width}}  {'base ms':>10}  {'head ms':>10}  {'change':>8}")
+    regressions = []
+    for name in names:
+        before, after = base["results"][name]["median"], head["results"][name]["median"]
+        change = after / before - 1 if before else 0.0
+        mark = ""
+        if change > args.threshold:
+            regressions.append(name)
+            mark = "  slower"
+        elif change < -args.threshold:
+            mark = "  faster"
+        print(f"{name:<{width}}  {before * 1000:>10.2f}  {after * 1000:>10.2f}  {change:>+8.1%}{mark}")
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="action", required=True)
+    run_parser = sub.add_parser("run", help="运行基准测试")
+    run_parser.add_argument("--only", nargs="+", choices=["cli", "scan", "inject", "load"])
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("-o", "--output", help="将结果写入 JSON 文件")
+    run_parser.add_argument("--depth", type=int, default=4, help="模块树的深度")
+    run_parser.add_argument("--width", type=int, default=4, help="模块树每层的子包数")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000], help="pyproject 的规模")
+    run_parser.add_argument("--plugins", type=int, default=50, help="插件数量")
+    run_parser.add_argument("--import-cost", type=float, default=2.0, help="每个插件的导入耗时 (毫秒)")
+    run_parser.add_argument("--chain", type=int, default=5, help="插件导入链的长度")
+    run_parser.set_defaults(func=run)
+    compare_parser = sub.add_parser("compare", help="比较两次运行的结果")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="视为变慢的中位数增幅")
+    compare_parser.set_defaults(func=compare)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
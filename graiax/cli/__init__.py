@@ -1,28 +1,44 @@
-import argparse
-import importlib
+import sys
 
-from . import command
+from . import daemon
 
 
 def main():
-    # load commands
+    # hand the invocation to a running `graiax daemon` if there is one, before importing anything heavy
+    if (code := daemon.forward(sys.argv)) is not None:
+        raise SystemExit(code)
+
+    import argparse
+
+    from . import command, plugins
+
+    # load commands from the cached manifest, command modules are imported on demand
     parser = argparse.ArgumentParser(description="GraiaCommunity CLI")
 
     sub = parser.add_subparsers(help="子命令帮助")
 
     sub_parsers = {}
 
-    for cmd in command.commands:
-        module = importlib.import_module(f"{command.__package__}.{cmd}")
-        func = getattr(module, cmd)
-        sub_parsers[cmd] = sub.add_parser(cmd.replace("_", "-"), help=func.__doc__)
-        sub_parsers[cmd].set_defaults(func=func)
-        if parser_init_func := getattr(module, f"{cmd}_init", None):
-            parser_init_func(sub_parsers[cmd])
-
-    args = parser.parse_args()
-    if "func" in args:
-        args.func(args)
+    for spec in command.load_manifest():
+        cmd = spec["name"]
+        sub_parsers[cmd] = sub.add_parser(cmd.replace("_", "-"), help=spec["help"])
+        sub_parsers[cmd].set_defaults(command_ref=spec["ref"])
+        command.init_parser(spec, sub_parsers[cmd])
+
+    # third-party commands from entry points, their arguments are parsed after the plugin is imported
+    for spec in plugins.load_plugins():
+        if spec["name"] in sub_parsers or spec["name"].replace("-", "_") in sub_parsers:
+            continue  # built-in commands take precedence
+        sub_parsers[spec["name"]] = sub.add_parser(spec["name"], help=spec["help"], add_help=False)
+        sub_parsers[spec["name"]].set_defaults(plugin=spec)
+
+    args, extra = parser.parse_known_args()
+    if "plugin" in args:
+        plugins.run_plugin(args.plugin, extra)
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    elif "command_ref" in args:
+        command.resolve(args.command_ref)(args)
     else:
         parser.print_help()
 
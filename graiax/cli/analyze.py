@@ -0,0 +1,124 @@
+"""不导入代码, 通过 ast 静态识别 Saya 模块.
+
+满足以下任一条件的模块被视为 Saya 模块:
+
+- 调用了 `Channel.current()`
+- 使用了从 Saya 相关包导入的装饰器 (如 `listen`, `schedule`)
+
+结果以文件内容的哈希为键缓存, 每个文件只读取一次, 未命中缓存的源码在进程池中并行解析.
+无法读取的文件视为非 Saya 模块, 写入缓存时丢弃本次扫描中不存在的条目."""
+import ast
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from graiax.cli.util import atomic_write, cache_dir
+
+ANALYZER_VERSION = 1
+
+SAYA_PACKAGES = (
+    "graia.saya",
+    "graia.scheduler.saya",
+    "graia.ariadne.util.saya",
+    "graiax.shortcut",
+    "arclet.alconna.graia",
+)
+
+PARALLEL_THRESHOLD = 32  # 待解析文件少于此数量时不启动进程池
+
+
+def is_saya_package(module: Optional[str]) -> bool:
+    return bool(module) and any(module == p or module.startswith(f"{p}.") for p in SAYA_PACKAGES)
+
+
+def root_name(node: ast.expr) -> Optional[str]:
+    """取出 `a.b.c(...)` 形式表达式最左侧的名称"""
+    while True:
+        if isinstance(node, ast.Call):
+            node = node.func
+        elif isinstance(node, ast.Attribute):
+            node = node.value
+        elif isinstance(node, ast.Name):
+            return node.id
+        else:
+            return None
+
+
+def is_channel_current(node: ast.AST) -> bool:
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and node.func.attr == "current"
+        and isinstance(node.func.value, (ast.Name, ast.Attribute))
+        and (getattr(node.func.value, "id", None) or getattr(node.func.value, "attr", None)) == "Channel"
+    )
+
+
+def is_saya_source(source: bytes) -> bool:
+    """判断源码是否属于 Saya 模块"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return False
+    saya_names: Set[str] = set()
+    decorators: List[ast.expr] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and is_saya_package(node.module):
+            saya_names.update(alias.asname or alias.name for alias in node.names)
+        elif isinstance(node, ast.Import):
+            saya_names.update(
+                (alias.asname or alias.name).partition(".")[0]
+                for alias in node.names
+                if is_saya_package(alias.name)
+            )
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            decorators.extend(node.decorator_list)
+        if is_channel_current(node):
+            return True
+    for decorator in decorators:
+        if root_name(decorator) in saya_names:
+            return True
+    return False
+
+
+def find_saya_modules(paths: Dict[str, Path], workers: Optional[int] = None) -> List[str]:
+    """从模块名到源文件的映射中筛选出 Saya 模块"""
+    cache_path = cache_dir("saya-modules.json")
+    try:
+        cache: Dict[str, bool] = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cache = {}
+
+    digests: Dict[str, str] = {}
+    pending: Dict[str, bytes] = {}
+    for mod, path in paths.items():
+        if path.suffix != ".py":
+            continue
+        try:
+            source = path.read_bytes()
+        except OSError:
+            continue
+        digest = hashlib.sha256(f"{ANALYZER_VERSION}|".encode() + source).hexdigest()
+        digests[mod] = digest
+        if digest not in cache:
+            pending[digest] = source
+
+    if pending:
+        sources = list(pending.values())
+        if len(sources) < PARALLEL_THRESHOLD:
+            results = list(map(is_saya_source, sources))
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                results = list(executor.map(is_saya_source, sources, chunksize=16))
+        cache.update(zip(pending, results))
+
+    current = set(digests.values())
+    if pending or len(cache) != len(current):
+        try:
+            atomic_write(cache_path, json.dumps({digest: cache[digest] for digest in current}))
+        except OSError:
+            pass
+
+    return sorted(mod for mod, digest in digests.items() if cache[digest])
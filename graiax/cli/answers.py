@@ -0,0 +1,120 @@
+"""命令行参数与应答文件提供的预设答案.
+
+应答文件可以是 TOML 或 JSON, 键与命令行参数同名 (以下划线代替连字符).
+已提供答案的问题不会弹出提示; 非交互模式下, 未提供答案的问题直接使用默认值.
+非交互模式或所有问题都已有答案时, 整个过程不会导入 prompt_toolkit."""
+import json
+from argparse import Namespace
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+from graiax.cli.util import use_plain_output
+
+T = TypeVar("T")
+
+Validator = Callable[[Any], Any]
+"""检查应答文件中的值, 无效时抛出 ValueError"""
+
+
+class AnswerFileError(ValueError):
+    """应答文件无法解析, 或其中的答案无效"""
+
+
+def boolean(value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise ValueError(f"应为 true 或 false, 而不是 {value!r}")
+    return value
+
+
+def one_of(*choices: str) -> Validator:
+    def validate(value: Any) -> str:
+        if value not in choices:
+            raise ValueError(f"应为 {', '.join(choices)} 之一, 而不是 {value!r}")
+        return value
+
+    return validate
+
+
+def string_list(choices: Optional[Iterable[str]] = None) -> Validator:
+    allowed = list(choices) if choices is not None else None
+
+    def validate(value: Any) -> List[str]:
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            raise ValueError(f"应为字符串列表, 而不是 {value!r}")
+        if allowed is not None and (invalid := [item for item in value if item not in allowed]):
+            raise ValueError(f"{', '.join(invalid)} 无效, 可选 {', '.join(allowed)}")
+        return value
+
+    return validate
+
+
+def validate_answers(data: Dict[str, Any], schema: Dict[str, Validator], source: str) -> Dict[str, Any]:
+    """按 schema 检查答案的类型与取值, 不允许未知的键"""
+    if not isinstance(data, dict):
+        raise AnswerFileError(f"{source} 应为键值表")
+    for key, value in data.items():
+        if key not in schema:
+            raise AnswerFileError(f"{source} 中有未知的键 {key}, 可用的键: {', '.join(schema)}")
+        try:
+            schema[key](value)
+        except ValueError as e:
+            raise AnswerFileError(f"{source} 中的 {key} 无效: {e}") from None
+    return data
+
+
+def load_answer_file(path: str) -> Dict[str, Any]:
+    text = Path(path).read_text(encoding="utf-8")
+    try:
+        if path.endswith(".json"):
+            return json.loads(text)
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+        return tomllib.loads(text)
+    except ValueError as e:
+        raise AnswerFileError(f"无法解析应答文件 {path}: {e}") from e
+
+
+def answers_init(parser) -> None:
+    """为子命令添加应答相关的参数"""
+    parser.add_argument("--answers", metavar="FILE", help="从 TOML / JSON 应答文件读取答案")
+    parser.add_argument("-y", "--yes", action="store_true", help="非交互模式, 未提供答案的问题使用默认值")
+
+
+class Answers:
+    def __init__(self, data: Dict[str, Any], interactive: bool = True):
+        self.data: Dict[str, Any] = data
+        self.interactive: bool = interactive
+
+    @classmethod
+    def from_args(cls, args: Namespace, schema: Dict[str, Validator]) -> "Answers":
+        """合并应答文件与命令行参数, 命令行参数优先; schema 为各个键的检查函数"""
+        data: Dict[str, Any] = {}
+        if path := getattr(args, "answers", None):
+            data.update(validate_answers(load_answer_file(path), schema, f"应答文件 {path}"))
+        for key in schema:
+            if (value := getattr(args, key, None)) is not None:
+                data[key] = value
+        interactive = not getattr(args, "yes", False)
+        if not interactive or all(key in data for key in schema):  # 不会弹出任何提示
+            use_plain_output()
+        return cls(data, interactive)
+
+    def get(self, key: str, default: T, ask: Optional[Callable[[], Optional[T]]] = None) -> Optional[T]:
+        """取得答案; 没有预设答案时, 交互模式下调用 ask 提问, 否则返回默认值"""
+        if key in self.data:
+            return self.data[key]
+        if not self.interactive or ask is None:
+            return default
+        return ask()
+
+    async def get_async(
+        self, key: str, default: T, ask: Optional[Callable[[], Awaitable[Optional[T]]]] = None
+    ) -> Optional[T]:
+        """与 `get` 相同, 但 ask 为协程函数"""
+        if key in self.data:
+            return self.data[key]
+        if not self.interactive or ask is None:
+            return default
+        return await ask()
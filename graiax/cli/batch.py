@@ -0,0 +1,176 @@
+"""批量创建项目.
+
+批量文件为 TOML 或 JSON, `defaults` 中为所有项目共用的答案, 每个 `project` 项需要给出 `path`:
+
+    [defaults]
+    manager = "pdm"
+    extras = ["standard"]
+
+    [[project]]
+    path = "bots/a"
+    modules = ["modules.a"]
+
+项目在进程池中以非交互模式并行创建. 依赖相同的项目中只有第一个进行解析并写入锁文件模板缓存,
+其余项目在它完成后直接使用缓存的模板与虚拟环境."""
+import hashlib
+import os
+import sys
+import time
+from argparse import Namespace
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from html import escape
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from graiax.cli.answers import (
+    AnswerFileError,
+    Answers,
+    load_answer_file,
+    validate_answers,
+)
+from graiax.cli.templates import TemplateKey
+from graiax.cli.util import cache_dir, pprint, use_plain_output
+
+
+class BatchFileError(AnswerFileError):
+    """批量文件格式错误"""
+
+
+@dataclass
+class BatchProject:
+    path: str
+    answers: Dict[str, Any]
+    key: Optional[TemplateKey]
+    ok: bool = False
+    elapsed: float = 0.0
+    cached: bool = False
+
+    @property
+    def log(self) -> Path:
+        return cache_dir("logs", hashlib.sha256(self.path.encode()).hexdigest()[:16] + ".log")
+
+
+def load_batch(path: str) -> List[BatchProject]:
+    from graiax.cli.command.init import answer_keys, defaults
+
+    data = load_answer_file(path)
+    shared = validate_answers(data.get("defaults", {}), answer_keys, f"批量文件 {path} 的 defaults")
+    projects = data.get("project")
+    if not isinstance(projects, list) or not projects:
+        raise BatchFileError(f"批量文件 {path} 中没有 project 项")
+    result = []
+    for item in projects:
+        if not isinstance(item, dict) or not isinstance(item.get("path"), str):
+            raise BatchFileError(f"批量文件 {path} 中的 project 项缺少 path")
+        answers = {**shared, **item}
+        project_path = os.path.abspath(answers.pop("path"))
+        validate_answers(answers, answer_keys, f"批量文件 {path} 中的项目 {project_path}")
+        plan = {**defaults, **answers}
+        key = None
+        if plan["manager"] in ("pdm", "poetry"):
+            mirrors = plan["mirrors"] if plan["manager"] == "poetry" else []
+            key = TemplateKey(plan["manager"], sorted(plan["extras"] or []), bool(plan["dev_tools"]), mirrors)
+        result.append(BatchProject(project_path, answers, key))
+    return result
+
+
+def create_in(
+    path: str, answers: Dict[str, Any], args: Namespace, available: Dict[str, bool], log: Path
+) -> bool:
+    """在进程池中运行: 切换到项目目录, 将输出重定向到日志文件后创建项目"""
+    from graiax.cli.command.init import create_project
+
+    os.makedirs(path, exist_ok=True)
+    os.chdir(path)
+    log.parent.mkdir(parents=True, exist_ok=True)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    fd = os.open(log, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    os.dup2(fd, 1)
+    os.dup2(fd, 2)
+    os.close(fd)
+    use_plain_output()
+    try:
+        return create_project(args, Answers(answers, interactive=False), available)
+    except Exception:
+        import traceback
+
+        traceback.print_exc()
+        return False
+    finally:
+        sys.stdout.flush()
+
+
+def print_report(projects: List[BatchProject], wall_time: float) -> None:
+    width = max(len(os.path.relpath(p.path)) for p in projects)
+    print()
+    print(f"{'project':<{width}}  {'status':<6}  {'deps':<8}  {'time s':>8}")
+    for p in projects:
+        status, deps = "ok" if p.ok else "failed", "cached" if p.cached else "resolved"
+        print(f"{os.path.relpath(p.path):<{width}}  {status:<6}  {deps:<8}  {p.elapsed:>8.1f}")
+    total = sum(p.elapsed for p in projects)
+    failed = [p for p in projects if not p.ok]
+    pprint(
+        f"<b>共 {len(projects)} 个项目, 成功 {len(projects) - len(failed)} 个, "
+        f"耗时 {wall_time:.1f}s (串行共需 {total:.1f}s)</b>"
+    )
+    for p in failed:
+        pprint(f"<red>! {escape(os.path.relpath(p.path))} 失败, 日志: {escape(str(p.log))}</red>")
+
+
+def run_batch(args: Namespace) -> None:
+    from graiax.cli import templates
+    from graiax.cli.command.init import check_managers
+
+    try:
+        projects = load_batch(args.batch)
+    except (OSError, AnswerFileError) as e:
+        pprint(f"<b><red>! {escape(str(e))}</red></b>")
+        raise SystemExit(1)
+    pprint(f"<b><green>批量创建 {len(projects)} 个项目...</green></b>")
+    available = check_managers()
+
+    # 依赖相同的项目只让第一个解析, 其余的等它写入缓存后再开始
+    leaders: List[BatchProject] = []
+    waiting: Dict[str, List[BatchProject]] = {}
+    for p in projects:
+        if p.key is None or not args.use_cache or templates.lookup(p.key):
+            leaders.append(p)
+        elif p.key.digest in waiting:
+            waiting[p.key.digest].append(p)
+        else:
+            waiting[p.key.digest] = []
+            leaders.append(p)
+
+    start = time.perf_counter()
+    done_count = 0
+    with ProcessPoolExecutor(args.jobs) as pool:
+        running: Dict[Future, Tuple[BatchProject, float]] = {}
+
+        def submit(p: BatchProject) -> None:
+            p.cached = p.key is not None and args.use_cache and templates.lookup(p.key) is not None
+            future = pool.submit(create_in, p.path, p.answers, args, available, p.log)
+            running[future] = (p, time.perf_counter())
+
+        for p in leaders:
+            submit(p)
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                p, submitted = running.pop(future)
+                p.elapsed = time.perf_counter() - submitted
+                try:
+                    p.ok = future.result()
+                except Exception:  # 进程池本身出错
+                    p.ok = False
+                done_count += 1
+                status = "<green>ok</green>" if p.ok else "<red>failed</red>"
+                name = escape(os.path.relpath(p.path))
+                pprint(f"[{done_count}/{len(projects)}] {name} {status} {p.elapsed:.1f}s")
+                if p.key is not None:
+                    for follower in waiting.pop(p.key.digest, []):
+                        submit(follower)
+    print_report(projects, time.perf_counter() - start)
+    if not all(p.ok for p in projects):
+        raise SystemExit(1)
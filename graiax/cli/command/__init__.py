@@ -1,8 +1,147 @@
+"""子命令清单.
+
+命令名, 帮助文本与参数定义会在首次运行时收集并缓存到磁盘,
+之后的启动只需读取清单即可构建 argparse, 仅在调用时导入对应的子命令模块.
+参数定义无法记录 (如使用了子解析器或不可序列化的默认值) 的命令在构建 argparse 时照常导入."""
+import hashlib
+import importlib
+import json
 import os
-from typing import List
+import sys
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from graiax.cli.util import atomic_write, cache_dir
+
+if TYPE_CHECKING:
+    from argparse import ArgumentParser
+
+MANIFEST_VERSION = 2
 
 commands: List[str] = [
     file[:-3]
     for file in os.listdir(os.path.dirname(__file__))
     if file.endswith(".py") and not file.startswith("_")
 ]
+
+
+class LazyRef:
+    """对 `module:qualname` 对象的延迟引用, 在首次调用时才导入"""
+
+    def __init__(self, ref: str):
+        self.ref: str = ref
+        self.__name__: str = ref.rpartition(".")[2].rpartition(":")[2]
+
+    def resolve(self) -> Any:
+        module, _, qualname = self.ref.partition(":")
+        obj = importlib.import_module(module)
+        for attr in qualname.split("."):
+            obj = getattr(obj, attr)
+        return obj
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"LazyRef({self.ref!r})"
+
+
+class ArgumentRecorder:
+    """代替 ArgumentParser 传入 `<cmd>_init`, 记录其中的 add_argument 调用"""
+
+    def __init__(self):
+        self.arguments: List[Dict[str, Any]] = []
+
+    def add_argument(self, *args: str, **kwargs: Any) -> None:
+        self.arguments.append({"args": list(args), "kwargs": {k: dump_value(v) for k, v in kwargs.items()}})
+
+
+def dump_value(value: Any) -> Any:
+    """将参数定义中的值转换为可 JSON 序列化的形式"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [dump_value(v) for v in value]
+    if callable(value) and hasattr(value, "__qualname__"):
+        return {"ref": f"{value.__module__}:{value.__qualname__}"}
+    raise TypeError(f"无法记录参数值 {value!r}")
+
+
+def load_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return [load_value(v) for v in value]
+    if isinstance(value, dict) and "ref" in value:
+        ref = LazyRef(value["ref"])
+        if ref.ref.startswith("builtins:"):
+            return ref.resolve()
+        return ref
+    return value
+
+
+def load_kwargs(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: load_value(v) for k, v in kwargs.items()}
+
+
+def manifest_key() -> str:
+    """由子命令文件的元数据生成清单缓存键"""
+    hasher = hashlib.sha256(f"{MANIFEST_VERSION}|{sys.version}|{__file__}".encode())
+    directory = os.path.dirname(__file__)
+    for cmd in sorted(commands):
+        stat = os.stat(os.path.join(directory, f"{cmd}.py"))
+        hasher.update(f"|{cmd}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return hasher.hexdigest()
+
+
+def build_manifest() -> List[Dict[str, Any]]:
+    """导入所有子命令模块并收集清单"""
+    manifest = []
+    for cmd in sorted(commands):
+        module = importlib.import_module(f"{__package__}.{cmd}")
+        func = getattr(module, cmd)
+        recorder = ArgumentRecorder()
+        arguments: Optional[List[Dict[str, Any]]] = recorder.arguments
+        if parser_init_func := getattr(module, f"{cmd}_init", None):
+            try:
+                parser_init_func(recorder)
+            except (AttributeError, TypeError):  # 仅支持记录 add_argument, 其余情况改为在启动时导入
+                arguments = None
+        manifest.append(
+            {
+                "name": cmd,
+                "ref": f"{module.__name__}:{cmd}",
+                "help": func.__doc__,
+                "arguments": arguments,
+            }
+        )
+    return manifest
+
+
+def load_manifest() -> List[Dict[str, Any]]:
+    """读取缓存的子命令清单, 缓存失效时重新生成"""
+    path = cache_dir("commands.json")
+    key = manifest_key()
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data["key"] == key:
+            return data["commands"]
+    except (OSError, ValueError, KeyError):
+        pass
+    manifest = build_manifest()
+    try:
+        atomic_write(path, json.dumps({"key": key, "commands": manifest}, ensure_ascii=False))
+    except OSError:  # 缓存目录不可写时仅使用内存中的清单
+        pass
+    return manifest
+
+
+def init_parser(spec: Dict[str, Any], parser: "ArgumentParser") -> None:
+    """按清单添加子命令的参数, 清单中没有参数定义时导入子命令模块并调用 `<cmd>_init`"""
+    if spec["arguments"] is None:
+        resolve(f"{spec['ref']}_init")(parser)
+        return
+    for argument in spec["arguments"]:
+        parser.add_argument(*argument["args"], **load_kwargs(argument["kwargs"]))
+
+
+def resolve(ref: str) -> Callable:
+    """导入并返回子命令函数"""
+    return LazyRef(ref).resolve()
@@ -0,0 +1,30 @@
+import os
+from html import escape
+from pathlib import Path
+
+from graiax.cli.util import pprint
+
+
+def build_init(parser):
+    parser.add_argument("-o", "--output", default="graiax-bundle.zip", help="输出的模块包路径")
+    parser.add_argument("-O", "--optimize", type=int, default=-1, choices=[-1, 0, 1, 2], help="字节码优化等级")
+
+
+def build(args):
+    """将 [tool.graiax].load 中的模块及其本地依赖预编译打包"""
+    from graiax.ignite import BundleError, extract_modules_from_toml
+    from graiax.ignite.bundle import build_bundle
+
+    modules = extract_modules_from_toml(Path(os.getcwd()).joinpath("pyproject.toml"))
+    if not modules:
+        pprint("<b><red>! [tool.graiax].load 为空</red></b>")
+        raise SystemExit(1)
+    try:
+        manifest = build_bundle(modules, args.output, os.getcwd(), args.optimize)
+    except (BundleError, SyntaxError) as e:
+        pprint(f"<b><red>! 打包失败: {escape(str(e))}</red></b>")
+        raise SystemExit(1)
+    pprint(
+        f"<b><green>已将 {len(manifest['load'])} 个模块 (共 {len(manifest['modules'])} 个本地模块) "
+        f"打包至 <magenta>{escape(args.output)}</magenta></green></b>"
+    )
@@ -0,0 +1,120 @@
+import json
+import time
+from html import escape
+
+from graiax.cli.util import pprint
+
+ACTIONS = ["list", "remove", "clear", "prune"]
+
+
+def cache_init(parser):
+    parser.add_argument("action", choices=ACTIONS, help="列出, 删除, 清空或按时间清理锁文件模板")
+    parser.add_argument("keys", nargs="*", help="要删除的模板 (remove)")
+    parser.add_argument("--envs", action="store_true", help="操作虚拟环境仓库而不是锁文件模板")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出 (list)")
+    parser.add_argument("--max-age", type=float, default=30, help="删除超过该天数未使用的模板 (prune)")
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def list_templates(args) -> None:
+    from graiax.cli import templates
+
+    found = list(templates.iter_templates())
+    if args.json:
+        data = [
+            {
+                "key": t.key.digest,
+                "manager": t.key.manager,
+                "extras": t.key.extras,
+                "dev_tools": t.key.dev_tools,
+                "mirrors": t.key.mirrors,
+                "python": t.key.python,
+                "wheelhouse": t.wheelhouse is not None,
+                "size": t.size,
+                "created": t.created,
+                "last_used": t.last_used,
+            }
+            for t in found
+        ]
+        print(json.dumps(data, indent=2))
+        return
+    if not found:
+        pprint(f"<yellow>没有缓存的锁文件模板 ({escape(str(templates.templates_dir()))})</yellow>")
+        return
+    for t in found:
+        extras = ",".join(t.key.extras) or "-"
+        mirrors = escape(",".join(t.key.mirrors)) or "-"
+        used = time.strftime("%Y-%m-%d %H:%M", time.localtime(t.last_used))
+        pprint(
+            f"<magenta>{t.key.digest}</magenta>  {t.key.manager:<6} py{t.key.python:<5} extras={extras}"
+            f" dev={'y' if t.key.dev_tools else 'n'} mirrors={mirrors}"
+            f"  {'wheelhouse' if t.wheelhouse else 'lock only'}  {format_size(t.size)}  最近使用 {used}"
+        )
+
+
+def list_envs(args) -> None:
+    from graiax.cli import envstore
+
+    found = list(envstore.iter_envs())
+    if args.json:
+        data = [
+            {
+                "key": e.digest,
+                "manager": e.manager,
+                "python": e.python,
+                "origin": e.origin,
+                "size": e.size,
+                "created": e.created,
+                "last_used": e.last_used,
+            }
+            for e in found
+        ]
+        print(json.dumps(data, indent=2))
+        return
+    if not found:
+        pprint(f"<yellow>环境仓库为空 ({escape(str(envstore.envs_dir()))})</yellow>")
+        return
+    for e in found:
+        used = time.strftime("%Y-%m-%d %H:%M", time.localtime(e.last_used))
+        pprint(
+            f"<magenta>{e.digest}</magenta>  {e.manager:<6} py{e.python:<5} {format_size(e.size)}"
+            f"  最近使用 {used}  来自 {escape(e.origin)}"
+        )
+
+
+def cache(args):
+    """管理 init 使用的锁文件模板缓存与虚拟环境仓库"""
+    from graiax.cli import envstore, templates
+
+    if args.action == "list":
+        return list_envs(args) if args.envs else list_templates(args)
+    kind = "环境" if args.envs else "模板"
+    if args.envs:
+        found = {e.digest: e for e in envstore.iter_envs()}
+    else:
+        found = {t.key.digest: t for t in templates.iter_templates()}
+    if args.action == "remove":
+        if not args.keys:
+            pprint(f"<b><red>! 请指定要删除的{kind}</red></b>")
+            raise SystemExit(1)
+        for key in args.keys:
+            if key in found:
+                found[key].remove()
+                pprint(f"<green>已删除 <magenta>{escape(key)}</magenta></green>")
+            else:
+                pprint(f"<yellow>{kind} <magenta>{escape(key)}</magenta> 不存在</yellow>")
+        return
+    if args.action == "clear":
+        removed = list(found.values())
+        for entry in removed:
+            entry.remove()
+    else:
+        removed = (envstore if args.envs else templates).prune(args.max_age * 24 * 60 * 60)
+    pprint(f"<green>已删除 {len(removed)} 个{kind}</green>")
@@ -0,0 +1,145 @@
+import datetime
+import os
+import subprocess
+import sys
+import time
+from html import escape
+from pathlib import Path
+from typing import Optional
+
+from graiax.cli.util import pprint
+
+ACTIONS = ["start", "stop", "status", "run", "client"]
+
+
+def daemon_init(parser):
+    parser.add_argument(
+        "action",
+        nargs="?",
+        default="start",
+        choices=ACTIONS,
+        help="start: 在后台启动, stop: 停止, status: 查看状态, run: 在前台运行, client: 生成快速启动脚本",
+    )
+    parser.add_argument("--timeout", type=float, default=10, help="等待后台进程就绪的时间 (秒)")
+    parser.add_argument("-o", "--output", help="启动脚本的输出路径, 默认位于缓存目录")
+
+
+def start(timeout: float) -> None:
+    from graiax.cli.daemon import log_path, request
+
+    deadline = time.monotonic() + timeout
+    if info := request("ping"):
+        if info["status"] != "stale":
+            pprint(f"<yellow>后台进程已在运行 (pid {info['pid']})</yellow>")
+            return
+        pprint(f"<yellow>CLI 代码已更新, 等待旧的后台进程 (pid {info['pid']}) 退出...</yellow>")
+        while request("ping", 1) is not None:  # 回复 stale 后即退出并删除 socket
+            if time.monotonic() > deadline:
+                pprint("<b><red>! 旧的后台进程没有退出</red></b>")
+                raise SystemExit(1)
+            time.sleep(0.05)
+    log = log_path()
+    log.parent.mkdir(parents=True, exist_ok=True)
+    with open(log, "ab") as output:
+        proc = subprocess.Popen(
+            [sys.executable, "-c", "from graiax.cli.daemon import serve; serve()"],
+            stdin=subprocess.DEVNULL,
+            stdout=output,
+            stderr=subprocess.STDOUT,
+            cwd="/",
+            start_new_session=True,  # 不随当前终端退出
+        )
+    while time.monotonic() < deadline:
+        if info := request("ping", 1):
+            pprint(f"<green>后台进程已启动 (pid {info['pid']})</green>")
+            return
+        if proc.poll() is not None:
+            break
+        time.sleep(0.05)
+    pprint(f"<b><red>! 后台进程启动失败，请查看日志 {escape(str(log))}</red></b>")
+    raise SystemExit(1)
+
+
+CLIENT = """\
+#!{python} -SE
+# 由 `graiax daemon client` 生成: 不初始化 site, 只导入 graiax.cli.daemon, 后台进程不可用时交给完整的 graiax
+import sys
+
+sys.path.insert(0, {root!r})
+from graiax.cli.daemon import forward
+
+code = forward(sys.argv)
+if code is None:
+    import os
+
+    os.execv({python!r}, [{python!r}, "-c", {entry!r}, *sys.argv[1:]])
+sys.exit(code)
+"""
+
+
+def write_client(output: Optional[str]) -> None:
+    """生成以 `python -S -E` 运行的启动脚本, 连接当前解释器对应的后台进程"""
+    from graiax.cli.daemon import daemon_key, package_root
+    from graiax.cli.util import cache_dir
+
+    if any(c.isspace() for c in sys.executable):
+        pprint(f"<b><red>! 解释器路径 {escape(sys.executable)} 含有空白字符, 无法写入 shebang</red></b>")
+        raise SystemExit(1)
+    target = Path(output) if output else cache_dir(f"graiax-client-{daemon_key()}")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    entry = "import sys; from graiax.cli import main; sys.argv[0] = 'graiax'; main()"
+    root = os.path.dirname(os.path.dirname(package_root()))
+    target.write_text(CLIENT.format(python=sys.executable, root=root, entry=entry), encoding="utf-8")
+    target.chmod(0o755)
+    pprint(f"<green>已生成启动脚本 <magenta>{escape(str(target))}</magenta></green>")
+    pprint("<cyan>将其链接为 PATH 中靠前的 graiax 即可使用; 更换解释器或 graiax 的安装位置后需要重新生成</cyan>")
+
+
+def stop() -> None:
+    from graiax.cli.daemon import request
+
+    if info := request("stop"):
+        pprint(f"<green>已停止后台进程 (pid {info['pid']}, 共处理 {info['served']} 次调用)</green>")
+    else:
+        pprint("<yellow>后台进程未在运行</yellow>")
+
+
+def status() -> None:
+    from graiax.cli.daemon import log_path, request, socket_path
+
+    info = request("ping")
+    if info is None:
+        pprint("<yellow>后台进程未在运行</yellow>")
+        raise SystemExit(1)
+    started = datetime.datetime.fromtimestamp(info["started"]).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"pid      {info['pid']}")
+    print(f"socket   {socket_path()}")
+    print(f"started  {started}")
+    print(f"served   {info['served']}")
+    print(f"log      {log_path()}")
+    if info["status"] == "stale":
+        pprint("<yellow>CLI 代码已更新, 后台进程已退出, 请重新启动</yellow>")
+
+
+def daemon(args):
+    """管理预热的后台进程, 使之后的 graiax 调用无需重新启动解释器"""
+    from graiax.cli.daemon import serve, supported
+
+    if not supported():
+        pprint("<b><red>! 当前平台不支持 Unix socket 文件描述符传递</red></b>")
+        raise SystemExit(1)
+    if os.environ.get("GRAIAX_NO_DAEMON"):
+        pprint("<yellow>已设置 GRAIAX_NO_DAEMON, 客户端不会使用后台进程</yellow>")
+    if args.action == "start":
+        start(args.timeout)
+    elif args.action == "stop":
+        stop()
+    elif args.action == "status":
+        status()
+    elif args.action == "client":
+        write_client(args.output)
+    elif args.action == "run":
+        try:
+            serve()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+from html import escape
+from pathlib import Path
+
+from graiax.cli.util import atomic_write, pprint
+
+CHECKS = ["imports"]
+
+
+def doctor_init(parser):
+    parser.add_argument("check", choices=CHECKS, help="诊断项目: imports 分析各模块的导入耗时")
+    parser.add_argument("--top", type=int, default=10, help="摘要中显示的条目数")
+    parser.add_argument("-o", "--output", default="importtime.folded", help="折叠栈 (火焰图) 输出文件")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出摘要")
+    parser.add_argument("--python", default=sys.executable, help="用于加载模块的解释器")
+
+
+def print_summary(costs, packages, startup: int, top: int) -> None:
+    width = max([len("module"), *(len(c.module) for c in costs)])
+    print(f"{'module':<{width}}  {'total ms':>9}  {'own ms':>8}  {'stdlib ms':>9}  {'3rd ms':>8}  heaviest")
+    for c in sorted(costs, key=lambda c: c.total, reverse=True)[:top]:
+        heaviest = sorted(c.third_party.items(), key=lambda item: item[1], reverse=True)[:3]
+        names = ", ".join(f"{name} ({time / 1000:.0f})" for name, time in heaviest)
+        print(
+            f"{c.module:<{width}}  {c.total / 1000:>9.1f}  {c.own / 1000:>8.1f}"
+            f"  {c.stdlib / 1000:>9.1f}  {sum(c.third_party.values()) / 1000:>8.1f}  {names}"
+        )
+    if packages:
+        print()
+        width = max([len("package"), *(len(p.package) for p in packages[:top])])
+        print(f"{'package':<{width}}  {'ms':>8}  {'paid by':<24}  shared with")
+        for p in packages[:top]:
+            shared = [mod for mod in p.used_by if mod != p.paid_by]
+            print(f"{p.package:<{width}}  {p.cost / 1000:>8.1f}  {p.paid_by:<24}  {', '.join(shared) or '-'}")
+    total = sum(c.total for c in costs)
+    pprint(f"<b>解释器与 graia 启动 {startup / 1000:.0f} ms, 加载列表共 {total / 1000:.0f} ms</b>")
+
+
+def imports(args) -> None:
+    from graiax.cli.importtime import attribute, fold, shared_packages, trace_modules
+    from graiax.ignite import extract_modules_from_toml
+    from graiax.ignite.graph import build_graph, topological_order
+
+    cwd = os.getcwd()
+    sys.path.insert(0, cwd)
+    modules = extract_modules_from_toml(Path(cwd).joinpath("pyproject.toml"))
+    if not modules:
+        pprint("<b><red>! [tool.graiax].load 为空</red></b>")
+        raise SystemExit(1)
+    graph = build_graph(modules)
+    order = topological_order(graph)
+
+    code, segments, stderr = trace_modules(order, cwd, args.python)
+    if len(segments) == 1:  # 没有开始加载任何模块
+        pprint(f"<b><red>! 加载进程异常退出 ({code})，请在项目环境中运行</red></b>")
+        print(stderr.strip()[-2000:], file=sys.stderr)
+        raise SystemExit(1)
+
+    project = {mod.partition(".")[0] for mod in modules}
+    costs = [attribute(segment, project) for segment in segments[1:]]
+    packages = shared_packages(costs, {name: node.external for name, node in graph.items()})
+    atomic_write(Path(args.output), "\n".join(fold(segments)) + "\n")
+    failed = [c for c in costs if c.error is not None]
+
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "startup_ms": segments[0].cumulative / 1000,
+                    "modules": [c.as_dict() for c in costs],
+                    "packages": [p.as_dict() for p in packages],
+                    "flamegraph": args.output,
+                },
+                indent=2,
+                ensure_ascii=False,
+            )
+        )
+    else:
+        print_summary(costs, packages, segments[0].cumulative, args.top)
+        pprint(f"<green>折叠栈已写入 {escape(args.output)}，可使用 flamegraph.pl 或 speedscope 查看</green>")
+        for c in failed:
+            pprint(f"<red>! {escape(c.module)} 加载失败: {escape(c.error)}</red>")
+    if failed:
+        raise SystemExit(1)
+
+
+def doctor(args):
+    """诊断项目问题, 如分析模块导入耗时"""
+    if args.check == "imports":
+        imports(args)
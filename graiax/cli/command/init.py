@@ -1,13 +1,31 @@
+import asyncio
+import hashlib
+import json
 import os
+import re
+import shutil
 import subprocess
-from collections import deque
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from html import escape
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncContextManager, Dict, List, Optional, Tuple
 
-import tomlkit
+from graiax.cli import envstore, templates
+from graiax.cli.answers import (
+    AnswerFileError,
+    Answers,
+    Validator,
+    answers_init,
+    boolean,
+    one_of,
+    string_list,
+)
+from graiax.cli.templates import LockTemplate, TemplateKey
+from graiax.cli.util import pprint, run_commands, run_quiet, stream_command
 
-from graiax.cli.prompt import Choice
-from graiax.cli.prompt.export import BooleanPrompt, FChoice, SelectPrompt
-from graiax.cli.util import pprint
+if TYPE_CHECKING:
+    from graiax.cli.prompt.wizard import Wizard
 
 extras_intro = """<b><cyan>\
 Scheduler: 任务计划器
@@ -16,15 +34,106 @@ Richuru: 丰富的日志输出
 FastAPI: 用于提供反向适配器后端</cyan></b>
 """
 
-extra_prompt = SelectPrompt(
-    "添加额外依赖？",
-    choices=[
-        Choice("[standard]: 包括 Scheduler, Richuru", "standard"),
-        Choice("Alconna", "alconna"),
-        Choice("FastAPI", "fastapi"),
-    ],
-    default=[0],
-)
+extras = [
+    ("[standard]: 包括 Scheduler, Richuru", "standard"),
+    ("Alconna", "alconna"),
+    ("FastAPI", "fastapi"),
+]
+
+managers = ["pip", "poetry", "pdm"]
+
+pypi_mirrors = {
+    "aliyun": "https://mirrors.aliyun.com/pypi/simple",
+    "tuna-tsinghua": "https://pypi.tuna.tsinghua.edu.cn/simple",
+}
+
+defaults: Dict[str, Any] = {
+    "manager": "pdm",
+    "extras": ["standard"],
+    "dev_tools": True,
+    "install": True,
+    "mirrors": ["aliyun"],
+    "create": True,
+}
+
+answer_keys: Dict[str, Validator] = {
+    "manager": one_of(*managers),
+    "extras": string_list(data for _, data in extras),
+    "dev_tools": boolean,
+    "mirrors": string_list(),
+    "install": boolean,
+    "create": boolean,
+    "modules": string_list(),
+}
+
+
+def init_init(parser):
+    parser.add_argument("--manager", choices=managers, help="项目使用的包管理器")
+    parser.add_argument(
+        "--extras", nargs="*", choices=[data for _, data in extras], help="graia-ariadne 的额外依赖"
+    )
+    parser.add_argument(
+        "--dev-tools", dest="dev_tools", action="store_true", default=None, help="添加 black 与 isort"
+    )
+    parser.add_argument("--no-dev-tools", dest="dev_tools", action="store_false", default=None)
+    parser.add_argument("--mirrors", nargs="*", help=f"PyPI 镜像 (poetry), 可选 {', '.join(pypi_mirrors)} 或 URL")
+    parser.add_argument("--install", dest="install", action="store_true", default=None, help="创建后安装依赖")
+    parser.add_argument("--no-install", dest="install", action="store_false", default=None)
+    parser.add_argument("--modules", nargs="*", help="运行时要加载的模块")
+    parser.add_argument("--offline", action="store_true", help="只使用缓存的锁文件模板, 不联网解析依赖")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="不读取也不写入锁文件模板缓存")
+    parser.add_argument("--batch", metavar="FILE", help="按 TOML / JSON 批量文件并行创建多个项目")
+    parser.add_argument("-j", "--jobs", type=int, help="批量创建时的并行进程数, 默认为 CPU 核数")
+    answers_init(parser)
+
+
+async def ask_extras() -> List[str]:
+    from graiax.cli.prompt import Choice
+    from graiax.cli.prompt.export import SelectPrompt
+
+    choices = await SelectPrompt(
+        "添加额外依赖？",
+        choices=[Choice(name, data) for name, data in extras],
+        default=[0],
+    ).prompt_async()
+    return [choice.data for choice in choices or []]
+
+
+async def ask_bool_async(annotation: str) -> bool:
+    from graiax.cli.prompt.export import BooleanPrompt
+
+    return await BooleanPrompt(annotation, default=True).prompt_async(default=True)
+
+
+async def ask_mirrors() -> List[str]:
+    from graiax.cli.prompt import Choice
+    from graiax.cli.prompt.export import SelectPrompt
+
+    choices = [Choice(name, name) for name in pypi_mirrors]
+    prompt = SelectPrompt("添加哪些 PyPI 镜像？", choices=choices, default=[0])
+    return [choice.data for choice in await prompt.prompt_async(default=[choices[0]])]
+
+
+async def ask_manager() -> str:
+    from collections import deque
+
+    from graiax.cli.prompt.export import FChoice, SelectPrompt
+
+    choices = await SelectPrompt(
+        "请选择新项目的包管理器",
+        [FChoice(manager) for manager in managers],
+        validator=lambda x: len(x) == 1,
+        range=(0, 1),
+        overflow_action=deque.popleft,
+        default=[0],
+    ).prompt_async()
+    return choices[0].data if choices else None
+
+
+def mirror_source(index: int, mirror: str) -> Dict[str, Any]:
+    url = pypi_mirrors.get(mirror, mirror)
+    name = mirror if mirror in pypi_mirrors else f"mirror-{index}"
+    return {"name": name, "url": url, "default": not index}
 
 
 def toml_exist():
@@ -36,76 +145,427 @@ def create_structure():
     ...
 
 
-def pdm():
-    subprocess.run(["pdm", "init", "-n"])
-    data = tomlkit.loads(Path(os.getcwd()).joinpath("pyproject.toml").read_text())
-    project = data["project"]
-    project["license"]["text"] = "AGPL-3.0"  # modify license
-    Path(os.getcwd()).joinpath("pyproject.toml").write_text(tomlkit.dumps(data))
-    pprint("<green>添加依赖...</green>")
+@dataclass
+class ScaffoldPlan:
+    """用户对项目依赖的全部选择"""
+
+    manager: str
+    extras: List[str]
+    dev_tools: bool
+    install: bool
+    mirrors: List[str] = field(default_factory=list)
+    versions: Dict[str, str] = field(default_factory=dict)
+    """解析得到的版本, 用于写入兼容的版本约束; 解析前为空, 此时不限制版本"""
+
+    @property
+    def ariadne(self) -> str:
+        return f"graia-ariadne[{','.join(self.extras)}]" if self.extras else "graia-ariadne"
+
+    @property
+    def packages(self) -> List[str]:
+        return ["graia-ariadne", "graiax-ignite"] + (["black", "isort"] if self.dev_tools else [])
+
+    def specifier(self, package: str) -> str:
+        """与 `pdm add --save-compatible` / `poetry add` 相同的兼容版本约束"""
+        if (version := self.versions.get(package)) is None:
+            return "*" if self.manager == "poetry" else ""
+        if self.manager == "poetry":
+            return f"^{version}"
+        return f">={version},<{caret_bound(version)}"
+
+
+def caret_bound(version: str) -> str:
+    """`^version` 的上界: 第一个非零的版本号加一"""
+    parts = [int(part) for part in re.findall(r"\d+", version.split("+")[0])[:3]] or [0]
+    parts += [0] * (3 - len(parts))
+    index = next((i for i, part in enumerate(parts) if part), len(parts) - 1)
+    return ".".join(map(str, parts[:index] + [parts[index] + 1] + [0] * (len(parts) - index - 1)))
+
+
+def requirement_name(requirement: str) -> str:
+    return re.split(r"[\[<>=!~;\s]", requirement, 1)[0].lower()
+
+
+def locked_versions(manager: str, packages: List[str]) -> Dict[str, str]:
+    """从锁文件中读取给定包解析得到的版本"""
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        import tomli as tomllib
+
+    try:
+        lock = tomllib.loads(Path(os.getcwd()).joinpath(templates.LOCK_FILES[manager]).read_text("utf-8"))
+    except (OSError, ValueError):
+        return {}
+    wanted = {package.lower() for package in packages}
+    return {
+        package["name"].lower(): package["version"]
+        for package in lock.get("package", [])
+        if package.get("name", "").lower() in wanted and "version" in package
+    }
+
+
+plan_keys = ["extras", "dev_tools", "install"]
+wizard_keys = ["manager", "create", "mirrors", *plan_keys]
+
+
+def open_wizard(answers: Answers) -> Optional["Wizard"]:
+    """还有问题需要回答时创建 Wizard, 从选择包管理器到安装依赖的提问共用一个 Application"""
+    if answers.interactive and any(key not in answers.data for key in wizard_keys):
+        from graiax.cli.prompt.wizard import Wizard
+
+        return Wizard()
+    return None
+
+
+def suspend(wizard: Optional["Wizard"]) -> AsyncContextManager[Any]:
+    """直接向终端输出时暂时隐藏 Wizard 的应用"""
+    return wizard.suspend() if wizard else AsyncExitStack()
+
+
+async def collect_plan(manager: str, mirrors: List[str], answers: Answers) -> ScaffoldPlan:
     pprint(extras_intro, "")
-    extra = extra_prompt.prompt()
-    format_tools = BooleanPrompt("是否添加 black 与 isort 到开发依赖？", default=True).prompt(default=True)
-    subprocess.run(
-        (
-            (
-                [
-                    "pdm",
-                    "add",
-                    f"""graia-ariadne{f"[{','.join(e.data for e in extra)}]" if extra else ''}""",
-                    "graiax-ignite",
-                ]
-            )
-            + ["--no-sync", "--save-compatible"]
-        )
+    extra = await answers.get_async("extras", defaults["extras"], ask_extras)
+    format_tools = await answers.get_async(
+        "dev_tools", defaults["dev_tools"], lambda: ask_bool_async("是否添加 black 与 isort 到开发依赖？")
     )
-    if format_tools:
-        subprocess.run(["pdm", "add", "--dev", "black", "isort", "--no-sync", "--save-compatible"])
+    install = await answers.get_async(
+        "install", defaults["install"], lambda: ask_bool_async(f"现在安装依赖？你之后可以通过 {manager} install 来手动安装")
+    )
+    return ScaffoldPlan(manager, extra or [], bool(format_tools), bool(install), mirrors)
 
-    install = BooleanPrompt("现在安装依赖？你之后可以通过 pdm install 来手动安装", default=True).prompt(default=True)
-    if install:
-        subprocess.run(["pdm", "install"])
 
+def check_managers() -> Dict[str, bool]:
+    """并发检查各个包管理器是否可用"""
+    candidates = [manager for manager in managers if manager != "pip"]
+    codes = run_commands(*([manager, "--version"] for manager in candidates), prefix=True)
+    return {manager: code == 0 for manager, code in zip(candidates, codes)}
 
-pypi_mirrors = [
-    Choice("aliyun", "https://mirrors.aliyun.com/pypi/simple"),
-    Choice("tuna-tsinghua", "https://pypi.tuna.tsinghua.edu.cn/simple"),
-]
 
+def create_metadata(manager: str, mirrors: List[str]) -> None:
+    """调用包管理器生成项目元数据, 并修改许可证与镜像"""
+    import tomlkit
 
-def poetry():
-    subprocess.run(["poetry", "init", "--ansi", "-n", "--quiet"])
-    data = tomlkit.loads(Path(os.getcwd()).joinpath("pyproject.toml").read_text())
-    data["tool"]["poetry"].update({"license": "AGPL-3.0"})  # modify license
-    if mirrors := SelectPrompt("添加哪些 PyPI 镜像？", choices=pypi_mirrors, default=[0]).prompt(
-        default=[pypi_mirrors[0]]
-    ):
-        source_aot = tomlkit.aot()
-        for index, mirror in enumerate(mirrors):
-            source_aot.append(tomlkit.item({"name": mirror.name, "url": mirror.data, "default": not index}))
-        data["tool"]["poetry"].append("source", source_aot)
-
-    Path(os.getcwd()).joinpath("pyproject.toml").write_text(tomlkit.dumps(data), encoding="utf-8")
-    pprint("<green>添加依赖...</green>")
-    pprint(extras_intro, "")
-    extra = extra_prompt.prompt()
-    format_tools = BooleanPrompt("是否添加 black 与 isort 到开发依赖？", default=True).prompt(default=True)
-    subprocess.run(
+    if manager == "pdm":
+        subprocess.run(["pdm", "init", "-n"])
+    else:
+        subprocess.run(["poetry", "init", "--ansi", "-n", "--quiet"])
+    pyproject = Path(os.getcwd()).joinpath("pyproject.toml")
+    data = tomlkit.loads(pyproject.read_text(encoding="utf-8"))
+    if manager == "pdm":
+        data["project"]["license"]["text"] = "AGPL-3.0"  # modify license
+    else:
+        data["tool"]["poetry"].update({"license": "AGPL-3.0"})  # modify license
+        if mirrors:
+            source_aot = tomlkit.aot()
+            for index, mirror in enumerate(mirrors):
+                source_aot.append(tomlkit.item(mirror_source(index, mirror)))
+            data["tool"]["poetry"].append("source", source_aot)
+    pyproject.write_text(tomlkit.dumps(data), encoding="utf-8")
+
+
+def write_dependencies(plan: ScaffoldPlan) -> None:
+    """将依赖写入 pyproject.toml, 重复调用时覆盖之前写入的内容"""
+    import tomlkit
+
+    pyproject = Path(os.getcwd()).joinpath("pyproject.toml")
+    data = tomlkit.loads(pyproject.read_text(encoding="utf-8"))
+    if plan.manager == "pdm":
+        dependencies = data["project"].setdefault("dependencies", tomlkit.array())
+        for dep in [
+            dep for dep in dependencies if requirement_name(str(dep)) in ("graia-ariadne", "graiax-ignite")
+        ]:
+            dependencies.remove(dep)
+        dependencies.extend(
+            [
+                plan.ariadne + plan.specifier("graia-ariadne"),
+                "graiax-ignite" + plan.specifier("graiax-ignite"),
+            ]
+        )
+        tool_pdm = data.setdefault("tool", tomlkit.table(True)).setdefault("pdm", tomlkit.table())
+        dev = tool_pdm.setdefault("dev-dependencies", tomlkit.table()).setdefault("dev", tomlkit.array())
+        for dep in [dep for dep in dev if requirement_name(str(dep)) in ("black", "isort")]:
+            dev.remove(dep)
+        if plan.dev_tools:
+            dev.extend(["black" + plan.specifier("black"), "isort" + plan.specifier("isort")])
+    else:
+        tool_poetry = data["tool"]["poetry"]
+        dependencies = tool_poetry.setdefault("dependencies", tomlkit.table())
+        if plan.extras:
+            ariadne = tomlkit.inline_table()
+            ariadne.update({"version": plan.specifier("graia-ariadne"), "extras": plan.extras})
+            dependencies["graia-ariadne"] = ariadne
+        else:
+            dependencies["graia-ariadne"] = plan.specifier("graia-ariadne")
+        dependencies["graiax-ignite"] = plan.specifier("graiax-ignite")
+        group = tool_poetry.setdefault("group", tomlkit.table(True)).setdefault("dev", tomlkit.table())
+        dev = group.setdefault("dependencies", tomlkit.table())
+        for dep in ("black", "isort"):
+            if plan.dev_tools:
+                dev[dep] = plan.specifier(dep)
+            elif dep in dev:
+                del dev[dep]
+    pyproject.write_text(tomlkit.dumps(data), encoding="utf-8")
+
+
+def lock_command(manager: str, reuse: bool = False, legacy_poetry: bool = False) -> List[str]:
+    if manager == "pdm":
+        return ["pdm", "lock", "--update-reuse"] if reuse else ["pdm", "lock"]
+    if reuse and legacy_poetry:
+        return ["poetry", "lock", "--no-update", "--ansi"]
+    return ["poetry", "lock", "--ansi"]  # Poetry 2.0 起 lock 默认复用已有锁文件, 并移除了 --no-update
+
+
+poetry_major_version: Optional[int] = None
+
+
+async def poetry_major() -> int:
+    """已安装的 Poetry 的主版本号, 无法识别时视为 2"""
+    global poetry_major_version
+
+    if poetry_major_version is None:
+        code, output = await run_quiet(["poetry", "--version"])
+        match = re.search(r"(\d+)\.\d+", output) if code == 0 else None
+        poetry_major_version = int(match[1]) if match else 2
+    return poetry_major_version
+
+
+async def reuse_lock_command(manager: str) -> List[str]:
+    """在已有锁文件的基础上解析, 尽量不改变已锁定的版本"""
+    legacy = manager == "poetry" and await poetry_major() < 2
+    return lock_command(manager, reuse=True, legacy_poetry=legacy)
+
+
+def install_command(manager: str) -> List[str]:
+    """按已有的锁文件安装, 不会重新解析"""
+    return ["pdm", "sync"] if manager == "pdm" else ["poetry", "install", "--ansi"]
+
+
+def export_command(manager: str) -> List[str]:
+    if manager == "pdm":
+        return ["pdm", "export", "--without-hashes"]
+    return ["poetry", "export", "-f", "requirements.txt", "--without-hashes"]
+
+
+def pip_command(manager: str, *args: str) -> List[str]:
+    """在项目环境中运行 pip"""
+    return [manager, "run", "python", "-m", "pip", *args]
+
+
+async def project_env(manager: str) -> Optional[Tuple[Path, str]]:
+    """包管理器为项目选定的虚拟环境及其 Python 版本, 尚不存在时由包管理器创建; 不是虚拟环境时返回 None"""
+    code, output = await run_quiet(
         [
-            "poetry",
-            "add",
-            "graia-ariadne",
-            "graiax-ignite",
-            "--lock",
-            "--ansi",
+            manager,
+            "run",
+            "python",
+            "-c",
+            "import sys; print(sys.prefix); print('%d.%d' % sys.version_info[:2])",
         ]
     )
-    format_tools = BooleanPrompt("是否添加 black 与 isort 到开发依赖？", default=True).prompt(default=True)
-    if format_tools:
-        subprocess.run(["poetry", "add", "--dev", "black", "isort", "--lock", "--ansi"])
-    install = BooleanPrompt("现在安装依赖？你之后可以通过 poetry install 来手动安装", default=True).prompt(default=True)
-    if install:
-        subprocess.run(["poetry", "install", "--ansi"])
+    lines = output.strip().splitlines()
+    if code != 0 or len(lines) < 2:
+        return None
+    venv = Path(lines[-2])
+    return (venv, lines[-1]) if venv.joinpath("pyvenv.cfg").is_file() else None
+
+
+async def apply_template(template: LockTemplate, install: bool, offline: bool = False) -> bool:
+    """使用缓存的锁文件, 存在 wheelhouse 时离线安装; 离线时依赖只能来自环境仓库或 wheelhouse"""
+    manager = template.key.manager
+    venv = await project_env(manager) if install else None
+    env = envstore.lookup(envstore.env_digest(manager, template.lock_file, venv[1])) if venv else None
+    wheelhouse = template.wheelhouse if template.requirements.is_file() else None
+    if offline and install and env is None and wheelhouse is None:
+        pprint(
+            f"<b><red>! 锁文件模板 <magenta>{template.key.digest}</magenta> 没有 wheelhouse, 无法离线安装依赖,"
+            " 请使用 --no-install</red></b>"
+        )
+        return False
+    pprint(f"<green>使用缓存的锁文件模板 <magenta>{template.key.digest}</magenta></green>")
+    shutil.copyfile(template.lock_file, Path(os.getcwd()).joinpath(template.lock_file.name))
+    template.touch()
+    if not install:
+        return True
+    if env and venv:
+        try:  # 替换包管理器刚创建的空环境
+            mode = env.provision(venv[0])
+        except OSError as e:
+            pprint(f"<yellow>无法从环境仓库创建 <magenta>{escape(str(venv[0]))}</magenta>: {escape(str(e))}</yellow>")
+            env = None
+        else:
+            pprint(f"<green>已从环境仓库创建 <magenta>{escape(str(venv[0]))}</magenta> ({mode})</green>")
+    if env:
+        code = await stream_command(install_command(manager))  # 依赖均已就绪, 只会安装项目自身
+    else:
+        code = 0
+        if wheelhouse:  # 包管理器无法指定本地 wheel 目录, 先用项目环境的 pip 装好锁定的依赖
+            args = [
+                "install",
+                "--no-index",
+                "--find-links",
+                str(wheelhouse),
+                "-r",
+                str(template.requirements),
+            ]
+            code = await stream_command(pip_command(manager, *args))
+        if code == 0:  # 由包管理器按锁文件同步, 依赖已满足时只会安装项目自身, 无需联网
+            code = await stream_command(install_command(manager))
+        if code == 0:
+            await save_env(manager)
+    if code != 0:
+        pprint("<b><red>! 依赖安装失败</red></b>")
+    return code == 0
+
+
+async def save_env(manager: str) -> None:
+    """将项目刚安装好的虚拟环境链接进环境仓库"""
+    lock_file = Path(os.getcwd()).joinpath(templates.LOCK_FILES[manager])
+    if not lock_file.is_file() or (venv := await project_env(manager)) is None:
+        return
+    digest = envstore.env_digest(manager, lock_file, venv[1])
+    envstore.store(digest, manager, venv[0], venv[1], Path(os.getcwd()))
+
+
+def poetry_content_hash(pyproject: Dict[str, Any], major: int) -> str:
+    """与 Poetry 写入 poetry.lock 的 content-hash 相同, 由 pyproject.toml 中影响解析的部分计算"""
+    legacy_keys = ["dependencies", "source", "extras", "dev-dependencies"]
+    project = {
+        key: pyproject.get("project", {})[key]
+        for key in ("requires-python", "dependencies", "optional-dependencies")
+        if major >= 2 and pyproject.get("project", {}).get(key) is not None
+    }
+    poetry_config = pyproject.get("tool", {}).get("poetry", {})
+    relevant: Dict[str, Any] = {}
+    for key in [*legacy_keys, "group"]:
+        if poetry_config.get(key) is None and (key not in legacy_keys or project):
+            continue
+        relevant[key] = poetry_config.get(key)
+    content = {"project": project, "tool": {"poetry": relevant}} if project else relevant
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+async def refresh_lock(manager: str) -> int:
+    """改写版本约束后只刷新锁文件的内容哈希, 锁定的版本已满足新的约束, 无需重新解析"""
+    if manager == "pdm":
+        code, output = await run_quiet(["pdm", "lock", "--refresh"])  # 只重新计算哈希
+    else:
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+
+        cwd = Path(os.getcwd())
+        lock_file = cwd.joinpath(templates.LOCK_FILES[manager])
+        pyproject = tomllib.loads(cwd.joinpath("pyproject.toml").read_text("utf-8"))
+        content_hash = poetry_content_hash(pyproject, await poetry_major())
+        lock = re.sub(
+            r'^content-hash = ".*"$',
+            f'content-hash = "{content_hash}"',
+            lock_file.read_text("utf-8"),
+            count=1,
+            flags=re.M,
+        )
+        lock_file.write_text(lock, "utf-8")
+        code, output = await run_quiet(["poetry", "check", "--lock"])
+        if code != 0:  # 无法确认锁文件与 pyproject.toml 一致 (如 Poetry 的哈希算法有变), 回退到重新锁定
+            code, output = await run_quiet(await reuse_lock_command(manager))
+    if code != 0:
+        print(output, end="")
+    return code
+
+
+async def pin_versions(plan: ScaffoldPlan) -> int:
+    """以解析得到的版本写入兼容的版本约束, 不再进行第二次解析"""
+    plan.versions = locked_versions(plan.manager, plan.packages)
+    if not plan.versions:
+        return 0
+    write_dependencies(plan)
+    return await refresh_lock(plan.manager)
+
+
+async def save_template(key: TemplateKey, plan: ScaffoldPlan) -> None:
+    """将解析结果存入缓存, 安装过依赖时顺带下载 wheel 文件供之后离线安装"""
+    install = plan.install
+    code, output = await run_quiet(export_command(key.manager))
+    template = templates.store(key, Path(os.getcwd()), output if code == 0 else None, plan.versions)
+    if template is None or not install or template.wheelhouse or code != 0:
+        return
+    pprint("<cyan>缓存 wheel 文件...</cyan>")
+    wheelhouse = template.path.joinpath(templates.WHEELHOUSE_NAME)
+    args = ["download", "-q", "-d", str(wheelhouse), "-r", str(template.requirements)]
+    code, output = await run_quiet(pip_command(key.manager, *args))
+    if code != 0:
+        shutil.rmtree(wheelhouse, ignore_errors=True)
+        pprint("<yellow>下载 wheel 文件失败, 之后将无法离线安装</yellow>")
+
+
+async def scaffold(
+    manager: str,
+    answers: Answers,
+    use_cache: bool = True,
+    offline: bool = False,
+    wizard: Optional["Wizard"] = None,
+) -> bool:
+    """生成项目元数据并解析依赖, 返回是否成功.
+
+    优先使用缓存的锁文件模板. 若还有问题需要用户回答, 则先写入基础依赖 (graia-ariadne 与 graiax-ignite)
+    并在后台开始解析, 用户答完后只需在已有锁文件的基础上解析新增的部分; 否则直接进行一次完整的解析."""
+    mirrors: List[str] = []
+    if manager == "poetry":
+        mirrors = await answers.get_async("mirrors", defaults["mirrors"], ask_mirrors) or []
+    pprint(f"使用 <magenta>{manager}</magenta> 创建项目元数据")
+    async with suspend(wizard):  # 包管理器直接向终端输出
+        print()
+        create_metadata(manager, mirrors)
+
+    base = ScaffoldPlan(manager, [], False, False, mirrors)
+    speculative = not offline and answers.interactive and any(key not in answers.data for key in plan_keys)
+    if speculative:
+        write_dependencies(base)
+        base_lock = asyncio.create_task(run_quiet(lock_command(manager)))
+
+    plan = await collect_plan(manager, mirrors, answers)
+    if wizard:  # 提问已全部结束, 之后是解析与安装的输出
+        await wizard.close()
+    key = TemplateKey(manager, plan.extras, plan.dev_tools, mirrors)
+    template = templates.lookup(key) if use_cache else None
+    if speculative:  # 后台解析仍在读取 pyproject.toml, 改写前先等待其结束, 命中模板时则不再需要
+        if template:
+            base_lock.cancel()
+        base_result = (await asyncio.gather(base_lock, return_exceptions=True))[0]
+    if template:
+        plan.versions = template.versions  # 与模板锁文件生成时的 pyproject.toml 一致
+    write_dependencies(plan)
+    if template:
+        return await apply_template(template, plan.install, offline)
+    if offline:
+        pprint(f"<b><red>! 没有匹配的锁文件模板 <magenta>{key.digest}</magenta>, 无法离线创建项目</red></b>")
+        return False
+
+    pprint("<green>解析依赖...</green>")
+    if not speculative:  # 依赖已全部写入 pyproject.toml, 只需一次解析: 安装时顺带锁定, 否则仅锁定
+        cmd = [manager, "install" if plan.install else "lock"] + (["--ansi"] if manager == "poetry" else [])
+        code = await stream_command(cmd)
+    else:
+        code, output = base_result if isinstance(base_result, tuple) else (1, f"{base_result!r}\n")
+        if code != 0:  # 后台解析失败, 回退到完整解析
+            print(output, end="")
+            code = await stream_command(lock_command(manager))
+        elif (plan.extras, plan.dev_tools) != (base.extras, base.dev_tools):
+            code = await stream_command(await reuse_lock_command(manager))
+        if code == 0 and plan.install:
+            code = await stream_command(install_command(manager))
+    if code == 0:
+        code = await pin_versions(plan)
+    if code != 0:
+        pprint("<b><red>! 依赖解析或安装失败</red></b>")
+        return False
+    if use_cache:
+        await save_template(key, plan)
+        if plan.install:
+            await save_env(manager)
+    return True
 
 
 def pip():
@@ -115,47 +575,62 @@ def pip():
     raise KeyboardInterrupt  # exit
 
 
-def init(args):
-    """就地创建一个 Graia 项目"""
-    pprint("<b><green>使用 Graia 脚手架创建项目...</green></b>")
-    choices = SelectPrompt(
-        "请选择新项目的包管理器",
-        [FChoice("pip"), FChoice("poetry"), FChoice("pdm")],
-        validator=lambda x: len(x) == 1,
-        range=(0, 1),
-        overflow_action=deque.popleft,
-        default=[0],
-    ).prompt()
-    if not choices:
-        pprint("<b><red>! 用户终止操作</red></b>")
-        return
-    (choice,) = choices
-    manager: str = choice.data
-    pprint("<cyan>验证包管理器存在...</cyan>")
-    try:
-        subprocess.run([manager, "--version"])
-    except FileNotFoundError:
-        pprint(f"<b><red>! 没有找到 <magenta>{manager}</magenta> 包管理器</red></b>")
-        pprint("<b><red>! 操作中止 !</red></b>")
-        return
-    if not toml_exist():
+async def prepare_project(args, answers: Answers, available: Dict[str, bool]) -> bool:
+    """选择包管理器, 没有 pyproject.toml 时创建项目, 返回是否可以继续注入数据"""
+    wizard = open_wizard(answers)
+    async with wizard or AsyncExitStack():
+        manager = await answers.get_async("manager", defaults["manager"], ask_manager)
+        if not manager:
+            pprint("<b><red>! 用户终止操作</red></b>")
+            return False
+        if not available.get(manager, True):
+            pprint(f"<b><red>! 没有找到 <magenta>{manager}</magenta> 包管理器</red></b>")
+            pprint("<b><red>! 操作中止 !</red></b>")
+            return False
+        if toml_exist():
+            pprint("<green>检测到 <magenta>pyproject.toml</magenta> 存在，直接注入数据</green>")
+            return True
         pprint("<yellow>检测到 pyproject.toml 不存在...</yellow>")
         pprint(f"<cyan>在 <magenta>{os.getcwd()}</magenta> 下创建项目......</cyan>")
-        cont: bool = BooleanPrompt("继续创建？", default=True).prompt(default=True)
+        cont = await answers.get_async("create", defaults["create"], lambda: ask_bool_async("继续创建？"))
         if not cont:
             pprint("<b><red>终止操作</red></b>")
-            return
-        try:
-            pprint(f"使用 <magenta>{manager}</magenta> 创建项目元数据")
-            print()
-            globals()[manager]()
-            print()
-        except KeyboardInterrupt:
-            pprint("<b><red>! 终止操作 !</red></b>")
-            return
-    else:
-        pprint("<green>检测到 <magenta>pyproject.toml</magenta> 存在，直接注入数据</green>")
+            return False
+        if manager == "pip":
+            pip()
+        if not await scaffold(manager, answers, args.use_cache, args.offline, wizard):
+            return False
+        print()
+        return True
+
+
+def create_project(args, answers: Answers, available: Dict[str, bool]) -> bool:
+    """在当前目录创建项目并注入数据, 返回是否成功"""
+    try:
+        if not asyncio.run(prepare_project(args, answers, available)):
+            return False
+    except KeyboardInterrupt:
+        pprint("<b><red>! 终止操作 !</red></b>")
+        return False
 
     from . import inject
 
-    inject.inject()
+    inject.inject(args, answers)
+    return True
+
+
+def init(args):
+    """就地创建一个 Graia 项目"""
+    if args.batch:
+        from graiax.cli.batch import run_batch
+
+        return run_batch(args)
+    try:
+        answers = Answers.from_args(args, answer_keys)
+    except AnswerFileError as e:
+        pprint(f"<b><red>! {escape(str(e))}</red></b>")
+        raise SystemExit(1)
+    pprint("<b><green>使用 Graia 脚手架创建项目...</green></b>")
+    pprint("<cyan>验证包管理器存在...</cyan>")
+    if not create_project(args, answers, check_managers()):
+        raise SystemExit(1)
@@ -1,30 +1,49 @@
 import os
+from html import escape
 from pathlib import Path
+from typing import List, Optional
 
-import tomlkit
-from tomlkit.items import Array, Table
+from graiax.cli.analyze import find_saya_modules
+from graiax.cli.answers import AnswerFileError, Answers, answers_init, string_list
+from graiax.cli.index import get_index
+from graiax.cli.toml_patch import inject_load
+from graiax.cli.util import atomic_write, pprint
 
-from graiax.cli.prompt.export import FChoice, SelectPrompt
-from graiax.cli.util import pprint, scan_modules
 
+def inject_init(parser):
+    parser.add_argument("--all", action="store_true", help="列出所有模块, 而不只是 Saya 模块")
+    parser.add_argument("--modules", nargs="*", help="运行时要加载的模块")
+    answers_init(parser)
 
-def inject(args):
+
+def ask_modules(all_modules: bool) -> Optional[List[str]]:
+    from graiax.cli.prompt.export import FChoice, SelectPrompt
+
+    index = get_index(".")
+    possible_mods = index.modules() if all_modules else find_saya_modules(index.paths())
+    modules = SelectPrompt("选择运行时要加载的模块", choices=[FChoice(mod) for mod in possible_mods]).prompt()
+    return None if modules is None else [mod.data for mod in modules]
+
+
+def inject(args, answers: Optional[Answers] = None):
     """向已有项目的 pyproject.toml 注入数据"""
+    if answers is None:
+        try:
+            answers = Answers.from_args(args, {"modules": string_list()})
+        except AnswerFileError as e:
+            pprint(f"<b><red>! {escape(str(e))}</red></b>")
+            raise SystemExit(1)
     pyproject_path = Path(os.getcwd()).joinpath("pyproject.toml")
     pprint("<b><cyan>向 pyproject.toml 注入数据...</cyan></b> ")
-    data = tomlkit.loads(pyproject_path.read_text(encoding="utf-8"))
-    tool_table: Table = data.setdefault("tool", tomlkit.table(True))
-    graiax_table: Table = tool_table.setdefault("graiax", tomlkit.table())
-    loader_array: Array = graiax_table.setdefault("load", tomlkit.array())
-    loader_array.comment("modules which will be loaded by graia-saya")
-    possible_mods = scan_modules([], ".")
-    modules = SelectPrompt("选择运行时要加载的模块", choices=[FChoice(mod) for mod in possible_mods]).prompt()
+    modules = answers.get("modules", [], lambda: ask_modules(getattr(args, "all", False)))
     if modules is None:
         pprint("<b><red>! 取消操作 !</red></b>")
         return
-    for mod in modules:
-        loader_array.add_line(mod.data)
-    loader_array.add_line(indent="")
-    with open(pyproject_path, "w", encoding="utf-8") as f:
-        tomlkit.dump(data, f)
+    text = pyproject_path.read_bytes().decode("utf-8")
+    try:
+        text, _ = inject_load(text, modules, "modules which will be loaded by graia-saya")
+    except ValueError as e:  # 文档本身不是合法的 TOML
+        pprint(f"<b><red>! 无法解析 pyproject.toml: {escape(str(e))}</red></b>")
+        return
+    atomic_write(pyproject_path, text, newline="")
     pprint("<b><green>数据写入完毕！</green></b>")
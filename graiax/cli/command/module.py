@@ -0,0 +1,200 @@
+import json
+import multiprocessing
+import os
+import sys
+import time
+from html import escape
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from graiax.cli.util import pprint
+
+ACTIONS = ["list", "watch"]
+
+
+def module_init(parser):
+    parser.add_argument(
+        "action",
+        choices=ACTIONS,
+        help="list: 列出加载列表中的模块与发现的 Saya 模块, watch: 加载模块并在文件变更时热重载",
+    )
+    parser.add_argument("--all", action="store_true", help="列出所有模块, 而不只是 Saya 模块")
+    parser.add_argument("--check", action="store_true", help="在独立的进程中导入每个模块并报告结果")
+    parser.add_argument("--workers", type=int, help="检查时的并行进程数, 默认为 CPU 核数")
+    parser.add_argument("--timeout", type=float, default=60, help="单个模块的导入超时 (秒)")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出")
+
+
+def check_module(conn: Connection, mod: str, cwd: str) -> None:
+    """在工作进程中运行: 用独立的 Saya 实例 require 模块, 将结果发回主进程"""
+    devnull = os.open(os.devnull, os.O_WRONLY)  # 模块与 Saya 的输出会打乱表格
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    from graia.saya import Channel
+
+    from graiax.ignite import create_saya
+
+    if cwd not in sys.path:
+        sys.path.insert(0, cwd)
+    saya = create_saya()
+    start = time.perf_counter()
+    try:
+        with saya.module_context():
+            saya.require(mod)
+    except BaseException as e:
+        conn.send({"ok": False, "time": time.perf_counter() - start, "error": f"{type(e).__name__}: {e}"})
+        return
+    elapsed = time.perf_counter() - start
+    channel = saya.channels[mod]
+    module = sys.modules.get(mod)
+    uses_channel = module is not None and any(isinstance(value, Channel) for value in vars(module).values())
+    conn.send(
+        {
+            "ok": True,
+            "time": elapsed,
+            "channel": uses_channel or bool(channel.content),
+            "schemas": len(channel.content),
+            "error": None,
+        }
+    )
+
+
+def check_modules(modules: List[str], workers: Optional[int], timeout: float) -> Dict[str, Dict[str, Any]]:
+    """每个模块在一个新的工作进程中导入, 同时最多运行 workers 个.
+
+    一个模块的副作用, 崩溃或卡死不会影响其他模块: 异常退出的进程按失败处理, 超时的进程会被结束."""
+    import graia.saya  # noqa: F401  # fork 出的工作进程无需再次导入
+
+    cwd = os.getcwd()
+    workers = workers or os.cpu_count() or 1
+    queue = list(reversed(modules))
+    running: Dict[Connection, Tuple[str, multiprocessing.process.BaseProcess, float]] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        while queue or running:
+            while queue and len(running) < workers:
+                mod = queue.pop()
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(target=check_module, args=(sender, mod, cwd), daemon=True)
+                process.start()
+                sender.close()
+                running[receiver] = (mod, process, time.monotonic())
+            nearest = min(started for _, _, started in running.values()) + timeout
+            for conn in wait(list(running), max(0.0, nearest - time.monotonic())):
+                mod, process, started = running.pop(conn)
+                try:
+                    results[mod] = conn.recv()
+                except EOFError:  # 进程在发回结果前退出
+                    process.join()
+                    error = f"工作进程异常退出 ({process.exitcode})"
+                    results[mod] = {"ok": False, "time": time.monotonic() - started, "error": error}
+                conn.close()
+                process.join()
+            for conn, (mod, process, started) in list(running.items()):
+                if time.monotonic() - started >= timeout:
+                    process.kill()
+                    process.join()
+                    conn.close()
+                    del running[conn]
+                    results[mod] = {"ok": False, "time": timeout, "error": f"导入超过 {timeout:g}s"}
+    finally:
+        for conn, (_, process, _) in running.items():
+            process.kill()
+            conn.close()
+    return results
+
+
+def list_modules(all_modules: bool) -> List[Dict[str, Any]]:
+    """加载列表中的模块在前, 之后是发现的其他候选模块"""
+    from graiax.cli.analyze import find_saya_modules
+    from graiax.cli.index import get_index
+    from graiax.ignite import extract_modules_from_toml
+
+    pyproject = Path(os.getcwd()).joinpath("pyproject.toml")
+    load = extract_modules_from_toml(pyproject) if pyproject.exists() else []
+    index = get_index(".")
+    found = set(index.modules())
+    candidates = index.modules() if all_modules else find_saya_modules(index.paths())
+    entries = [{"module": mod, "source": "load", "found": mod in found} for mod in load]
+    entries += [
+        {"module": mod, "source": "candidate", "found": True} for mod in candidates if mod not in load
+    ]
+    return entries
+
+
+def print_table(entries: List[Dict[str, Any]], checked: bool) -> None:
+    width = max([len("module"), *(len(e["module"]) for e in entries)])
+    header = f"{'module':<{width}}  {'source':<9}"
+    if checked:
+        header += f"  {'status':<6}  {'time ms':>9}  {'channel':<7}  error"
+    print(header)
+    for e in entries:
+        line = f"{e['module']:<{width}}  {e['source']:<9}"
+        if checked:
+            status = "ok" if e["ok"] else "failed"
+            channel = "-" if not e["ok"] else f"yes ({e['schemas']})" if e["channel"] else "no"
+            line += f"  {status:<6}  {e['time'] * 1000:>9.1f}  {channel:<7}  {e['error'] or ''}"
+        elif not e["found"]:
+            line += "  (未找到)"
+        print(line)
+
+
+def watch(args) -> None:
+    """在独立的 Saya 实例中加载 [tool.graiax].load, 之后热重载变更的模块, 按 Ctrl-C 退出"""
+    import asyncio
+
+    try:
+        from graiax.ignite import (
+            create_saya,
+            extract_modules_from_toml,
+            require_modules,
+        )
+        from graiax.ignite.watch import watch_modules
+    except ImportError as e:
+        pprint(f"<b><red>! {escape(str(e))}，请在项目环境中运行</red></b>")
+        raise SystemExit(1)
+
+    cwd = os.getcwd()
+    sys.path.insert(0, cwd)
+    modules = extract_modules_from_toml(Path(cwd).joinpath("pyproject.toml"))
+    saya = create_saya()
+    with saya.module_context():
+        try:
+            require_modules(saya, modules)
+        except Exception as e:
+            pprint(f"<b><red>! 加载失败: {escape(f'{type(e).__name__}: {e}')}</red></b>")
+        pprint(f"<green>正在监视 {escape(cwd)}，按 Ctrl-C 退出</green>")
+        try:
+            asyncio.run(watch_modules(saya, modules, path=cwd))
+        except KeyboardInterrupt:
+            pass
+
+
+def module(args):
+    """查看与检查项目中的模块"""
+    if args.action == "watch":
+        watch(args)
+        return
+    entries = list_modules(args.all)
+    if not entries:
+        pprint("<yellow>没有找到任何模块</yellow>")
+        return
+    if args.check:
+        try:
+            results = check_modules([e["module"] for e in entries], args.workers, args.timeout)
+        except ImportError as e:
+            pprint(f"<b><red>! 无法导入 graia-saya: {escape(str(e))}，请在项目环境中运行</red></b>")
+            raise SystemExit(1)
+        for e in entries:
+            e.update(results[e["module"]])
+    if args.json:
+        print(json.dumps(entries, indent=2, ensure_ascii=False))
+    else:
+        print_table(entries, args.check)
+    if args.check:
+        failed = [e["module"] for e in entries if not e["ok"]]
+        if failed and not args.json:
+            pprint(f"<b><red>! {len(failed)} 个模块导入失败</red></b>")
+        if any(e["source"] == "load" for e in entries if not e["ok"]):
+            raise SystemExit(1)
@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+from html import escape
+from pathlib import Path
+
+from graiax.cli.util import pprint
+
+SORT_KEYS = ["wall_time", "self_time", "deps_time", "memory", "peak_memory", "rss"]
+
+
+def profile_init(parser):
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出")
+    parser.add_argument("--sort", choices=SORT_KEYS, default="wall_time", help="排序字段")
+    parser.add_argument("--max-time", type=float, help="单个模块加载耗时上限 (秒), 超出时以非零状态码退出")
+    parser.add_argument(
+        "--max-memory",
+        type=float,
+        help="单个模块内存增量上限 (MiB), 超出时以非零状态码退出; 未指定时使用 [tool.graiax.memory_budget]",
+    )
+    parser.add_argument("--no-memory", action="store_true", help="不使用 tracemalloc 统计内存, RSS 仍会统计且更准确")
+    parser.add_argument("--workers", type=int, default=0, help="预导入第三方依赖的线程数")
+
+
+def over_budget(record, args, budget) -> bool:
+    if args.max_time is not None and record.wall_time > args.max_time:
+        return True
+    if args.max_memory is not None:
+        return record.retained > args.max_memory * 1024 * 1024
+    return budget is not None and budget.exceeded(record)
+
+
+def kib(value) -> str:
+    return f"{value / 1024:.1f}" if value is not None else "-"
+
+
+def print_table(records, args, budget) -> None:
+    width = max([len("module"), *(len(r.module) for r in records)])
+    columns = (
+        f"{'wall ms':>9}  {'deps ms':>9}  {'self ms':>9}  {'mem KiB':>10}  {'peak KiB':>10}  {'rss KiB':>10}"
+    )
+    print(f"{'module':<{width}}  {columns}")
+    for r in records:
+        line = (
+            f"{r.module:<{width}}  {r.wall_time * 1000:>9.1f}  {r.deps_time * 1000:>9.1f}"
+            f"  {r.self_time * 1000:>9.1f}  {kib(r.memory):>10}  {kib(r.peak_memory):>10}  {kib(r.rss):>10}"
+        )
+        print(f"{line}  !" if over_budget(r, args, budget) else line)
+
+
+def profile(args):
+    """分析 [tool.graiax].load 中各模块的加载耗时与内存"""
+    try:
+        from graiax.ignite import (
+            LoadProfiler,
+            create_saya,
+            extract_memory_budget_from_toml,
+            extract_modules_from_toml,
+            require_modules,
+        )
+
+        saya = create_saya()
+    except ImportError as e:
+        pprint(f"<b><red>! 无法导入 graia-saya: {escape(str(e))}，请在项目环境中运行</red></b>")
+        raise SystemExit(1)
+
+    sys.path.insert(0, os.getcwd())
+    pyproject = Path(os.getcwd()).joinpath("pyproject.toml")
+    modules = extract_modules_from_toml(pyproject)
+    try:
+        budget = extract_memory_budget_from_toml(pyproject)  # 只用于标记, 不在加载途中报错
+    except ValueError as e:
+        pprint(f"<b><red>! [tool.graiax.memory_budget] 无效: {escape(str(e))}</red></b>")
+        raise SystemExit(1)
+    profiler = LoadProfiler(trace_memory=not args.no_memory)
+    failed = False
+    try:
+        with saya.module_context():
+            require_modules(saya, modules, workers=args.workers, profiler=profiler)
+    except Exception as e:
+        failed = True
+        if not args.json:
+            pprint(f"<b><red>! 模块加载失败: {escape(f'{type(e).__name__}: {e}')}</red></b>")
+
+    records = profiler.report(args.sort)
+    exceeded = [r.module for r in records if over_budget(r, args, budget)]
+    if args.json:
+        print(
+            json.dumps(
+                {"modules": [r.as_dict() for r in records], "over_budget": exceeded, "failed": failed},
+                indent=2,
+            )
+        )
+    else:
+        print_table(records, args, budget)
+        if exceeded:
+            pprint(f"<b><red>! {len(exceeded)} 个模块超出预算: {', '.join(exceeded)}</red></b>")
+    if failed or exceeded:
+        raise SystemExit(1)
@@ -0,0 +1,387 @@
+"""常驻的预热解释器.
+
+`graiax daemon start` 启动一个已导入全部 CLI 模块的后台进程, 监听当前用户私有目录下的 Unix socket.
+之后每次运行 `graiax` 时, 客户端将 argv, cwd, 环境变量以及 stdin / stdout / stderr 的文件描述符
+(通过 SCM_RIGHTS) 发送给后台进程, 后台进程 fork 出子进程执行命令并返回退出码, 免去导入模块的耗时.
+后台进程未运行, 不可用, CLI 代码或 site-packages 已被修改, 或者客户端的 PYTHONPATH 等变量与后台进程不同时,
+客户端回退为在当前进程中执行. 需要终端交互的命令 (INTERACTIVE_COMMANDS) 总是在当前进程中执行.
+
+此模块在每次启动时都会被导入, 因此只使用开销很小的标准库模块: 消息以 marshal 编码 (两端是同一个解释器),
+不导入 json, pathlib 与 typing. `graiax daemon client` 生成的启动脚本以 `python -S -E` 运行并只导入此模块,
+省去 site 的初始化与 console script 的开销."""
+from __future__ import annotations
+
+import marshal
+import os
+import struct
+import sys
+import time
+import zlib
+
+# socket 与 signal 模块会导入 enum, selectors 等, 使客户端的启动时间增加约一倍, 因此直接使用其底层模块
+import _signal
+import _socket
+
+PROTOCOL_VERSION = 1
+
+HEADER = struct.Struct("!I")
+EXIT = struct.Struct("!ci")
+FD_SIZE = struct.calcsize("i")
+REQUEST_TIMEOUT = 2
+"""接受连接后等待请求的时间, 避免停滞的客户端阻塞后台进程"""
+
+FORWARDED_SIGNALS = ("SIGINT", "SIGTERM", "SIGHUP", "SIGQUIT", "SIGWINCH")
+INTERACTIVE_COMMANDS = ("init", "inject")
+"""需要终端交互的命令: 后台进程的子进程没有控制终端, 这些命令总是在当前进程中执行"""
+PATH_VARIABLES = ("PYTHONPATH", "PYTHONHOME", "PYTHONNOUSERSITE", "VIRTUAL_ENV")
+"""影响 sys.path 的环境变量, 与后台进程不同时由客户端自己执行"""
+
+serving: bool = False
+"""当前进程是否为后台进程 (或其子进程), 此时不再作为客户端连接"""
+
+
+def supported() -> bool:
+    return os.name == "posix" and hasattr(_socket, "AF_UNIX") and hasattr(_socket.socket, "sendmsg")
+
+
+def package_root() -> str:
+    return os.path.dirname(os.path.realpath(__file__))
+
+
+def daemon_key() -> str:
+    """解释器与 graiax 安装位置的标识, 不同虚拟环境使用不同的后台进程"""
+    data = f"{PROTOCOL_VERSION}|{sys.executable}|{sys.version}|{package_root()}"
+    return f"{zlib.crc32(data.encode()):08x}"
+
+
+def runtime_dir(create: bool = False) -> str | None:
+    """socket 所在的目录, 必须只有当前用户可以访问; 只有后台进程会创建它, 客户端在其不存在时返回 None"""
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    path = os.path.join(base, f"graiax-{os.getuid()}")
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        if not create:
+            return None
+        try:
+            os.mkdir(path, 0o700)
+            stat = os.stat(path)
+        except OSError:
+            return None
+    except OSError:
+        return None
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+        return None
+    return path
+
+
+def socket_path(create: bool = False) -> str | None:
+    directory = runtime_dir(create)
+    return os.path.join(directory, f"daemon-{daemon_key()}.sock") if directory else None
+
+
+def log_path():
+    from graiax.cli.util import cache_dir
+
+    return cache_dir(f"daemon-{daemon_key()}.log")
+
+
+def send_message(sock: _socket.socket, data: dict, fds: list[int] = ()) -> None:
+    payload = marshal.dumps(data)
+    message = HEADER.pack(len(payload)) + payload
+    ancillary = [(_socket.SOL_SOCKET, _socket.SCM_RIGHTS, struct.pack(f"{len(fds)}i", *fds))] if fds else []
+    sent = sock.sendmsg([message], ancillary)
+    if sent < len(message):
+        sock.sendall(message[sent:])
+
+
+def recv_exact(sock: _socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError("connection closed")
+        data += chunk
+    return data
+
+
+def recv_message(sock: _socket.socket, max_fds: int = 3) -> tuple[dict, list[int]]:
+    fds = []
+    data, ancdata, _, _ = sock.recvmsg(HEADER.size, _socket.CMSG_SPACE(max_fds * FD_SIZE))
+    for level, kind, cmsg_data in ancdata:
+        if level == _socket.SOL_SOCKET and kind == _socket.SCM_RIGHTS:
+            count = len(cmsg_data) // FD_SIZE
+            fds += struct.unpack(f"{count}i", cmsg_data[: count * FD_SIZE])
+    try:
+        if not data:
+            raise EOFError("connection closed")
+        data += recv_exact(sock, HEADER.size - len(data))
+        (size,) = HEADER.unpack(data)
+        return marshal.loads(recv_exact(sock, size)), fds
+    except BaseException:  # 超时或消息无效时不泄漏已收到的文件描述符
+        for fd in fds:
+            os.close(fd)
+        raise
+
+
+def connect(timeout: float | None = None) -> _socket.socket | None:
+    path = socket_path()
+    if path is None:
+        return None
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def request(op: str, timeout: float = 5) -> dict | None:
+    """向后台进程发送控制请求 (ping / stop), 未运行时返回 None"""
+    sock = connect(timeout)
+    if sock is None:
+        return None
+    try:
+        send_message(sock, {"op": op, "key": daemon_key()})
+        return recv_message(sock, 0)[0]
+    except (OSError, EOFError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+
+# 客户端
+
+
+def forward(argv: list[str]) -> int | None:
+    """交给后台进程执行命令, 返回退出码; 后台进程不可用时返回 None"""
+    if serving or not supported() or os.environ.get("GRAIAX_NO_DAEMON"):
+        return None
+    if argv[1:2] == ["daemon"] or argv[1:2] and argv[1].replace("-", "_") in INTERACTIVE_COMMANDS:
+        return None
+    sock = connect()
+    if sock is None:
+        return None
+    try:
+        data = {
+            "op": "run",
+            "key": daemon_key(),
+            "argv": argv,
+            "cwd": os.getcwd(),
+            "env": dict(os.environ),
+        }
+        send_message(sock, data, [0, 1, 2])
+        reply = recv_message(sock, 0)[0]
+        if reply.get("status") != "running":  # 代码已更新, 版本或环境不符
+            return None
+        pid = reply["pid"]
+
+        def relay(signum, frame):
+            try:
+                os.kill(pid, signum)
+            except OSError:
+                pass
+
+        for name in FORWARDED_SIGNALS:
+            _signal.signal(getattr(_signal, name), relay)
+        try:
+            _, code = EXIT.unpack(recv_exact(sock, EXIT.size))
+        except (OSError, EOFError):  # 子进程在返回退出码前退出
+            sys.stderr.write("graiax: daemon worker exited unexpectedly\n")
+            return 1
+        return code
+    except (OSError, EOFError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+
+# 后台进程
+
+
+def preload() -> dict[str, int]:
+    """导入全部 CLI 模块, 返回这些模块源文件与 site-packages 目录的 mtime, 用于发现代码更新
+
+    安装, 卸载包或增删 .pth 文件会改变 site-packages 目录的 mtime, 此时新启动的解释器的 sys.path 与模块可能不同."""
+    import importlib
+
+    from graiax.cli import command, plugins
+
+    for cmd in command.commands:
+        importlib.import_module(f"graiax.cli.command.{cmd}")
+    for name in ("answers", "analyze", "batch", "importtime", "index", "templates", "toml_patch"):
+        importlib.import_module(f"graiax.cli.{name}")
+    importlib.import_module("graiax.cli.prompt.export")
+    importlib.import_module("tomlkit")
+    command.load_manifest()
+    plugins.load_plugins()
+
+    import site
+
+    root = package_root()
+    files = [getattr(module, "__file__", None) for module in list(sys.modules.values())]
+    files = [file for file in files if file and file.startswith(root)]
+    files += site.getsitepackages() + [site.getusersitepackages()]
+    mtimes = {}
+    for file in files:
+        try:
+            mtimes[file] = os.stat(file).st_mtime_ns
+        except OSError:
+            pass
+    return mtimes
+
+
+def same_paths(env: dict) -> bool:
+    """客户端的 PATH_VARIABLES 与后台进程相同, 子进程的 sys.path 才与直接运行时一致"""
+    return all(env.get(name) == os.environ.get(name) for name in PATH_VARIABLES)
+
+
+def is_stale(mtimes: dict[str, int]) -> bool:
+    for file, mtime in mtimes.items():
+        try:
+            if os.stat(file).st_mtime_ns != mtime:
+                return True
+        except OSError:
+            return True
+    return False
+
+
+def reopen_stdio() -> None:
+    """在子进程中用收到的文件描述符重新创建 sys.stdin / stdout / stderr"""
+    sys.stdin = sys.__stdin__ = os.fdopen(0, "r", closefd=False)
+    sys.stdout = sys.__stdout__ = os.fdopen(1, "w", buffering=1 if os.isatty(1) else -1, closefd=False)
+    sys.stderr = sys.__stderr__ = os.fdopen(2, "w", buffering=1, errors="backslashreplace", closefd=False)
+
+
+def run_request(conn: _socket.socket, data: dict, fds: list[int]) -> None:
+    """在 fork 出的子进程中执行一条命令, 不会返回"""
+    code = 1
+    try:
+        for name in ("SIGCHLD", "SIGTERM", "SIGHUP", "SIGWINCH"):
+            _signal.signal(getattr(_signal, name), _signal.SIG_DFL)
+        _signal.signal(_signal.SIGINT, _signal.default_int_handler)
+        for target, fd in zip((0, 1, 2), fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        reopen_stdio()
+        os.chdir(data["cwd"])
+        os.environ.clear()
+        os.environ.update(data["env"])
+        sys.argv = data["argv"]
+        send_message(conn, {"status": "running", "pid": os.getpid()})
+        code = execute()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            conn.sendall(EXIT.pack(b"x", code))
+        finally:
+            os._exit(code & 0xFF)
+
+
+def execute() -> int:
+    """与在当前进程中运行 `graiax` 相同, 返回退出码"""
+    from graiax.cli import main
+
+    try:
+        main()
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def serve(path: str | None = None) -> None:
+    """运行后台进程, 直到收到 stop 请求或发现代码已更新"""
+    import socket
+
+    global serving
+
+    serving = True
+    path = path or socket_path(create=True)
+    if path is None:
+        raise RuntimeError("no private runtime directory for the daemon socket")
+    if "" in sys.path:  # 与直接运行 graiax 时一致, 不从 cwd 导入
+        sys.path.remove("")
+    mtimes = preload()
+    key = daemon_key()
+    started = time.time()
+    served = 0
+
+    if os.path.exists(path) and request("ping", 1) is None:
+        os.unlink(path)  # 上次未正常退出留下的 socket
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        sock.bind(path)
+    finally:
+        os.umask(old_umask)
+    inode = os.stat(path).st_ino
+    sock.listen(64)
+    sock.settimeout(60)  # 空闲时定期检查代码是否已更新
+    _signal.signal(_signal.SIGCHLD, _signal.SIG_IGN)  # 自动回收子进程
+    _signal.signal(_signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"graiax daemon {os.getpid()} listening on {path}", flush=True)
+    try:
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except socket.timeout:
+                if is_stale(mtimes):
+                    print("graiax daemon stopping (code changed)", flush=True)
+                    break
+                continue
+            conn.settimeout(REQUEST_TIMEOUT)
+            try:
+                data, fds = recv_message(conn)
+            except (OSError, EOFError, ValueError):
+                conn.close()
+                continue
+            op = data.get("op")
+            env = data.get("env")
+            accepted = isinstance(env, dict) and data.get("key") == key and same_paths(env) and len(fds) == 3
+            if op == "run" and accepted and not is_stale(mtimes):
+                served += 1
+                conn.settimeout(None)  # 子进程等待命令执行完毕后才发送退出码
+                if os.fork() == 0:
+                    sock.close()
+                    run_request(conn, data, fds)
+                for fd in fds:
+                    os.close(fd)
+                conn.close()
+                continue
+            for fd in fds:
+                os.close(fd)
+            stale = is_stale(mtimes)
+            info = {
+                "status": "stale" if stale else "ok",
+                "pid": os.getpid(),
+                "started": started,
+                "served": served,
+            }
+            try:
+                send_message(conn, info)
+            except OSError:
+                pass
+            conn.close()
+            if op == "stop" or stale:
+                print("graiax daemon stopping" + (" (code changed)" if stale else ""), flush=True)
+                break
+    finally:
+        sock.close()
+        try:
+            if os.stat(path).st_ino == inode:  # 不删除新启动的后台进程的 socket
+                os.unlink(path)
+        except OSError:
+            pass
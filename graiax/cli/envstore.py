@@ -0,0 +1,220 @@
+"""按内容寻址的虚拟环境仓库.
+
+以锁文件内容, 包管理器, 项目环境的 Python 版本与平台为键保存安装好的虚拟环境.
+新项目的环境从仓库中以硬链接或 reflink 的方式取得, 跨文件系统等情况下回退为复制,
+因此同一主机上的多个项目共享同一份依赖文件. pip 升级或卸载包时会先删除旧文件再写入, 不会改动共享的文件;
+但硬链接的文件仍是同一个文件, 在任一环境中原地修改 (例如直接编辑 site-packages 中的源码) 会影响所有共享它的环境
+与仓库本身, 需要修改依赖时应先重新安装该包. reflink 与复制得到的文件不受影响.
+
+虚拟环境中只有 bin (Scripts) 下的脚本与 .pth 文件包含环境的绝对路径, 这些文件会被复制并改写.
+存入仓库时会去掉项目自身的安装 (dist-info, 可编辑安装的 .pth 与脚本), 仓库中只保留依赖."""
+import hashlib
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from graiax.cli.util import atomic_write, cache_dir
+
+ENV_STORE_VERSION = 3
+
+META_NAME = "meta.json"
+VENV_NAME = "venv"
+SCRIPT_DIRS = ("bin", "Scripts")
+FICLONE = 0x40049409  # linux/fs.h
+
+
+def env_digest(manager: str, lock_file: Path, python: str) -> str:
+    """由锁文件内容, 项目环境的 Python 版本 (如 `3.11`) 与平台计算环境的地址"""
+    digest = hashlib.sha256(lock_file.read_bytes())
+    digest.update(f"{ENV_STORE_VERSION}:{manager}:{python}:{sys.platform}:{platform.machine()}".encode())
+    return digest.hexdigest()[:16]
+
+
+def reflink(src: str, dst: str) -> None:
+    """通过 FICLONE 让 dst 与 src 共享数据块 (btrfs, xfs 等), 不支持时抛出 OSError"""
+    import fcntl
+
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            os.unlink(dst)
+            raise
+
+
+def link_tree(src: Path, dst: Path, origin: str, target: str) -> str:
+    """将 src 以硬链接, reflink 或复制的方式复制到 dst, 返回实际使用的方式.
+
+    包含 origin 路径的脚本与 .pth 文件会被复制, 并将其中的 origin 替换为 target."""
+    modes = ["hardlink", "reflink", "copy"]
+    copiers = {"hardlink": os.link, "reflink": reflink, "copy": shutil.copy2}
+    origin_bytes, target_bytes = origin.encode(), target.encode()
+    for dirpath, dirnames, filenames in os.walk(src):
+        rel = os.path.relpath(dirpath, src)
+        out = dst.joinpath(rel)
+        out.mkdir(parents=True, exist_ok=True)
+        for name in [d for d in dirnames if os.path.islink(os.path.join(dirpath, d))] + filenames:
+            path, new = os.path.join(dirpath, name), str(out.joinpath(name))
+            if os.path.islink(path):
+                os.symlink(os.readlink(path), new)
+                continue
+            if rel.split(os.sep)[0] in SCRIPT_DIRS or name.endswith((".pth", ".cfg")):
+                with open(path, "rb") as f:
+                    data = f.read()
+                if origin_bytes in data:
+                    with open(new, "wb") as f:
+                        f.write(data.replace(origin_bytes, target_bytes))
+                    shutil.copymode(path, new)
+                    continue
+            while True:
+                try:
+                    copiers[modes[0]](path, new)
+                    break
+                except OSError:
+                    if len(modes) == 1:
+                        raise
+                    modes.pop(0)
+        dirnames[:] = [d for d in dirnames if not os.path.islink(os.path.join(dirpath, d))]
+    return modes[0]
+
+
+def site_packages(venv: Path) -> List[Path]:
+    found = {
+        p.resolve(): p
+        for p in [*venv.glob("lib*/python*/site-packages"), venv.joinpath("Lib", "site-packages")]
+    }
+    return [p for p in found.values() if p.is_dir()]
+
+
+def drop_project(venv: Path, project: Path) -> None:
+    """删除 venv 中项目自身的安装: direct_url.json 指向 project 的 dist-info 及其 RECORD 中的文件,
+    以及包含 project 路径的 .pth 文件"""
+    project = project.resolve()
+    for site in site_packages(venv):
+        for dist_info in site.glob("*.dist-info"):
+            try:
+                direct_url = json.loads(dist_info.joinpath("direct_url.json").read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if direct_url.get("url", "").rstrip("/") != project.as_uri():
+                continue
+            try:
+                record = dist_info.joinpath("RECORD").read_text(encoding="utf-8").splitlines()
+            except OSError:
+                record = []
+            for line in record:
+                path = os.path.normpath(os.path.join(site, line.split(",")[0]))
+                if path.startswith(str(venv) + os.sep) and os.path.isfile(path):
+                    os.unlink(path)
+            shutil.rmtree(dist_info, ignore_errors=True)
+        for pth in site.glob("*.pth"):
+            if str(project).encode() in pth.read_bytes():
+                pth.unlink()
+
+
+@dataclass
+class StoredEnv:
+    digest: str
+    path: Path
+    manager: str
+    python: str
+    origin: str
+    created: float
+    last_used: float
+
+    @property
+    def venv(self) -> Path:
+        return self.path.joinpath(VENV_NAME)
+
+    @property
+    def size(self) -> int:
+        return sum(f.stat().st_size for f in self.venv.rglob("*") if f.is_file() and not f.is_symlink())
+
+    def save_meta(self) -> None:
+        meta = {
+            "manager": self.manager,
+            "python": self.python,
+            "origin": self.origin,
+            "created": self.created,
+            "last_used": self.last_used,
+        }
+        atomic_write(self.path.joinpath(META_NAME), json.dumps(meta, indent=2))
+
+    def provision(self, target: Path) -> str:
+        """在 target 创建该环境, 返回使用的链接方式. target 处已有虚拟环境时将其替换"""
+        if target.exists() or target.is_symlink():
+            if not target.joinpath("pyvenv.cfg").is_file():
+                raise FileExistsError(f"{target} exists and is not a virtual environment")
+            shutil.rmtree(target)
+        mode = link_tree(self.venv, target, self.origin, str(target))
+        self.last_used = time.time()
+        self.save_meta()
+        return mode
+
+    def remove(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def envs_dir() -> Path:
+    return cache_dir("envs")
+
+
+def load_env(path: Path) -> Optional[StoredEnv]:
+    try:
+        meta = json.loads(path.joinpath(META_NAME).read_text(encoding="utf-8"))
+        env = StoredEnv(path.name, path, **meta)
+    except (OSError, ValueError, TypeError):
+        return None
+    return env if env.venv.is_dir() else None
+
+
+def lookup(digest: str) -> Optional[StoredEnv]:
+    return load_env(envs_dir().joinpath(digest))
+
+
+def iter_envs() -> Iterator[StoredEnv]:
+    root = envs_dir()
+    if not root.is_dir():
+        return
+    for path in sorted(root.iterdir()):
+        if path.is_dir() and (env := load_env(path)):
+            yield env
+
+
+def store(
+    digest: str, manager: str, venv: Path, python: str, project: Optional[Path] = None
+) -> Optional[StoredEnv]:
+    """将已安装的环境链接进仓库, 已存在时不做任何事. 给出 project 时去掉该项目自身的安装"""
+    if existing := lookup(digest):
+        return existing
+    path = envs_dir().joinpath(digest)
+    temp = envs_dir().joinpath(f".{digest}.{os.getpid()}.tmp")
+    shutil.rmtree(temp, ignore_errors=True)
+    try:
+        link_tree(venv, temp.joinpath(VENV_NAME), str(venv), str(venv))
+        if project is not None:  # 只删除仓库中的链接, 不影响原环境
+            drop_project(temp.joinpath(VENV_NAME), project)
+        now = time.time()
+        env = StoredEnv(digest, temp, manager, python, str(venv), now, now)
+        env.save_meta()
+        os.replace(temp, path)
+    except OSError:
+        shutil.rmtree(temp, ignore_errors=True)
+        return lookup(digest)  # 可能已被其他进程写入
+    env.path = path
+    return env
+
+
+def prune(max_age: float) -> List[StoredEnv]:
+    """删除超过 max_age 秒未被使用的环境, 返回被删除的环境"""
+    deadline = time.time() - max_age
+    removed = [env for env in iter_envs() if env.last_used < deadline]
+    for env in removed:
+        env.remove()
+    return removed
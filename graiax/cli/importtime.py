@@ -0,0 +1,250 @@
+"""将 `-X importtime` 的输出归属到加载列表中的各个模块.
+
+在子进程中按 ignite 的顺序逐个 require 加载列表中的模块, 并在每个模块前后向 stderr 写入标记,
+两个标记之间出现的导入即由该模块触发. saya.require 经由 importlib 导入模块本身, 不会出现在 importtime 中,
+因此另外记录 require 的耗时, 扣除其中可追踪的导入后即为模块自身的耗时. 第三方包只会被第一个导入它的模块计入耗时,
+因此同时结合静态导入图给出共用该包的其他模块."""
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+MARKER = "graiax-doctor:"
+STARTUP = "(startup)"
+
+TRACE_LINE = re.compile(r"import time:\s*(\d+) \|\s*(\d+) \| ( *)(\S+)")
+
+LOAD_SCRIPT = """
+import json, os, sys, time
+from graiax.ignite import create_saya
+
+def mark(*parts):
+    os.write(2, (" ".join(("graiax-doctor:",) + parts) + "\\n").encode())
+
+saya = create_saya()
+with saya.module_context():
+    for mod in json.loads(sys.argv[1]):
+        mark("begin", mod)
+        start = time.perf_counter()
+        try:
+            saya.require(mod)
+        except BaseException as e:
+            elapsed = str(int((time.perf_counter() - start) * 1e6))
+            mark("fail", mod, elapsed, json.dumps(f"{type(e).__name__}: {e}"))
+        else:
+            mark("end", mod, str(int((time.perf_counter() - start) * 1e6)))
+"""
+
+
+@dataclass
+class ImportNode:
+    name: str
+    self_time: int  # 微秒
+    cumulative: int
+    children: List["ImportNode"] = field(default_factory=list)
+
+    @property
+    def top_level(self) -> str:
+        return self.name.partition(".")[0]
+
+    def walk(self, stack: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], "ImportNode"]]:
+        stack = (*stack, self.name)
+        yield stack, self
+        for child in self.children:
+            yield from child.walk(stack)
+
+
+@dataclass
+class Segment:
+    """加载列表中一个模块 require 期间发生的导入"""
+
+    module: str
+    roots: List[ImportNode] = field(default_factory=list)
+    elapsed: Optional[int] = None
+    """require 的耗时 (微秒)"""
+    error: Optional[str] = None
+
+    @property
+    def cumulative(self) -> int:
+        return sum(node.cumulative for node in self.roots)
+
+    @property
+    def untraced(self) -> int:
+        """模块自身以及 Saya 的耗时"""
+        return max(0, self.elapsed - self.cumulative) if self.elapsed is not None else 0
+
+
+@dataclass
+class ModuleCost:
+    module: str
+    total: int
+    own: int  # 项目自身代码的耗时
+    stdlib: int
+    third_party: Dict[str, int]
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "module": self.module,
+            "total_ms": self.total / 1000,
+            "own_ms": self.own / 1000,
+            "stdlib_ms": self.stdlib / 1000,
+            "third_party_ms": {name: cost / 1000 for name, cost in self.third_party.items()},
+            "error": self.error,
+        }
+
+
+@dataclass
+class PackageCost:
+    package: str
+    cost: int
+    paid_by: str
+    used_by: List[str]
+
+    def as_dict(self) -> dict:
+        return {
+            "package": self.package,
+            "cost_ms": self.cost / 1000,
+            "paid_by": self.paid_by,
+            "used_by": self.used_by,
+        }
+
+
+def parse_trace(lines: List[str]) -> List[Segment]:
+    """解析 importtime 输出与标记, 第一个标记之前的导入归入 `(startup)`"""
+    segments = [Segment(STARTUP)]
+    pending: Dict[int, List[ImportNode]] = {}  # 输出为后序: 子模块先于父模块打印
+    for line in lines:
+        if m := TRACE_LINE.match(line):
+            depth = len(m.group(3)) // 2
+            node = ImportNode(m.group(4), int(m.group(1)), int(m.group(2)), pending.pop(depth + 1, []))
+            if depth == 0:
+                segments[-1].roots.append(node)
+            else:
+                pending.setdefault(depth, []).append(node)
+        elif line.startswith(MARKER):
+            action, _, rest = line[len(MARKER) :].strip().partition(" ")
+            module, _, rest = rest.partition(" ")
+            elapsed, _, detail = rest.partition(" ")
+            if action == "begin":
+                segments.append(Segment(module))
+            elif action in ("end", "fail") and segments[-1].module == module:
+                segments[-1].elapsed = int(elapsed)
+                if action == "fail":
+                    segments[-1].error = json.loads(detail)
+    return segments
+
+
+def is_stdlib(name: str) -> bool:
+    from graiax.ignite import graph
+
+    top = name.partition(".")[0]
+    return graph.is_stdlib(top) or top.startswith("_") or top == "encodings"
+
+
+def attribute(segment: Segment, project: Set[str]) -> ModuleCost:
+    """按 项目代码 / 标准库 / 第三方包 拆分一个模块的累计导入耗时"""
+    cost = ModuleCost(
+        segment.module, segment.cumulative + segment.untraced, segment.untraced, 0, {}, segment.error
+    )
+
+    def visit(node: ImportNode) -> None:
+        if node.top_level in project:  # 加载列表之外的项目模块
+            cost.own += node.self_time
+            for child in node.children:
+                visit(child)
+        elif is_stdlib(node.name):
+            cost.stdlib += node.cumulative
+        else:  # 第三方包的子导入都计入该包
+            cost.third_party[node.top_level] = cost.third_party.get(node.top_level, 0) + node.cumulative
+
+    for root in segment.roots:
+        visit(root)
+    return cost
+
+
+def shared_packages(costs: List[ModuleCost], external: Dict[str, Set[str]]) -> List[PackageCost]:
+    """汇总各第三方包的导入耗时, 由谁首先导入, 以及静态分析中有哪些模块使用了它"""
+    packages: Dict[str, PackageCost] = {}
+    for cost in costs:
+        for package, time in cost.third_party.items():
+            if package in packages:
+                packages[package].cost += time
+            else:
+                packages[package] = PackageCost(package, time, cost.module, [])
+    for module, names in sorted(external.items()):
+        for package in sorted({name.partition(".")[0] for name in names}):
+            if package in packages:
+                packages[package].used_by.append(module)
+    for package in packages.values():
+        if package.paid_by not in package.used_by:  # 通过其他第三方包间接导入
+            package.used_by.insert(0, package.paid_by)
+    return sorted(packages.values(), key=lambda p: p.cost, reverse=True)
+
+
+def fold(segments: List[Segment]) -> List[str]:
+    """生成 flamegraph.pl / speedscope 可读取的折叠栈, 以加载列表中的模块为根, 数值为 self 时间 (微秒)"""
+    lines = []
+    for segment in segments:
+        if segment.untraced:
+            lines.append(f"{segment.module} {segment.untraced}")
+        for root in segment.roots:
+            for stack, node in root.walk((segment.module,)):
+                if node.self_time:
+                    lines.append(f"{';'.join(stack)} {node.self_time}")
+    return lines
+
+
+def has_ignite(python: str, cwd: str, env: Dict[str, str]) -> bool:
+    """目标解释器能否导入 graiax.ignite"""
+    check = "import importlib.util, sys; sys.exit(importlib.util.find_spec('graiax.ignite') is None)"
+    try:
+        return subprocess.run([python, "-c", check], cwd=cwd, env=env, capture_output=True).returncode == 0
+    except OSError:
+        return False
+
+
+def ignite_shim(path: Path) -> None:
+    """在 path 下创建只包含 graiax/ignite 的目录, 不把命令行工具所在的整个 site-packages 加入搜索路径"""
+    from graiax import ignite
+
+    source = Path(ignite.__file__).resolve().parent
+    target = path.joinpath("graiax", "ignite")
+    target.parent.mkdir()
+    try:
+        os.symlink(source, target, target_is_directory=True)
+    except OSError:  # 不支持符号链接时复制
+        shutil.copytree(source, target, ignore=shutil.ignore_patterns("__pycache__"))
+
+
+def trace_modules(
+    modules: List[str], cwd: str, python: str = sys.executable
+) -> Tuple[int, List[Segment], str]:
+    """在子进程中加载模块并记录导入, 返回 (退出码, 各段导入, 其余的 stderr 输出).
+
+    目标解释器 (如项目的虚拟环境) 中没有 graiax-ignite 时才提供命令行工具自带的 graiax.ignite,
+    且只提供这一个包, 不会遮蔽项目环境中被测量的依赖."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [cwd, env.get("PYTHONPATH")]))
+    with tempfile.TemporaryDirectory(prefix="graiax-importtime-") as shim:
+        if not has_ignite(python, cwd, env):
+            ignite_shim(Path(shim))
+            env["PYTHONPATH"] = os.pathsep.join([env["PYTHONPATH"], shim])
+        proc = subprocess.run(
+            [python, "-X", "importtime", "-c", LOAD_SCRIPT, json.dumps(modules)],
+            cwd=cwd,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+        )
+    lines = proc.stderr.splitlines()
+    other = [line for line in lines if not line.startswith(("import time:", MARKER))]
+    return proc.returncode, parse_trace(lines), "\n".join(other)
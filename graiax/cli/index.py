@@ -0,0 +1,255 @@
+"""持久化的增量模块索引.
+
+以目录的 mtime 为键缓存每个目录的扫描结果, 再次查询时只重新扫描发生变化的目录,
+未变化的目录仅需一次 stat. 扫描遵循与 `pkgutil.iter_modules` 相同的模块规则."""
+import hashlib
+import importlib.machinery
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from graiax.cli.util import atomic_write, cache_dir
+
+INDEX_VERSION = 2
+
+DEFAULT_EXCLUDES: Tuple[str, ...] = (
+    ".git/",
+    ".hg/",
+    ".svn/",
+    ".venv/",
+    "venv/",
+    "node_modules/",
+    "__pycache__/",
+    "__pypackages__/",
+    "build/",
+    "dist/",
+    ".tox/",
+    ".nox/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    ".ruff_cache/",
+    "*.egg-info/",
+)
+
+MODULE_SUFFIXES: Tuple[str, ...] = tuple(
+    sorted(importlib.machinery.all_suffixes(), key=len, reverse=True)  # 优先匹配较长的后缀, 如 .cpython-39.so
+)
+
+
+def module_name(filename: str) -> Optional[str]:
+    """与 `inspect.getmodulename` 相同, 但不依赖 inspect"""
+    for suffix in MODULE_SUFFIXES:
+        if filename.endswith(suffix):
+            return filename[: -len(suffix)]
+    return None
+
+
+def translate(pattern: str) -> str:
+    """将 gitignore 的通配符转换为正则表达式"""
+    parts: List[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i) and i + 2 == n and (i == 0 or pattern[i - 1] == "/"):
+            parts.append(".*")
+            i += 2
+        elif char == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif char == "?":
+            parts.append("[^/]")
+            i += 1
+        elif char == "[":
+            end = i + 1
+            if end < n and pattern[end] in "!^":
+                end += 1
+            if end < n and pattern[end] == "]":
+                end += 1
+            end = pattern.find("]", end)
+            if end < 0:
+                parts.append(re.escape(char))
+                i += 1
+                continue
+            content = pattern[i + 1 : end].replace("\\", "\\\\")
+            if content[0] in "!^":
+                content = "^" + content[1:]
+            parts.append(f"[{content}]")
+            i = end + 1
+        elif char == "\\" and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(char))
+            i += 1
+    return "".join(parts)
+
+
+class ExcludeRules:
+    """gitignore 风格的排除规则.
+
+    - 不含 `/` 的规则匹配任意层级的文件名, 含 `/` 的规则相对于项目根目录匹配
+    - `*` 与 `?` 不匹配 `/`, `**/` 匹配任意层 (包括零层) 目录, 结尾的 `/**` 匹配目录下的所有内容
+    - 以 `/` 结尾的规则只匹配目录, 以 `!` 开头的规则取消排除, 后出现的规则优先
+    - 被排除的目录不会被扫描, 其中的内容无法再用 `!` 取消排除
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = [p.strip() for p in patterns if p.strip() and not p.startswith("#")]
+        self.rules: List[Tuple[bool, bool, Pattern[str]]] = []
+        for pattern in self.patterns:
+            negate = pattern.startswith("!")
+            pattern = pattern[1:] if negate else pattern
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            regex = translate(pattern.lstrip("/"))
+            if "/" not in pattern:
+                regex = f"(?:.*/)?{regex}"
+            self.rules.append((negate, dir_only, re.compile(regex, re.DOTALL)))
+
+    @classmethod
+    def from_project(cls, root: Path, extra: Iterable[str] = ()) -> "ExcludeRules":
+        """由默认规则, `[tool.graiax].exclude` 与 `.gitignore` 组合出规则"""
+        patterns: List[str] = list(DEFAULT_EXCLUDES)
+        pyproject = root.joinpath("pyproject.toml")
+        if pyproject.exists():
+            import tomlkit
+
+            data = tomlkit.loads(pyproject.read_text(encoding="utf-8"))
+            patterns.extend(str(p) for p in data.get("tool", {}).get("graiax", {}).get("exclude", []))
+        gitignore = root.joinpath(".gitignore")
+        if gitignore.exists():
+            patterns.extend(gitignore.read_text(encoding="utf-8").splitlines())
+        patterns.extend(extra)
+        return cls(patterns)
+
+    @property
+    def key(self) -> str:
+        return hashlib.sha256("\n".join(self.patterns).encode()).hexdigest()
+
+    def excluded(self, rel_path: str, is_dir: bool) -> bool:
+        excluded = False
+        for negate, dir_only, regex in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(rel_path):
+                excluded = not negate
+        return excluded
+
+
+class ModuleIndex:
+    """项目目录的模块索引"""
+
+    def __init__(self, root: Path, rules: Optional[ExcludeRules] = None):
+        self.root: Path = Path(root).resolve()
+        self.rules: ExcludeRules = rules or ExcludeRules.from_project(self.root)
+        self.dirs: Dict[str, Dict[str, Any]] = {}
+        self.changed: bool = True
+
+    @property
+    def cache_path(self) -> Path:
+        return cache_dir("index", f"{hashlib.sha256(str(self.root).encode()).hexdigest()[:16]}.json")
+
+    @classmethod
+    def load(cls, root: Path, rules: Optional[ExcludeRules] = None) -> "ModuleIndex":
+        """从磁盘读取索引, 缓存失效时返回空索引"""
+        index = cls(root, rules)
+        try:
+            data = json.loads(index.cache_path.read_text(encoding="utf-8"))
+            expected = (INDEX_VERSION, str(index.root), index.rules.key)
+            if (data["version"], data["root"], data["rules"]) == expected:
+                index.dirs = data["dirs"]
+                index.changed = False
+        except (OSError, ValueError, KeyError):
+            pass
+        return index
+
+    def save(self) -> None:
+        if not self.changed:
+            return
+        data = {"version": INDEX_VERSION, "root": str(self.root), "rules": self.rules.key, "dirs": self.dirs}
+        try:
+            atomic_write(self.cache_path, json.dumps(data))
+            self.changed = False
+        except OSError:  # 缓存目录不可写时索引仅在内存中生效
+            pass
+
+    def scan_dir(self, rel: str, path: str, mtime: int) -> Dict[str, Any]:
+        """使用 os.scandir 扫描单个目录"""
+        modules: Dict[str, str] = {}
+        subdirs: List[str] = []
+        init: Optional[str] = None
+        with os.scandir(path) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                rel_path = f"{rel}/{entry.name}" if rel else entry.name
+                if entry.is_dir():
+                    if entry.name.isidentifier() and not self.rules.excluded(rel_path, True):
+                        subdirs.append(entry.name)
+                    continue
+                name = module_name(entry.name)
+                if name == "__init__":
+                    init = init or entry.name
+                elif name and name.isidentifier() and name not in modules:
+                    if not self.rules.excluded(rel_path, False):
+                        modules[name] = entry.name
+        return {"mtime": mtime, "init": init, "modules": modules, "subdirs": subdirs}
+
+    def refresh(self) -> "ModuleIndex":
+        """增量更新索引, 只重新扫描 mtime 变化的目录"""
+        old, self.dirs = self.dirs, {}
+        changed = False
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            path = os.path.join(self.root, rel)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            entry = old.get(rel)
+            if entry is None or entry["mtime"] != mtime:
+                try:
+                    entry = self.scan_dir(rel, path, mtime)
+                except OSError:
+                    continue
+                changed = True
+            self.dirs[rel] = entry
+            if rel and not entry["init"]:
+                continue
+            stack.extend(f"{rel}/{sub}" if rel else sub for sub in entry["subdirs"])
+        self.changed = self.changed or changed or len(old) != len(self.dirs)
+        return self
+
+    def paths(self) -> Dict[str, Path]:
+        """返回模块名到源文件的映射, 包对应其 `__init__` 文件"""
+        result: Dict[str, Path] = {}
+
+        def walk(rel: str, prefix: str) -> None:
+            entry = self.dirs[rel]
+            for name, filename in entry["modules"].items():
+                result[prefix + name] = self.root.joinpath(rel, filename)
+            for sub in entry["subdirs"]:
+                sub_rel = f"{rel}/{sub}" if rel else sub
+                sub_entry = self.dirs.get(sub_rel)
+                if sub_entry and sub_entry["init"]:
+                    walk(sub_rel, f"{prefix}{sub}.")
+                    result[prefix + sub] = self.root.joinpath(sub_rel, sub_entry["init"])
+
+        if "" in self.dirs:
+            walk("", "")
+        return result
+
+    def modules(self) -> List[str]:
+        return sorted(self.paths())
+
+
+def get_index(root: str = ".", excludes: Iterable[str] = ()) -> ModuleIndex:
+    """读取, 增量更新并保存指定目录的模块索引"""
+    root_path = Path(root).resolve()
+    index = ModuleIndex.load(root_path, ExcludeRules.from_project(root_path, excludes))
+    index.refresh().save()
+    return index
@@ -0,0 +1,103 @@
+"""通过入口点注册的第三方子命令.
+
+其他包可以在 `graiax.cli.commands` 入口点组中注册子命令:
+
+    [project.entry-points."graiax.cli.commands"]
+    mytool = "mypkg.cli:mytool"
+
+入口点指向命令函数, 与其位于同一处 (模块或类) 的可选 `<函数名>_init(parser)` 用于添加参数, 与内置命令的约定相同;
+例如 `mypkg.cli:Tool.run` 对应 `mypkg.cli:Tool.run_init`.
+扫描入口点的结果以 sys.path 中各目录的 mtime 为键缓存, 安装或卸载包后自动失效;
+插件模块只在调用其命令时才被导入, 此时再构建它的参数解析器."""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from html import escape
+from typing import Any, Callable, Dict, List, Optional
+
+from graiax.cli.util import atomic_write, cache_dir, pprint
+
+ENTRY_POINT_GROUP = "graiax.cli.commands"
+
+PLUGIN_INDEX_VERSION = 2
+
+
+def index_key() -> str:
+    """由 sys.path 中各目录的 mtime 生成缓存键, 安装, 卸载包时 site-packages 的 mtime 会改变"""
+    hasher = hashlib.sha256(f"{PLUGIN_INDEX_VERSION}|{sys.version}|{sys.prefix}".encode())
+    for entry in sys.path:
+        try:
+            stat = os.stat(entry or os.curdir)
+        except OSError:
+            continue
+        hasher.update(f"|{entry}:{stat.st_mtime_ns}".encode())
+    return hasher.hexdigest()
+
+
+def scan_entry_points() -> List[Dict[str, Any]]:
+    """扫描已安装的包中注册的子命令, 同名时以 sys.path 中靠前的为准"""
+    from importlib.metadata import distributions
+
+    plugins: Dict[str, Dict[str, Any]] = {}
+    for dist in distributions():  # 逐个包读取, Python 3.8 / 3.9 的 EntryPoint 没有 dist 属性
+        for ep in dist.entry_points:
+            if ep.group != ENTRY_POINT_GROUP or ep.name in plugins:
+                continue
+            plugins[ep.name] = {
+                "name": ep.name,
+                "ref": ep.value.partition("[")[0].strip(),  # 去掉 extras
+                "help": dist.metadata["Summary"],
+                "dist": dist.metadata["Name"],
+            }
+    return list(plugins.values())
+
+
+def load_plugins() -> List[Dict[str, Any]]:
+    """读取缓存的插件索引, 缓存失效时重新扫描入口点"""
+    path = cache_dir("plugins.json")
+    key = index_key()
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data["key"] == key:
+            return data["plugins"]
+    except (OSError, ValueError, KeyError):
+        pass
+    plugins = scan_entry_points()
+    try:
+        atomic_write(path, json.dumps({"key": key, "plugins": plugins}, ensure_ascii=False))
+    except OSError:
+        pass
+    return plugins
+
+
+def run_plugin(spec: Dict[str, Any], argv: List[str]) -> None:
+    """导入插件命令, 用其 `<函数名>_init` 构建参数解析器后调用"""
+    from graiax.cli.command import LazyRef
+
+    ref = LazyRef(spec["ref"])
+    try:
+        func = ref.resolve()
+    except Exception as e:
+        source = f" (来自 {spec['dist']})" if spec.get("dist") else ""
+        pprint(f"<b><red>! 无法加载子命令 {escape(spec['name'])}{escape(source)}: {escape(str(e))}</red></b>")
+        raise SystemExit(1)
+    parser = argparse.ArgumentParser(prog=f"graiax {spec['name']}", description=func.__doc__)
+    if parser_init_func := init_hook(spec["ref"]):
+        parser_init_func(parser)
+    func(parser.parse_args(argv))
+
+
+def init_hook(ref: str) -> Optional[Callable[[argparse.ArgumentParser], Any]]:
+    """与命令位于同一处的 `<函数名>_init`, 不存在时返回 None"""
+    from graiax.cli.command import LazyRef
+
+    module, _, qualname = ref.partition(":")
+    if not qualname:
+        return None
+    parent, _, name = qualname.rpartition(".")
+    try:
+        return LazyRef(f"{module}:{parent}.{name}_init" if parent else f"{module}:{name}_init").resolve()
+    except AttributeError:
+        return None
@@ -2,9 +2,10 @@
 Thanks to the nb-cli project for providing base schemes."""
 import abc
 from dataclasses import dataclass
-from typing import Generic, Optional, TypeVar, Union
+from typing import Callable, Dict, Generic, Optional, Tuple, TypeVar, Union
 
 from prompt_toolkit.application import Application
+from prompt_toolkit.formatted_text import AnyFormattedText
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.layout import Layout
 from prompt_toolkit.styles import Style
@@ -12,6 +13,24 @@ from prompt_toolkit.styles import Style
 Default_T = TypeVar("Default_T")
 Result_T = TypeVar("Result_T")
 
+EMPTY_STYLE = Style([])
+
+_style_cache: Dict[Tuple[type, int], Tuple[Style, Style]] = {}
+
+
+def watch_size(app: Application, on_resize: Callable[[], None]) -> None:
+    """每次渲染前检查终端尺寸, 发生变化时先调用 on_resize 再渲染"""
+    size = None
+
+    def check(app: Application) -> None:
+        nonlocal size
+        current = app.output.get_size()
+        if size is not None and current != size:
+            on_resize()
+        size = current
+
+    app.before_render += check
+
 
 class PromptABC(abc.ABC, Generic[Result_T]):
     @abc.abstractmethod
@@ -26,13 +45,31 @@ class PromptABC(abc.ABC, Generic[Result_T]):
     def make_kb(self) -> KeyBindings:
         raise NotImplementedError
 
+    def get_style(self, style: Optional[Style] = None) -> Style:
+        """合并后的样式按 (提示类, 传入的样式) 缓存, 复用同一个 Style 也能复用其内部的属性缓存"""
+        style = style or EMPTY_STYLE
+        key = (type(self), id(style))
+        cached = _style_cache.get(key)
+        if cached is None or cached[0] is not style:
+            cached = _style_cache[key] = (style, self.make_style(style))
+        return cached[1]
+
+    def summary(self) -> AnyFormattedText:
+        """回答后保留在终端中的内容, 供 Wizard 使用"""
+        return []
+
+    def on_resize(self) -> None:
+        """终端尺寸变化时调用"""
+
     def build_app(self, style: Style) -> Application:
-        return Application(
+        app = Application(
             layout=self.make_layout(),
-            style=self.make_style(style),
+            style=self.get_style(style),
             key_bindings=self.make_kb(),
             mouse_support=True,
         )
+        watch_size(app, self.on_resize)
+        return app
 
     def prompt(
         self,
@@ -40,13 +77,31 @@ class PromptABC(abc.ABC, Generic[Result_T]):
         style: Optional[Style] = None,
     ) -> Union[Default_T, Result_T]:
         print()
-        app = self.build_app(style or Style([]))
+        app = self.build_app(style or EMPTY_STYLE)
         result: Result_T = app.run()
         print()
         if result is None:
             return default
         return result
 
+    async def prompt_async(
+        self,
+        default: Default_T = None,
+        style: Optional[Style] = None,
+    ) -> Union[Default_T, Result_T]:
+        """在已运行的事件循环中提问, 提问期间其他任务可以继续执行; 位于 Wizard 中时复用其 Application"""
+        from .wizard import Wizard
+
+        if wizard := Wizard.current():
+            return await wizard.ask(self, default)
+        print()
+        app = self.build_app(style or EMPTY_STYLE)
+        result: Result_T = await app.run_async()
+        print()
+        if result is None:
+            return default
+        return result
+
 
 @dataclass
 class Choice(Generic[Result_T]):
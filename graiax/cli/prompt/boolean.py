@@ -104,6 +104,9 @@ class BooleanPrompt(PromptABC[bool]):
 
         return kb
 
+    def summary(self) -> AnyFormattedText:
+        return [*self.make_prompt(0, 0), ("class:answer", self.buffer.text)]
+
     def make_prompt(self, line_number: int, wrap_count: int) -> AnyFormattedText:
         prompt = [
             ("class:mark", self.mark),
@@ -2,6 +2,7 @@ from . import Choice, Result_T
 from .boolean import BooleanPrompt as BooleanPrompt
 from .select import SelectPrompt as SelectPrompt
 from .text import TextPrompt as TextPrompt
+from .wizard import Wizard as Wizard
 
 
 class FChoice(Choice[Result_T]):
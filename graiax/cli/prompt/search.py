@@ -0,0 +1,41 @@
+from typing import Dict, List, Set, Tuple
+
+
+def is_subsequence(query: str, name: str) -> bool:
+    it = iter(name)
+    return all(char in it for char in query)
+
+
+class ChoiceFilter:
+    """对选项名进行不区分大小写的模糊匹配.
+
+    预先建立字符到选项的倒排索引, 首次匹配只检查包含查询中全部字符的选项;
+    查询被追加字符时只在上一次的结果中继续筛选, 删除字符时直接回退到之前的结果.
+    """
+
+    def __init__(self, names: List[str]):
+        self.names: List[str] = [name.strip().lower() for name in names]
+        self.index: Dict[str, Set[int]] = {}
+        for i, name in enumerate(self.names):
+            for char in set(name):
+                self.index.setdefault(char, set()).add(i)
+        self.history: List[Tuple[str, List[int]]] = [("", list(range(len(self.names))))]
+
+    def candidates(self, query: str) -> List[int]:
+        postings = sorted((self.index.get(char, set()) for char in set(query)), key=len)
+        result = set(postings[0]).intersection(*postings[1:])
+        return sorted(result)
+
+    def match(self, query: str) -> List[int]:
+        """返回匹配的选项下标, 子串匹配优先, 其次按匹配位置排序"""
+        query = query.strip().lower()
+        while not query.startswith(self.history[-1][0]):
+            self.history.pop()
+        base_query, base = self.history[-1]
+        if base_query != query:
+            candidates = self.candidates(query) if not base_query else base
+            base = [i for i in candidates if is_subsequence(query, self.names[i])]
+            self.history.append((query, base))
+        if not query:
+            return base
+        return sorted(base, key=lambda i: (query not in self.names[i], self.names[i].find(query), i))
@@ -1,18 +1,22 @@
+import builtins
 import os
 from typing import (
     Any,
     Callable,
     Deque,
+    Dict,
     Generic,
     Iterable,
     List,
     Optional,
     Protocol,
+    Set,
+    Tuple,
     TypeVar,
 )
 
-from prompt_toolkit.filters import is_done
-from prompt_toolkit.formatted_text import AnyFormattedText
+from prompt_toolkit.filters import Condition, is_done
+from prompt_toolkit.formatted_text import AnyFormattedText, StyleAndTextTuples
 from prompt_toolkit.key_binding import KeyBindings, KeyPressEvent
 from prompt_toolkit.layout import Layout
 from prompt_toolkit.layout.containers import ConditionalContainer, HSplit, Window
@@ -21,6 +25,7 @@ from prompt_toolkit.layout.dimension import Dimension
 from prompt_toolkit.styles import Style
 
 from . import Choice, PromptABC
+from .search import ChoiceFilter
 
 R = TypeVar("R")
 
@@ -39,11 +44,11 @@ class NonNegativeRange:
 
 
 class SelectPrompt(PromptABC[List[Choice[R]]]):
-    """Select Prompt that supports auto scrolling.
+    """Select Prompt that supports auto scrolling and type-to-filter.
     ```
-    [?] Make some choices? (↑ & ↓ : 移动, Space: 选择, Enter: 提交)
-    └┬┘ └─────┬──────────┘ └────────────────────┬──────────────────┘
-    mark  annotation                           hint
+    [?] Make some choices? (↑ & ↓ : 移动, Space: 选择, Enter: 提交) 筛选: abc
+    └┬┘ └─────┬──────────┘ └────────────────────┬──────────────────┘ └───┬───┘
+    mark  annotation                           hint                   filter
     ❯   ●  A
     ↑ pointer
         ●  B
@@ -66,6 +71,7 @@ class SelectPrompt(PromptABC[List[Choice[R]]]):
         range: SupportsIn[int] = NonNegativeRange(),
         overflow_action: Callable[[Deque[int]], Any] = Deque.pop,
         default: Iterable[int] = (),
+        filterable: bool = True,
     ):
         self.annotation: str = annotation
         self.choices: List[Choice[R]] = choices
@@ -80,16 +86,42 @@ class SelectPrompt(PromptABC[List[Choice[R]]]):
         self.answered: bool = False
         self.default: Iterable[int] = default
         self.select_deque: Deque[int] = Deque(default)
+        self.select_set: Set[int] = set(self.select_deque)
         self.overflow_action = overflow_action
         self.range = range
+        self.height: int = 0
+        self.row_cache: Dict[Tuple[int, bool, bool], StyleAndTextTuples] = {}
+        self.window_cache: Tuple[Any, StyleAndTextTuples] = (None, [])
+        self.select_version: int = 0
+        self.filterable: bool = filterable
+        self.query: str = ""
+        self.filter: Optional[ChoiceFilter] = None
+        self.view: List[int] = list(builtins.range(len(choices)))
+        """当前显示的选项下标, cur_index 与 disp_index 均为其中的位置"""
 
     @property
     def max_height(self) -> int:
-        return os.get_terminal_size().lines
+        if not self.height:
+            self.refresh_height()
+        return self.height
+
+    def refresh_height(self) -> None:
+        """重新读取终端高度, 仅在创建应用与终端尺寸变化时调用"""
+        try:
+            self.height = os.get_terminal_size().lines
+        except OSError:  # not a terminal
+            self.height = 24
+
+    def on_resize(self) -> None:
+        self.refresh_height()
 
     def make_layout(self) -> Layout:
         self.answered: bool = False
         self.select_deque: Deque[int] = Deque(self.default)
+        self.select_set: Set[int] = set(self.select_deque)
+        self.select_version += 1
+        self.refresh_height()
+        self.set_query("")
         return Layout(
             HSplit(
                 [
@@ -118,6 +150,7 @@ class SelectPrompt(PromptABC[List[Choice[R]]]):
                 ("annotation", "bold"),
                 ("answer", "fg:purple"),
                 ("hint", "bold fg:red"),
+                ("filter", "fg:cyan"),
             ]
         )
         return Style([*default.style_rules, *style.style_rules])
@@ -135,12 +168,21 @@ class SelectPrompt(PromptABC[List[Choice[R]]]):
 
         @kb.add("space")
         def select(event: KeyPressEvent):
-            if self.cur_index not in self.select_deque:
-                self.select_deque.append(self.cur_index)
-                while len(self.select_deque) not in self.range:
-                    self.overflow_action(self.select_deque)
-            else:
-                self.select_deque.remove(self.cur_index)
+            if self.view:
+                self.toggle(self.view[self.cur_index])
+
+        @kb.add("<any>", filter=Condition(lambda: self.filterable))
+        def type_filter(event: KeyPressEvent):
+            if event.data.isprintable() and not event.data.isspace():
+                self.set_query(self.query + event.data)
+
+        @kb.add("backspace", filter=Condition(lambda: self.filterable))
+        def delete_filter(event: KeyPressEvent):
+            self.set_query(self.query[:-1])
+
+        @kb.add("escape", eager=True, filter=Condition(lambda: self.filterable))
+        def clear_filter(event: KeyPressEvent):
+            self.set_query("")
 
         @kb.add("enter")
         def enter(event: KeyPressEvent):
@@ -172,47 +214,86 @@ class SelectPrompt(PromptABC[List[Choice[R]]]):
             )
         else:
             prompts.append(("class:hint", self.hint))
+            if self.query:
+                prompts.append(("", " "))
+                prompts.append(("class:filter", f"筛选: {self.query}"))
         return prompts
 
+    def summary(self) -> AnyFormattedText:
+        return self.make_prompt()
+
+    def make_row(self, index: int, pointed: bool, selected: bool) -> StyleAndTextTuples:
+        key = (index, pointed, selected)
+        if (row := self.row_cache.get(key)) is None:
+            row = self.row_cache[key] = [
+                ("class:pointer", self.pointer) if pointed else ("", " " * len(self.pointer)),
+                ("", " "),
+                ("class:option", self.selected if selected else self.unselected),
+                ("", " "),
+                (
+                    "class:option_selected" if selected else "class:option_unselected",
+                    self.choices[index].name.strip() + "\n",
+                ),
+            ]
+        return row
+
     def make_choice_prompt(self) -> AnyFormattedText:
+        # only the visible window is rendered, and it is reused until the view or selection changes
         max_num = self.max_height - 1
+        key = (self.disp_index, self.cur_index, max_num, self.select_version, self.query)
+        if self.window_cache[0] == key:
+            return self.window_cache[1]
 
-        prompts: AnyFormattedText = []
-        for index, choice in enumerate(self.choices[self.disp_index : self.disp_index + max_num]):
-            current_index = index + self.disp_index
-            if current_index == self.cur_index:
-                prompts.append(("class:pointer", self.pointer))
-            else:
-                prompts.append(("", " " * len(self.pointer)))
-            prompts.append(("", " "))
-            if current_index in self.select_deque:
-                prompts.append(("class:option", self.selected))
-                prompts.append(("", " "))
-                prompts.append(("class:option_selected", choice.name.strip() + "\n"))
-            else:
-                prompts.append(("class:option", self.unselected))
-                prompts.append(("", " "))
-                prompts.append(("class:option_unselected", choice.name.strip() + "\n"))
+        prompts: StyleAndTextTuples = []
+        for pos in range(self.disp_index, min(self.disp_index + max_num, len(self.view))):
+            index = self.view[pos]
+            prompts.extend(self.make_row(index, pos == self.cur_index, index in self.select_set))
+        self.window_cache = (key, prompts)
         return prompts
 
+    def toggle(self, index: int) -> None:
+        """切换选择状态, 超出 range 时执行 overflow_action"""
+        if index not in self.select_set:
+            self.select_deque.append(index)
+            self.select_set.add(index)
+            if len(self.select_deque) not in self.range:
+                while len(self.select_deque) not in self.range:
+                    self.overflow_action(self.select_deque)
+                self.select_set = set(self.select_deque)
+        else:
+            self.select_deque.remove(index)
+            self.select_set.discard(index)
+        self.select_version += 1
+
+    def set_query(self, query: str) -> None:
+        """更新筛选条件, 已选择的选项不受影响"""
+        if self.filter is None and query:
+            self.filter = ChoiceFilter([choice.name for choice in self.choices])
+        self.query = query
+        self.view = self.filter.match(query) if self.filter else list(range(len(self.choices)))
+        self.cur_index = 0
+        self.disp_index = 0
+
     def get_result(self) -> List[Choice[R]]:
         return [self.choices[i] for i in self.select_deque]
 
     def move_up(self) -> None:
-        self.jump((self.cur_index - 1) % len(self.choices))
+        if self.view:
+            self.jump((self.cur_index - 1) % len(self.view))
 
     def move_down(self) -> None:
-        self.jump((self.cur_index + 1) % len(self.choices))
+        if self.view:
+            self.jump((self.cur_index + 1) % len(self.view))
 
     def jump(self, index: int) -> None:
         self.cur_index = index
         end_index = self.disp_index + self.max_height - 2
         if self.cur_index == self.disp_index and self.disp_index > 0:
             self.disp_index -= 1
-        elif self.cur_index == len(self.choices) - 1:
-            start_index = len(self.choices) - self.max_height + 1
+        elif self.cur_index == len(self.view) - 1:
+            start_index = len(self.view) - self.max_height + 1
             self.disp_index = max(start_index, 0)
-        elif self.cur_index == end_index and end_index < len(self.choices) - 1:
+        elif self.cur_index == end_index and end_index < len(self.view) - 1:
             self.disp_index += 1
         elif self.cur_index == 0:
             self.disp_index = 0
@@ -84,6 +84,9 @@ class TextPrompt(PromptABC[str]):
 
         return kb
 
+    def summary(self) -> AnyFormattedText:
+        return [*self.make_ft(), ("class:answer", self.buffer.text)]
+
     def make_ft(self, *_: int) -> AnyFormattedText:
         return [
             ("class:mark", self.mark),
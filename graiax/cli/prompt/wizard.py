@@ -0,0 +1,126 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Optional
+
+from prompt_toolkit.application import Application, in_terminal, run_in_terminal
+from prompt_toolkit.formatted_text import to_formatted_text
+from prompt_toolkit.layout import Layout
+from prompt_toolkit.layout.containers import Window
+from prompt_toolkit.shortcuts import print_formatted_text
+from prompt_toolkit.styles import Style
+
+from . import EMPTY_STYLE, Default_T, PromptABC, Result_T, watch_size
+
+_current: ContextVar[Optional["Wizard"]] = ContextVar("graiax_wizard", default=None)
+
+
+class WizardApplication(Application):
+    """提问结束时不退出, 而是将结果交给 Wizard"""
+
+    def __init__(self, wizard: "Wizard", **kwargs: Any):
+        super().__init__(**kwargs)
+        self.wizard: "Wizard" = wizard
+
+    def exit(self, result: Any = None, exception: Any = None, style: str = "") -> None:
+        if self.wizard.closing:
+            return super().exit(result=result, exception=exception, style=style)
+        if self.wizard.step is None or self.wizard.step.done():  # 两次提问之间的按键
+            return
+        if exception is not None:
+            self.wizard.step.set_exception(exception)
+        else:
+            self.wizard.step.set_result(result)
+
+
+class Wizard:
+    """在同一个 Application 与事件循环中依次进行多个提问.
+
+    每次提问只替换布局, 按键绑定与 (已缓存的) 样式, 回答后将结果打印在应用上方.
+    在 `async with Wizard():` 中调用的 `prompt_async` 会自动使用该 Wizard:
+
+        async with Wizard():
+            extras = await SelectPrompt(...).prompt_async()
+            install = await BooleanPrompt(...).prompt_async(default=True)
+    """
+
+    def __init__(self, style: Optional[Style] = None):
+        self.style: Style = style or EMPTY_STYLE
+        self.idle: Layout = Layout(Window(height=0))
+        self.app: WizardApplication = WizardApplication(self, layout=self.idle, mouse_support=True)
+        watch_size(self.app, self.on_resize)
+        self.task: Optional["asyncio.Task[Any]"] = None
+        self.prompt: Optional[PromptABC] = None
+        self.step: Optional["asyncio.Future[Any]"] = None
+        self.closing: bool = False
+        self.token = None
+
+    @staticmethod
+    def current() -> Optional["Wizard"]:
+        return _current.get()
+
+    def on_resize(self) -> None:
+        if self.prompt is not None:
+            self.prompt.on_resize()
+
+    @asynccontextmanager
+    async def suspend(self) -> AsyncIterator[None]:
+        """在两次提问之间直接向终端输出 (print, 子进程) 时使用, 期间暂时隐藏应用"""
+        if self.task is None or self.task.done():
+            yield
+            return
+        # print_formatted_text 在下一轮循环才通过 run_in_terminal 排队输出, 先等待已排队的输出完成
+        await asyncio.sleep(0)
+        await run_in_terminal(lambda: None)
+        async with in_terminal():
+            yield
+
+    async def __aenter__(self) -> "Wizard":
+        self.token = _current.set(self)
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        _current.reset(self.token)
+        await self.close()
+
+    async def ask(self, prompt: PromptABC[Result_T], default: Default_T = None) -> Any:
+        """提问并等待回答, 未回答 (如按下 Ctrl-C) 时返回 default"""
+        self.prompt = prompt
+        self.step = asyncio.get_running_loop().create_future()
+        self.app.layout = prompt.make_layout()
+        self.app.key_bindings = prompt.make_kb()
+        self.app.style = prompt.get_style(self.style)
+        if self.task is None or self.task.done():
+            self.closing = False
+            print()
+            self.task = asyncio.ensure_future(self.app.run_async())
+        else:
+            self.app.invalidate()
+        try:
+            await asyncio.wait([self.step, self.task], return_when=asyncio.FIRST_COMPLETED)
+            if not self.step.done():  # 应用意外退出
+                self.step.cancel()
+                self.task.result()
+                return default
+            result = self.step.result()
+        finally:
+            self.app.layout = self.idle
+            self.app.key_bindings = None
+            self.prompt = None
+        if not self.task.done():
+            await run_in_terminal(lambda: self.print_summary(prompt))
+        return default if result is None else result
+
+    def print_summary(self, prompt: PromptABC) -> None:
+        print_formatted_text(to_formatted_text(prompt.summary()), style=prompt.get_style(self.style))
+        print()
+
+    async def close(self) -> None:
+        """退出应用, 下次提问时会重新启动"""
+        if self.task is None:
+            return
+        task, self.task = self.task, None
+        if not task.done():
+            self.closing = True
+            self.app.exit()
+        await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,143 @@
+"""已解析依赖的锁文件模板缓存.
+
+以包管理器, graia-ariadne 额外依赖, 是否包含开发工具, Python 版本与镜像为键,
+保存解析得到的锁文件, 导出的 requirements.txt 以及下载好的 wheel 文件.
+命中缓存时 `graiax init` 直接复制锁文件, 无需联网解析; 存在 wheelhouse 时还可以离线安装."""
+import hashlib
+import json
+import shutil
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from graiax.cli.util import atomic_write, cache_dir
+
+TEMPLATE_VERSION = 1
+
+LOCK_FILES = {"pdm": "pdm.lock", "poetry": "poetry.lock"}
+META_NAME = "meta.json"
+REQUIREMENTS_NAME = "requirements.txt"
+WHEELHOUSE_NAME = "wheelhouse"
+
+
+def python_version() -> str:
+    return ".".join(map(str, sys.version_info[:2]))
+
+
+@dataclass
+class TemplateKey:
+    manager: str
+    extras: List[str]
+    dev_tools: bool
+    mirrors: List[str] = field(default_factory=list)
+    python: str = field(default_factory=python_version)
+
+    @property
+    def digest(self) -> str:
+        data = asdict(self)
+        data["extras"] = sorted(set(self.extras))
+        data["version"] = TEMPLATE_VERSION
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+
+
+@dataclass
+class LockTemplate:
+    key: TemplateKey
+    path: Path
+    created: float
+    last_used: float
+    versions: Dict[str, str] = field(default_factory=dict)
+    """写入 pyproject.toml 的版本约束所对应的版本, 使用模板时需写入相同的约束"""
+
+    @property
+    def lock_file(self) -> Path:
+        return self.path.joinpath(LOCK_FILES[self.key.manager])
+
+    @property
+    def requirements(self) -> Path:
+        return self.path.joinpath(REQUIREMENTS_NAME)
+
+    @property
+    def wheelhouse(self) -> Optional[Path]:
+        wheelhouse = self.path.joinpath(WHEELHOUSE_NAME)
+        return wheelhouse if wheelhouse.is_dir() and any(wheelhouse.iterdir()) else None
+
+    @property
+    def size(self) -> int:
+        return sum(f.stat().st_size for f in self.path.rglob("*") if f.is_file())
+
+    def save_meta(self) -> None:
+        meta = {
+            "key": asdict(self.key),
+            "created": self.created,
+            "last_used": self.last_used,
+            "versions": self.versions,
+        }
+        atomic_write(self.path.joinpath(META_NAME), json.dumps(meta, indent=2))
+
+    def touch(self) -> None:
+        self.last_used = time.time()
+        self.save_meta()
+
+    def remove(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def templates_dir() -> Path:
+    return cache_dir("templates")
+
+
+def load_template(path: Path) -> Optional[LockTemplate]:
+    try:
+        meta = json.loads(path.joinpath(META_NAME).read_text(encoding="utf-8"))
+        template = LockTemplate(
+            TemplateKey(**meta["key"]), path, meta["created"], meta["last_used"], meta.get("versions", {})
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return template if template.lock_file.is_file() else None
+
+
+def lookup(key: TemplateKey) -> Optional[LockTemplate]:
+    return load_template(templates_dir().joinpath(key.digest))
+
+
+def iter_templates() -> Iterator[LockTemplate]:
+    root = templates_dir()
+    if not root.is_dir():
+        return
+    for path in sorted(root.iterdir()):
+        if path.is_dir() and (template := load_template(path)):
+            yield template
+
+
+def store(
+    key: TemplateKey,
+    project: Path,
+    requirements: Optional[str] = None,
+    versions: Optional[Dict[str, str]] = None,
+) -> Optional[LockTemplate]:
+    """将项目目录下的锁文件存入缓存, 已有的 wheelhouse 会保留"""
+    lock_file = project.joinpath(LOCK_FILES[key.manager])
+    if not lock_file.is_file():
+        return None
+    path = templates_dir().joinpath(key.digest)
+    path.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    template = LockTemplate(key, path, now, now, versions or {})
+    atomic_write(template.lock_file, lock_file.read_text(encoding="utf-8"))
+    if requirements is not None:
+        atomic_write(template.requirements, requirements)
+    template.save_meta()
+    return template
+
+
+def prune(max_age: float) -> List[LockTemplate]:
+    """删除超过 max_age 秒未被使用的模板, 返回被删除的模板"""
+    deadline = time.time() - max_age
+    removed = [template for template in iter_templates() if template.last_used < deadline]
+    for template in removed:
+        template.remove()
+    return removed
@@ -0,0 +1,239 @@
+"""局部修改 pyproject.toml.
+
+只定位并改写 `[tool.graiax]` 表中 `load` 数组所在的片段, 文件其余部分逐字节保留.
+借助一个只识别字符串, 注释与括号的正则扫描器找出表头; 遇到点号键, 内联表等难以确定结构的写法时,
+回退为 tomlkit 完整解析."""
+import json
+import re
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+
+STRUCTURE_PATTERN = r"""
+    (?P<string>
+        \"\"\"(?:[^\\]|\\[\s\S])*?\"\"\"(?!")
+      | '''[\s\S]*?'''(?!')
+      | "(?:[^"\\\n]|\\.)*"
+      | '[^'\n]*'
+    )
+  | (?P<comment>\#[^\n]*)
+  | (?P<open>[\[{])
+  | (?P<close>[\]}])
+"""
+# 先用字符类一次跳过普通字符, 再以 match 取下一个记号, 比逐字符尝试各分支的 search 快得多
+STRUCTURE = re.compile(rf"[^\"'#\[\]{{}}]*(?:{STRUCTURE_PATTERN})", re.X)  # 字符串, 注释与括号
+TOKEN = re.compile(rf"[^\"'#\[\]{{}}\n]*(?:{STRUCTURE_PATTERN}| (?P<newline>\n))", re.X)  # 另外识别换行
+KEY = r"""(?:[A-Za-z0-9_-]+|"(?:[^"\\\n]|\\.)*"|'[^'\n]*')"""
+HEADER = re.compile(
+    rf"[ \t]*(\[\[?)[ \t]*({KEY}(?:[ \t]*\.[ \t]*{KEY})*)[ \t]*\]\]?[ \t]*(?:#[^\n]*)?\r?(?:\n|$)"
+)
+KEY_LINE = re.compile(rf"[ \t]*({KEY})[ \t]*([.=])[ \t]*")
+COMMENT = re.compile(r"#[^\n]*")
+PLAIN = re.compile(r"[^\"'#\[\]{}]*")
+
+
+class AmbiguousDocument(ValueError):
+    """无法在不完整解析的情况下确定文档结构"""
+
+
+class Table(NamedTuple):
+    name: Tuple[str, ...]
+    is_array: bool
+    start: int  # 表头所在行的起始位置
+    body: int  # 表头的下一行
+    end: int  # 下一个表头的起始位置
+
+
+def unquote(key: str) -> str:
+    return key[1:-1] if key[:1] in "\"'" else key
+
+
+def next_token(pattern: "re.Pattern[str]", text: str, pos: int, end: int) -> "Optional[re.Match[str]]":
+    """取 pos 之后的下一个记号, 没有时返回 None; 遇到未闭合的字符串等无法识别的内容时抛出异常"""
+    if (m := pattern.match(text, pos, end)) is not None:
+        return m
+    if PLAIN.match(text, pos, end).end() != end:
+        raise AmbiguousDocument(f"unrecognized token after offset {pos}")
+    return None
+
+
+def logical_lines(text: str, start: int = 0, end: Optional[int] = None) -> Iterator[int]:
+    """依次给出不在多行字符串或多行数组内部的行的起始位置"""
+    end = len(text) if end is None else end
+    yield start
+    depth = 0
+    pos = start
+    while (m := next_token(TOKEN, text, pos, end)) is not None:
+        kind = m.lastgroup
+        if kind == "open":
+            depth += 1
+        elif kind == "close":
+            depth -= 1
+            if depth < 0:
+                raise AmbiguousDocument("unbalanced brackets")
+        elif kind == "newline" and depth == 0:
+            yield m.end()
+        pos = m.end()
+
+
+def parse_tables(text: str) -> List[Table]:
+    """切分出各个表的范围, 根表的名称为空.
+
+    只有位于行首且不在数组或字符串内部的 `[` 才是表头, 因此扫描时不必逐行处理."""
+    headers: List[Tuple[Tuple[str, ...], bool, int, int]] = []
+    depth = 0
+    pos = 0
+    while (m := next_token(STRUCTURE, text, pos, len(text))) is not None:
+        kind, pos, start = m.lastgroup, m.end(), m.start(m.lastgroup)
+        if kind == "open":
+            line_start = text.rfind("\n", 0, start) + 1
+            if depth == 0 and text[start] == "[" and not text[line_start:start].strip():
+                header = HEADER.match(text, line_start)
+                if header is None:
+                    raise AmbiguousDocument(f"unrecognized table header at offset {line_start}")
+                name = tuple(unquote(k.strip()) for k in re.findall(KEY, header.group(2)))
+                headers.append((name, header.group(1) == "[[", line_start, header.end()))
+                pos = header.end()
+            else:
+                depth += 1
+        elif kind == "close":
+            depth -= 1
+            if depth < 0:
+                raise AmbiguousDocument("unbalanced brackets")
+    tables = [Table((), False, 0, 0, headers[0][2] if headers else len(text))]
+    for i, (name, is_array, start, body) in enumerate(headers):
+        end = headers[i + 1][2] if i + 1 < len(headers) else len(text)
+        tables.append(Table(name, is_array, start, body, end))
+    return tables
+
+
+def key_lines(text: str, table: Table) -> Iterator[Tuple[int, str, str, int]]:
+    """给出表中每个键值对的 (行起始位置, 首个键, 分隔符, 值起始位置)"""
+    for offset in logical_lines(text, table.body, table.end):
+        if offset >= table.end:
+            break
+        if m := KEY_LINE.match(text, offset, table.end):
+            yield offset, unquote(m.group(1)), m.group(2), m.end()
+
+
+def find_close(text: str, start: int) -> Tuple[int, Optional[int]]:
+    """给出从 start 处 `[` 开始的数组的 `]` 位置, 以及最后一个元素的结束位置"""
+    depth = 0
+    last_value: Optional[int] = None
+    pos = start
+    while (m := next_token(TOKEN, text, pos, len(text))) is not None:
+        kind = m.lastgroup
+        if kind == "open":
+            depth += 1
+        elif kind == "close":
+            depth -= 1
+            if depth == 0:
+                return m.start(kind), last_value
+        elif kind == "string" and depth == 1:
+            last_value = m.end()
+        pos = m.end()
+    raise AmbiguousDocument("unterminated array")
+
+
+def line_end(text: str, pos: int) -> int:
+    end = text.find("\n", pos)
+    end = len(text) if end == -1 else end
+    return end - 1 if end > pos and text[end - 1] == "\r" else end
+
+
+def verify(text: str, start: int, end: int, expected: List[str]) -> str:
+    """重新解析修改后的 [tool.graiax] 片段, 确认 load 与预期一致"""
+    if tomllib.loads(text[start:end])["tool"]["graiax"].get("load") != expected:
+        raise AmbiguousDocument("patched [tool.graiax].load does not match")
+    return text
+
+
+def patch_load(text: str, modules: List[str], comment: str = "") -> str:
+    """将 modules 中尚未存在的模块追加到 [tool.graiax].load, 只改写该数组"""
+    nl = "\r\n" if "\r\n" in text else "\n"
+    tables = parse_tables(text)
+    for table in tables:
+        if table.name == () or table.name == ("tool",):
+            nested = "tool" if table.name == () else "graiax"
+            if any(key == nested for _, key, _, _ in key_lines(text, table)):
+                raise AmbiguousDocument("tool.graiax is defined with dotted keys or an inline table")
+    graiax = [table for table in tables if table.name == ("tool", "graiax")]
+    if len(graiax) > 1 or any(table.is_array for table in graiax):
+        raise AmbiguousDocument("[tool.graiax] is defined more than once")
+    trailing = f" # {comment}" if comment else ""
+
+    def render(mods: List[str], indent: str = "    ") -> str:
+        return "".join(f"{indent}{json.dumps(mod, ensure_ascii=False)},{nl}" for mod in mods)
+
+    new = list(dict.fromkeys(modules))
+    if not graiax:
+        prefix = "" if not text else (nl if text.endswith("\n") else nl * 2)
+        patched = f"{text}{prefix}[tool.graiax]{nl}load = [{nl}{render(new)}]{trailing}{nl}"
+        return verify(patched, len(text), len(patched), new)
+
+    table = graiax[0]
+    loads = [line for line in key_lines(text, table) if line[1] == "load"]
+    if not loads:
+        insert = f"load = [{nl}{render(new)}]{trailing}{nl}"
+        patched = text[: table.body] + insert + text[table.body :]
+        return verify(patched, table.start, table.end + len(insert), new)
+    if len(loads) > 1 or loads[0][2] != "=" or text[loads[0][3] : loads[0][3] + 1] != "[":
+        raise AmbiguousDocument("[tool.graiax].load is not a plain array")
+    existing = tomllib.loads(text[table.start : table.end])["tool"]["graiax"]["load"]
+    if not all(isinstance(mod, str) for mod in existing):
+        raise AmbiguousDocument("[tool.graiax].load contains non-string items")
+    new = [mod for mod in new if mod not in existing]
+
+    open_pos = loads[0][3]
+    close, last_value = find_close(text, open_pos)
+    has_comma = last_value is None or "," in COMMENT.sub("", text[last_value:close])
+    edits: List[Tuple[int, str]] = []  # (位置, 插入的文本), 从后往前应用
+    end = line_end(text, close)
+    if trailing and "#" not in text[close + 1 : end]:
+        edits.append((end, trailing))
+    if new and "\n" in text[open_pos:close]:
+        line_start = text.rfind("\n", 0, close) + 1
+        if last_value is not None:
+            value_line = text.rfind("\n", 0, last_value) + 1
+            indent = re.match(r"[ \t]*", text[value_line:]).group()
+        else:
+            indent = "    "
+        if text[line_start:close].strip():
+            edits.append((close, nl + render(new, indent)))
+        else:
+            edits.append((line_start, render(new, indent)))
+        if not has_comma:
+            edits.append((last_value, ","))
+    elif new:
+        items = ", ".join(json.dumps(mod, ensure_ascii=False) for mod in new)
+        edits.append((close, items if last_value is None else (" " if has_comma else ", ") + items))
+    for pos, insert in sorted(edits, key=lambda edit: edit[0], reverse=True):
+        text = text[:pos] + insert + text[pos:]
+    return verify(text, table.start, table.end + sum(len(insert) for _, insert in edits), existing + new)
+
+
+def patch_load_tomlkit(text: str, modules: List[str], comment: str = "") -> str:
+    """完整解析文档后追加模块, 用于无法局部修改的情况"""
+    import tomlkit
+
+    data = tomlkit.loads(text)
+    graiax_table = data.setdefault("tool", tomlkit.table(True)).setdefault("graiax", tomlkit.table())
+    loader_array = graiax_table.setdefault("load", tomlkit.array())
+    if comment:
+        loader_array.comment(comment)
+    for mod in dict.fromkeys(modules):
+        if mod not in loader_array:
+            loader_array.add_line(mod)
+    loader_array.add_line(indent="")
+    return tomlkit.dumps(data)
+
+
+def inject_load(text: str, modules: List[str], comment: str = "") -> Tuple[str, bool]:
+    """追加模块到 [tool.graiax].load, 返回新文本以及是否使用了局部修改"""
+    try:
+        return patch_load(text, modules, comment), True
+    except (AmbiguousDocument, tomllib.TOMLDecodeError, KeyError, TypeError):
+        return patch_load_tomlkit(text, modules, comment), False
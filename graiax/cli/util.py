@@ -1,20 +1,127 @@
-import pkgutil
+import html
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
 
-from prompt_toolkit import HTML, print_formatted_text
+plain_output: bool = False
+
+ANSI_CODES = {"b": "1", "red": "31", "green": "32", "yellow": "33", "magenta": "35", "cyan": "36"}
+
+
+def use_plain_output(enable: bool = True) -> None:
+    """使 pprint 不经过 prompt_toolkit 直接输出, 此时不会导入 prompt_toolkit"""
+    global plain_output
+    plain_output = enable
+
+
+def render_ansi(text: str, color: bool) -> str:
+    """将 pprint 使用的样式标签转换为 ANSI 转义序列, color 为 False 时去除标签"""
+    stack: List[str] = []
+
+    def replace(m: "re.Match[str]") -> str:
+        closing, tag = m.group(1), m.group(2)
+        if closing:
+            if tag in stack:
+                stack.remove(tag)
+        else:
+            stack.append(tag)
+        if not color:
+            return ""
+        codes = [ANSI_CODES[t] for t in stack if t in ANSI_CODES]
+        return "\x1b[0m" + (f"\x1b[{';'.join(codes)}m" if codes else "")
+
+    return html.unescape(re.sub(r"<(/?)([a-zA-Z][\w-]*)[^>]*>", replace, text))
 
 
 def pprint(text: str, end: str = "\n"):
+    if plain_output:
+        color = sys.stdout.isatty() and "NO_COLOR" not in os.environ and sys.platform != "win32"
+        print(render_ansi(text, color), end=end)
+        return
+    # 延迟导入 prompt_toolkit, 保持 CLI 启动轻量
+    from prompt_toolkit import HTML, print_formatted_text
+
     print_formatted_text(HTML(text), end=end)
 
 
-def scan_modules(seg: list[str], path: str) -> set[str]:
-    """扫描指定目录下的所有模块"""
-    modules = []
-    for _, name, is_pkg in pkgutil.iter_modules([path]):
-        if is_pkg:
-            modules.extend(".".join([name, mod]) for mod in scan_modules(seg + [name], f"{path}/{name}"))
-        modules.append(name)
-    return modules
+async def stream_command(cmd: List[str], prefix: str = "") -> Optional[int]:
+    """运行命令并逐行转发其输出, 命令不存在时返回 None"""
+    import asyncio
+
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
+    except FileNotFoundError:
+        return None
+    async for line in proc.stdout:
+        print(prefix + line.decode(errors="replace"), end="", flush=True)
+    return await proc.wait()
+
+
+async def run_quiet(cmd: List[str]) -> Tuple[Optional[int], str]:
+    """运行命令并收集其输出而不打印, 用于后台任务; 命令不存在时退出码为 None"""
+    import asyncio
+
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
+    except FileNotFoundError:
+        return None, f"{cmd[0]}: command not found\n"
+    try:
+        output, _ = await proc.communicate()
+    except asyncio.CancelledError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return proc.returncode, output.decode(errors="replace")
+
+
+def run_commands(*cmds: List[str], prefix: bool = False) -> List[Optional[int]]:
+    """并发运行多条命令并流式输出, 返回各命令的退出码"""
+    import asyncio
+
+    async def run_all():
+        return await asyncio.gather(*(stream_command(cmd, f"[{cmd[0]}] " if prefix else "") for cmd in cmds))
+
+    return list(asyncio.run(run_all()))
+
+
+def cache_dir(*parts: str) -> Path:
+    """获取 graiax 的缓存目录, 可通过 GRAIAX_CACHE_DIR 环境变量覆盖"""
+    if env_dir := os.environ.get("GRAIAX_CACHE_DIR"):
+        base = Path(env_dir)
+    elif sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA", Path.home())).joinpath("graiax", "cache")
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME", Path.home().joinpath(".cache"))).joinpath("graiax")
+    return base.joinpath(*parts)
+
+
+def atomic_write(path: Path, text: str, encoding: str = "utf-8", newline: Optional[str] = None) -> None:
+    """通过临时文件与 rename 原子地写入文件, 保留原文件的权限"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp, "w", encoding=encoding, newline=newline) as f:
+            f.write(text)
+        if path.exists():
+            shutil.copymode(path, temp)
+        os.replace(temp, path)
+    finally:
+        if temp.exists():
+            temp.unlink()
+
+
+def scan_modules(seg: List[str], path: str) -> List[str]:
+    """扫描指定目录下的所有模块, 结果来自 `graiax.cli.index` 的增量索引"""
+    from graiax.cli.index import get_index
+
+    return [".".join(seg + [mod]) for mod in get_index(path).modules()]
 
 
 def snake_to_camel(name: str) -> str:
@@ -1,22 +1,145 @@
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+import importlib
+import sys
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
 
 import tomli
-from graia.saya import Channel, Saya
+
+from .bundle import BundleError as BundleError
+from .bundle import extract_modules_from_bundle as extract_modules_from_bundle
+from .bundle import require_bundle as require_bundle
+from .deferred import DeferredLoader as DeferredLoader
+from .graph import ImportCycleError as ImportCycleError
+from .graph import ImportCycleWarning as ImportCycleWarning
+from .graph import build_graph, components, topological_order
+from .profile import LoadProfiler as LoadProfiler
+from .profile import MemoryBudget as MemoryBudget
+from .profile import MemoryBudgetExceeded as MemoryBudgetExceeded
+from .profile import MemoryBudgetWarning as MemoryBudgetWarning
+from .profile import ModuleProfile as ModuleProfile
 
 if TYPE_CHECKING:
     from graia.ariadne.connection._info import U_Info
+    from graia.saya import Channel, Saya
+
+
+class ModuleOrderWarning(RuntimeWarning):
+    """模块在被 saya.require 之前已被导入, 其 Channel 不会收集到任何内容"""
+
+
+def warm_imports(modules: Iterable[str], timings: Optional[Dict[str, float]] = None) -> None:
+    for mod in sorted(modules):
+        if mod in sys.modules:
+            continue
+        start = time.perf_counter()
+        try:
+            importlib.import_module(mod)
+        except Exception:  # 真正的错误会在 saya.require 时暴露
+            pass
+        if timings is not None:
+            timings[mod] = time.perf_counter() - start
 
 
 def require_modules(
-    saya: Saya, modules: List[str], env: Optional[Dict[str, Any]] = None
-) -> Dict[str, Union[Channel, Any]]:
-    channels: Dict[str, Union[Channel, Any]] = {}
+    saya: "Saya",
+    modules: List[str],
+    env: Optional[Dict[str, Any]] = None,
+    workers: int = 0,
+    profiler: Optional[LoadProfiler] = None,
+    budget: Optional[MemoryBudget] = None,
+    stats: bool = False,
+) -> Union[
+    Dict[str, Union["Channel", Any]], Tuple[Dict[str, Union["Channel", Any]], Dict[str, ModuleProfile]]
+]:
+    """按导入依赖的拓扑顺序 require 模块.
+
+    Args:
+        saya (Saya): Saya 实例
+        modules (List[str]): 需要加载的模块
+        env (Dict[str, Any], optional): 模块名到 require_env 的映射
+        workers (int, optional): 大于 0 时, 先用相应数量的线程并发预导入各个互不相关子图的第三方依赖
+        profiler (LoadProfiler, optional): 传入时记录每个模块的加载耗时与内存变化
+        budget (MemoryBudget, optional): 每个模块的内存预算, 可由 `extract_memory_budget_from_toml` 读取
+        stats (bool, optional): 为 True 时返回 (channels, 每个模块的 ModuleProfile)
+
+    加载列表中的模块存在循环导入时发出 ImportCycleWarning, 环中的模块按加载列表的顺序加载.
+
+    Raises:
+        MemoryBudgetExceeded: 模块超出内存预算, 且预算的 on_exceed 为 error
+    """
+    channels: Dict[str, Union["Channel", Any]] = {}
     env = env or {}
-    for mod in sorted(modules):  # dictionary order to make sure shallow modules will be required first
-        channels[mod] = saya.require(mod, env.get(mod, None))
+    if profiler is None and (budget or stats):
+        profiler = LoadProfiler()
+    if profiler and budget:
+        profiler.budget = budget
+    graph = build_graph(modules)
+    order = topological_order(graph)  # dependencies first, ties broken by dictionary order
+    if workers > 0:
+        groups = [set().union(*(graph[mod].external for mod in group)) for group in components(graph)]
+        timings = profiler.warm_times if profiler else None
+        with ThreadPoolExecutor(workers, thread_name_prefix="ignite-warm") as executor:
+            list(executor.map(warm_imports, groups, [timings] * len(groups)))
+    if profiler:
+        profiler.start()
+    try:
+        for mod in order:
+            if mod in sys.modules and mod not in saya.channels:
+                warnings.warn(
+                    f"{mod} was imported before saya.require, its channel may be empty", ModuleOrderWarning
+                )
+            if profiler:
+                channels[mod] = profiler.require(saya, mod, env.get(mod, None), graph[mod].external)
+            else:
+                channels[mod] = saya.require(mod, env.get(mod, None))
+    finally:
+        if profiler:
+            profiler.stop()
+    if stats:
+        return channels, {mod: profiler.records[mod] for mod in channels}
     return channels
 
 
-def extract_modules_from_toml(path: str) -> List[str]:
-    data = tomli.loads(path.read_text(encoding="utf-8"))
-    return data.setdefault("tool", {}).setdefault("graiax", {}).setdefault("load", [])
+async def watch_modules(
+    saya: "Saya", modules: List[str], env: Optional[Dict[str, Any]] = None, path: str = ".", **kwargs: Any
+) -> None:
+    """在 `require_modules` 之后调用, 监视 path 并热重载变更的模块, 需要安装 `graiax-ignite[fwatch]`.
+
+    其余参数见 `graiax.ignite.watch.watch_modules`."""
+    from .watch import watch_modules
+
+    await watch_modules(saya, modules, env, path, **kwargs)
+
+
+def create_saya() -> "Saya":
+    """创建一个安装了 BroadcastBehaviour 的独立 Saya 实例, 供命令行工具在 Ariadne 之外加载模块"""
+    import asyncio
+    import inspect
+
+    from graia.broadcast import Broadcast
+    from graia.saya import Saya
+    from graia.saya.builtins.broadcast import BroadcastBehaviour
+
+    if "loop" in inspect.signature(Broadcast).parameters:  # graia-broadcast < 0.16
+        broadcast = Broadcast(loop=asyncio.new_event_loop())
+    else:
+        broadcast = Broadcast()
+    saya = Saya(broadcast)
+    saya.install_behaviours(BroadcastBehaviour(broadcast))
+    return saya
+
+
+def extract_modules_from_toml(path: Union[str, Path], key: str = "load") -> List[str]:
+    """读取 [tool.graiax] 中的加载列表, key 为 `load_deferred` 时读取延迟加载的模块"""
+    data = tomli.loads(Path(path).read_text(encoding="utf-8"))
+    return data.setdefault("tool", {}).setdefault("graiax", {}).setdefault(key, [])
+
+
+def extract_memory_budget_from_toml(path: Union[str, Path]) -> Optional[MemoryBudget]:
+    """读取 [tool.graiax.memory_budget], 未设置时返回 None"""
+    data = tomli.loads(Path(path).read_text(encoding="utf-8"))
+    config = data.get("tool", {}).get("graiax", {}).get("memory_budget")
+    return MemoryBudget.from_config(config) if config else None
@@ -0,0 +1,114 @@
+"""预编译的模块包.
+
+将加载列表及其本地依赖编译为字节码并打包为单个 zip 文件, 同时写入预先解析的加载清单.
+启动时只需把包加入 sys.path, 无需读取 pyproject.toml 或扫描源码目录."""
+import importlib.util
+import json
+import marshal
+import os
+import sys
+import zipfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+from .graph import build_graph, find_source, parse_imports, topological_order
+
+if TYPE_CHECKING:
+    from graia.saya import Channel, Saya
+
+BUNDLE_VERSION = 1
+MANIFEST_NAME = "graiax-bundle.json"
+
+
+class BundleError(RuntimeError):
+    """模块包无法在当前解释器中使用"""
+
+
+def compile_pyc(source: bytes, filename: str, optimize: int = -1) -> bytes:
+    """将源码编译为不校验源文件的 hash-based pyc 数据"""
+    code = compile(source, filename, "exec", dont_inherit=True, optimize=optimize)
+    flags = (0b01).to_bytes(4, "little")  # hash-based, unchecked
+    return importlib.util.MAGIC_NUMBER + flags + importlib.util.source_hash(source) + marshal.dumps(code)
+
+
+def collect_local_modules(modules: List[str], root: str) -> Dict[str, str]:
+    """收集加载列表及其可在 root 下找到的全部依赖, 包括途经的父包"""
+    search_path = [root]
+    found: Dict[str, str] = {}
+    stack = list(modules)
+    while stack:
+        name = stack.pop()
+        if name in found:
+            continue
+        path = find_source(name, search_path)
+        if path is None:
+            continue
+        found[name] = path
+        parent = name.rpartition(".")[0]
+        if parent:
+            stack.append(parent)
+        with open(path, encoding="utf-8") as f:
+            imports = parse_imports(f.read(), name, os.path.basename(path) == "__init__.py")
+        stack.extend(imp for imp in imports if imp not in found)
+    return found
+
+
+def build_bundle(
+    modules: List[str], output: Union[str, Path], root: str = ".", optimize: int = -1
+) -> Dict[str, Any]:
+    """编译并打包模块, 返回写入的清单"""
+    root = os.path.realpath(root)
+    missing = [mod for mod in modules if find_source(mod, [root]) is None]
+    if missing:
+        raise BundleError(f"modules not found under {root}: {', '.join(missing)}")
+    order = topological_order(build_graph(modules, [root]))
+    local = collect_local_modules(modules, root)
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "magic": importlib.util.MAGIC_NUMBER.hex(),
+        "python": ".".join(map(str, sys.version_info[:2])),
+        "load": order,
+        "modules": sorted(local),
+    }
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, path in sorted(local.items()):
+            parts = name.split(".")
+            if os.path.basename(path) == "__init__.py":
+                parts.append("__init__")
+            with open(path, "rb") as f:
+                source = f.read()
+            zf.writestr("/".join(parts) + ".pyc", compile_pyc(source, os.path.relpath(path, root), optimize))
+        parents = {".".join(name.split(".")[:i]) for name in local for i in range(1, name.count(".") + 1)}
+        namespaces = parents - set(local)
+        for name in sorted(namespaces):  # zipimport 不支持命名空间包, 为其补上空的 __init__
+            filename = os.path.join(*name.split("."), "__init__.py")
+            zf.writestr(name.replace(".", "/") + "/__init__.pyc", compile_pyc(b"", filename, optimize))
+        zf.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+    return manifest
+
+
+def extract_modules_from_bundle(path: Union[str, Path]) -> List[str]:
+    """读取模块包的清单, 将其加入 sys.path 并返回按依赖排序的加载列表"""
+    path = os.path.realpath(path)
+    try:
+        with zipfile.ZipFile(path) as zf:
+            manifest = json.loads(zf.read(MANIFEST_NAME))
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        raise BundleError(f"{path} is not a graiax bundle: {e}") from e
+    if manifest.get("version") != BUNDLE_VERSION:
+        raise BundleError(f"unsupported bundle version: {manifest.get('version')}")
+    if manifest["magic"] != importlib.util.MAGIC_NUMBER.hex():
+        raise BundleError(
+            f"bundle was built for Python {manifest['python']}, rebuild it with this interpreter"
+        )
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return manifest["load"]
+
+
+def require_bundle(
+    saya: "Saya", path: Union[str, Path], env: Optional[Dict[str, Any]] = None
+) -> Dict[str, Union["Channel", Any]]:
+    """从模块包启动, 按清单中预先排好的顺序 require 模块"""
+    env = env or {}
+    return {mod: saya.require(mod, env.get(mod, None)) for mod in extract_modules_from_bundle(path)}
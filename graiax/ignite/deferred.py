@@ -0,0 +1,136 @@
+"""非关键模块的延迟加载.
+
+`[tool.graiax].load` 中的模块在启动时同步加载, `[tool.graiax].load_deferred` 中的模块
+在连接建立后于事件循环中按依赖顺序逐个加载, 机器人在此期间可以正常响应消息.
+
+Saya 的 require 会修改共享的行为栈并向事件循环投递事件, 只能在事件循环所在的线程中依次执行;
+并发的部分是在线程池中预先导入各模块的第三方依赖, 这通常也是加载耗时的主要来源."""
+import asyncio
+import sys
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type, Union
+
+from loguru import logger
+
+from .graph import ModuleNode, build_graph, topological_order
+
+if TYPE_CHECKING:
+    from graia.broadcast import Broadcast
+    from graia.saya import Channel, Saya
+
+PENDING = "pending"
+LOADING = "loading"
+LOADED = "loaded"
+FAILED = "failed"
+
+
+class DeferredLoader:
+    """在后台加载模块, 并记录每个模块的状态"""
+
+    def __init__(
+        self,
+        saya: "Saya",
+        modules: List[str],
+        env: Optional[Dict[str, Any]] = None,
+        concurrency: int = 4,
+    ):
+        self.saya: "Saya" = saya
+        self.env: Dict[str, Any] = env or {}
+        self.concurrency: int = max(1, concurrency)
+        self.graph: Dict[str, ModuleNode] = build_graph(modules)
+        self.order: List[str] = topological_order(self.graph)
+        self.states: Dict[str, str] = {mod: PENDING for mod in self.order}
+        self.channels: Dict[str, Union["Channel", Any]] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.task: Optional["asyncio.Task[None]"] = None
+        self._done: Optional[asyncio.Event] = None
+
+    @property
+    def ready(self) -> bool:
+        """是否所有延迟模块都已处理完毕 (无论成功与否)"""
+        return all(state in (LOADED, FAILED) for state in self.states.values())
+
+    def status(self) -> Dict[str, int]:
+        """各状态的模块数量"""
+        counts = {PENDING: 0, LOADING: 0, LOADED: 0, FAILED: 0}
+        for state in self.states.values():
+            counts[state] += 1
+        return counts
+
+    @property
+    def done(self) -> asyncio.Event:
+        """加载结束时设置的事件"""
+        if self._done is None:  # 在事件循环中创建, Python < 3.10 的 Event 会绑定创建时的事件循环
+            self._done = asyncio.Event()
+        return self._done
+
+    def start(self) -> "asyncio.Task[None]":
+        """在当前事件循环中开始后台加载, 重复调用返回同一个任务"""
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return self.task
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """等待加载完成, 超时返回 False. 不会开始加载, 加载由 attach 的事件或 start 触发"""
+        try:
+            await asyncio.wait_for(self.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def attach(self, broadcast: "Broadcast", event: Optional[Type] = None) -> None:
+        """在 event 事件 (默认为 Ariadne 的 ApplicationLaunched) 触发时开始加载"""
+        if event is None:
+            from graia.ariadne.event.lifecycle import ApplicationLaunched
+
+            event = ApplicationLaunched
+
+        @broadcast.receiver(event)
+        async def start_deferred_loading():
+            self.start()
+
+    def require(self, mod: str) -> None:
+        failed = [dep for dep in self.graph[mod].depends if self.states[dep] == FAILED]
+        if failed:
+            self.states[mod] = FAILED
+            self.errors[mod] = ImportError(f"{mod} depends on failed modules: {', '.join(failed)}")
+            return
+        if mod in sys.modules and mod not in self.saya.channels:
+            from . import ModuleOrderWarning
+
+            warnings.warn(
+                f"{mod} was imported before saya.require, its channel may be empty", ModuleOrderWarning
+            )
+        try:
+            self.channels[mod] = self.saya.require(mod, self.env.get(mod, None))
+        except Exception as e:
+            self.states[mod] = FAILED
+            self.errors[mod] = e
+            logger.exception(f"deferred module failed to load: {mod}")
+        else:
+            self.states[mod] = LOADED
+
+    async def run(self) -> None:
+        from . import warm_imports
+
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix="ignite-deferred")
+        try:
+            warming = {
+                mod: loop.run_in_executor(executor, warm_imports, self.graph[mod].external)
+                for mod in self.order
+            }
+            for mod in self.order:
+                self.states[mod] = LOADING
+                await warming[mod]
+                self.require(mod)
+                await asyncio.sleep(0)  # 在两个模块之间让出事件循环
+        finally:
+            executor.shutdown(wait=False)  # 不阻塞事件循环
+            for mod, state in self.states.items():
+                if state in (PENDING, LOADING):
+                    self.states[mod] = FAILED
+            self.done.set()
+        status = self.status()
+        logger.info(f"deferred loading finished: {status[LOADED]} loaded, {status[FAILED]} failed")
@@ -0,0 +1,241 @@
+"""加载列表的静态导入依赖图.
+
+通过 ast 解析模块源码得到模块间的导入关系, 不会导入任何代码."""
+import ast
+import functools
+import heapq
+import importlib.util
+import os
+import sys
+import sysconfig
+import warnings
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+STDLIB_MODULES = frozenset(getattr(sys, "stdlib_module_names", sys.builtin_module_names))
+"""3.10 起为完整的标准库模块名, 更早的版本只有内置模块名, 其余模块由 `in_stdlib_dir` 判断"""
+
+
+def in_stdlib_dir(top: str) -> bool:
+    """按模块文件的位置判断顶层模块是否属于标准库, 不导入模块"""
+    try:
+        spec = importlib.util.find_spec(top)
+    except (ImportError, ValueError):
+        return False
+    if spec is None:
+        return False
+    if spec.origin in ("built-in", "frozen"):
+        return True
+    locations = (
+        [spec.origin] if spec.has_location and spec.origin else list(spec.submodule_search_locations or [])
+    )
+    paths = sysconfig.get_paths()
+    roots = {os.path.normcase(os.path.realpath(paths[key])) for key in ("stdlib", "platstdlib")}
+
+    def is_stdlib_path(location: str) -> bool:
+        path = os.path.normcase(os.path.realpath(location))
+        parts = set(path.split(os.sep))
+        if "site-packages" in parts or "dist-packages" in parts:
+            return False
+        return any(path.startswith(os.path.join(root, "")) for root in roots)
+
+    return bool(locations) and all(map(is_stdlib_path, locations))
+
+
+@functools.lru_cache(maxsize=None)
+def is_stdlib(name: str) -> bool:
+    """判断模块是否属于标准库"""
+    top = name.partition(".")[0]
+    if top in STDLIB_MODULES:
+        return True
+    return not hasattr(sys, "stdlib_module_names") and in_stdlib_dir(top)
+
+
+class ImportCycleError(ValueError):
+    """加载列表中的模块存在循环导入"""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle: List[str] = cycle
+        super().__init__(f"circular import between modules in load list: {' -> '.join(cycle)}")
+
+
+class ImportCycleWarning(RuntimeWarning):
+    """加载列表中的模块存在循环导入, 环中的模块将按加载列表的顺序加载"""
+
+
+@dataclass
+class ModuleNode:
+    name: str
+    path: Optional[str] = None
+    is_pkg: bool = False
+    depends: Set[str] = field(default_factory=set)
+    """加载列表中被此模块导入的模块"""
+    external: Set[str] = field(default_factory=set)
+    """被此模块导入的第三方模块, 不含标准库与加载列表所在的顶层包"""
+    imports: Set[str] = field(default_factory=set)
+    """此模块中出现的所有绝对导入名"""
+
+
+def find_source(module: str, search_path: Optional[Sequence[str]] = None) -> Optional[str]:
+    """在 sys.path 中查找模块的源文件, 不会导入父包"""
+    parts = module.split(".")
+    for entry in search_path if search_path is not None else sys.path:
+        base = os.path.join(entry or os.getcwd(), *parts)
+        for candidate in (os.path.join(base, "__init__.py"), f"{base}.py"):
+            if os.path.isfile(candidate):
+                return candidate
+    return None
+
+
+def is_type_checking(test: ast.expr) -> bool:
+    """`if TYPE_CHECKING:` 或 `if typing.TYPE_CHECKING:`"""
+    if isinstance(test, ast.Name):
+        return test.id == "TYPE_CHECKING"
+    return isinstance(test, ast.Attribute) and test.attr == "TYPE_CHECKING"
+
+
+def load_time_nodes(body: List[ast.stmt]) -> Iterator[ast.stmt]:
+    """模块加载时会执行的语句: 跳过函数体与 `if TYPE_CHECKING:` 块, 但包括类体, if / try / with 等块"""
+    for node in body:
+        yield node
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        if isinstance(node, ast.If) and is_type_checking(node.test):
+            yield from load_time_nodes(node.orelse)
+            continue
+        for name in ("body", "orelse", "finalbody", "handlers", "cases"):
+            for child in getattr(node, name, None) or []:
+                yield from load_time_nodes(child.body if not isinstance(child, ast.stmt) else [child])
+
+
+def parse_imports(source: str, module: str, is_pkg: bool) -> Set[str]:
+    """取出模块加载时会执行的绝对导入, 包括 `from a import b` 中可能的子模块 `a.b`"""
+    package = module if is_pkg else module.rpartition(".")[0]
+    imports: Set[str] = set()
+    for node in load_time_nodes(ast.parse(source).body):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package.split(".")[: len(package.split(".")) - node.level + 1] if package else []
+                if len(base) < node.level - 1:
+                    continue
+                target = ".".join(filter(None, [*base, node.module or ""]))
+            else:
+                target = node.module or ""
+            if not target:
+                continue
+            imports.add(target)
+            imports.update(f"{target}.{alias.name}" for alias in node.names if alias.name != "*")
+    return imports
+
+
+def build_node(name: str, names: Set[str], search_path: Optional[Sequence[str]] = None) -> ModuleNode:
+    """解析加载列表中的单个模块"""
+    roots = {mod.partition(".")[0] for mod in names}
+    node = ModuleNode(name, find_source(name, search_path))
+    parent = name.rpartition(".")[0]
+    while parent:  # 导入子模块时会先导入父包
+        if parent in names:
+            node.depends.add(parent)
+        parent = parent.rpartition(".")[0]
+    if node.path is None:
+        return node
+    node.is_pkg = os.path.basename(node.path) == "__init__.py"
+    try:
+        with open(node.path, encoding="utf-8") as f:
+            node.imports = parse_imports(f.read(), name, node.is_pkg)
+    except (OSError, SyntaxError, ValueError):
+        return node
+    for target in node.imports:
+        prefixes = [".".join(target.split(".")[: i + 1]) for i in range(target.count(".") + 1)]
+        if local := [p for p in prefixes if p in names]:
+            node.depends.update(local)
+        elif target.partition(".")[0] not in roots and not is_stdlib(target):
+            node.external.add(target)
+    node.depends.discard(name)
+    return node
+
+
+def build_graph(modules: Iterable[str], search_path: Optional[Sequence[str]] = None) -> Dict[str, ModuleNode]:
+    """构建加载列表的依赖图, 节点保持加载列表中的顺序"""
+    ordered = list(dict.fromkeys(modules))
+    names = set(ordered)
+    return {name: build_node(name, names, search_path) for name in ordered}
+
+
+def find_cycle(graph: Dict[str, ModuleNode], nodes: Iterable[str]) -> List[str]:
+    """在给定的节点中找出一个环"""
+    remaining = set(nodes)
+    visiting: List[str] = []
+    done: Set[str] = set()
+
+    def visit(name: str) -> Optional[List[str]]:
+        if name in visiting:
+            return visiting[visiting.index(name) :] + [name]
+        if name in done or name not in remaining:
+            return None
+        visiting.append(name)
+        for dep in sorted(graph[name].depends):
+            if cycle := visit(dep):
+                return cycle
+        visiting.pop()
+        done.add(name)
+        return None
+
+    for name in sorted(remaining):
+        if cycle := visit(name):
+            return cycle
+    return sorted(remaining)
+
+
+def topological_order(graph: Dict[str, ModuleNode], strict: bool = False) -> List[str]:
+    """返回依赖在前的确定性加载顺序, 无依赖关系的模块按字典序排列.
+
+    存在循环导入时, strict 为 True 则抛出 ImportCycleError, 否则发出 ImportCycleWarning,
+    并按加载列表 (graph 的键) 的顺序依次加载环中的模块."""
+    indegree = {name: len(node.depends) for name, node in graph.items()}
+    dependents: Dict[str, List[str]] = {name: [] for name in graph}
+    for name, node in graph.items():
+        for dep in node.depends:
+            dependents[dep].append(name)
+    ready = [name for name, degree in indegree.items() if not degree]
+    heapq.heapify(ready)
+    order: List[str] = []
+    placed: Set[str] = set()
+    while len(order) < len(graph):
+        if not ready:  # 剩余的模块都在环中或依赖于环
+            cycle = find_cycle(graph, set(graph) - placed)
+            if strict:
+                raise ImportCycleError(cycle)
+            warnings.warn(str(ImportCycleError(cycle)), ImportCycleWarning, stacklevel=2)
+            name = next(name for name in graph if name in cycle)  # 环中在加载列表里最靠前的模块
+            indegree[name] = 0
+        else:
+            name = heapq.heappop(ready)
+        order.append(name)
+        placed.add(name)
+        for dependent in dependents[name]:
+            indegree[dependent] -= 1
+            if not indegree[dependent] and dependent not in placed:
+                heapq.heappush(ready, dependent)
+    return order
+
+
+def components(graph: Dict[str, ModuleNode]) -> List[List[str]]:
+    """将依赖图划分为互不相关的子图"""
+    parent = {name: name for name in graph}
+
+    def find(name: str) -> str:
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    for name, node in graph.items():
+        for dep in node.depends:
+            parent[find(name)] = find(dep)
+    groups: Dict[str, List[str]] = {}
+    for name in sorted(graph):
+        groups.setdefault(find(name), []).append(name)
+    return list(groups.values())
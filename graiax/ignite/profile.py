@@ -0,0 +1,219 @@
+"""模块加载性能分析与内存预算."""
+import builtins
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import warnings
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Union
+
+if TYPE_CHECKING:
+    from graia.saya import Saya
+
+
+@dataclass
+class ModuleProfile:
+    module: str
+    wall_time: float = 0.0
+    """require 的总耗时 (包括计入此模块的预导入耗时), 单位为秒"""
+    deps_time: float = 0.0
+    """导入此模块尚未加载的外部依赖 (所在顶层包之外的模块, 包括间接依赖) 的耗时, 单位为秒"""
+    memory: Optional[int] = None
+    """require 前后 tracemalloc 统计的内存变化, 单位为字节"""
+    peak_memory: Optional[int] = None
+    """require 期间 tracemalloc 统计的内存峰值增量, 单位为字节; 需要 Python 3.9+"""
+    rss: Optional[int] = None
+    """require 前后常驻内存 (RSS) 的变化, 单位为字节, 包括扩展模块分配的内存; 仅 Linux 可用.
+    不开启 tracemalloc 时也会统计. 开启时已扣除 tracemalloc 报告的自身内存, 但其记录分配信息的开销
+    仍会使该值偏大 (分配大量小对象的模块可达一倍以上), 需要准确的 RSS 时请关闭 tracemalloc"""
+    error: Optional[str] = None
+
+    @property
+    def retained(self) -> int:
+        """用于预算的内存增量, 取 tracemalloc 与 RSS 中较大的一个"""
+        return max(self.memory or 0, self.rss or 0)
+
+    @property
+    def self_time(self) -> float:
+        return self.wall_time - self.deps_time
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "self_time": self.self_time, "retained": self.retained}
+
+
+UNITS = {"": 1, "b": 1, "k": 1000, "kb": 1000, "kib": 1024, "m": 1000**2, "mb": 1000**2, "mib": 1024**2}
+UNITS.update({"g": 1000**3, "gb": 1000**3, "gib": 1024**3})
+
+
+class MemoryBudgetWarning(RuntimeWarning):
+    """模块加载后的内存增量超出预算"""
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    """模块加载后的内存增量超出预算, 且预算的 on_exceed 为 error"""
+
+    def __init__(self, record: ModuleProfile, limit: int):
+        self.record: ModuleProfile = record
+        self.limit: int = limit
+        super().__init__(
+            f"{record.module} retained {record.retained / 1024 / 1024:.1f} MiB, "
+            f"exceeding its budget of {limit / 1024 / 1024:.1f} MiB"
+        )
+
+
+def parse_size(value: Union[int, str]) -> int:
+    """解析 `1048576`, `"512 KiB"`, `"64MB"` 这样的内存大小"""
+    if isinstance(value, int):
+        return value
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*", str(value))
+    if m is None or m.group(2).lower() not in UNITS:
+        raise ValueError(f"invalid memory size: {value!r}")
+    return int(float(m.group(1)) * UNITS[m.group(2).lower()])
+
+
+@dataclass
+class MemoryBudget:
+    """每个模块加载后允许保留的内存, 对应 pyproject.toml 中的:
+
+    [tool.graiax.memory_budget]
+    default = "32 MiB"
+    on_exceed = "warn"  # 或 "error"
+    modules = { "modules.image" = "256 MiB" }
+    """
+
+    default: Optional[int] = None
+    modules: Dict[str, int] = field(default_factory=dict)
+    on_exceed: str = "warn"
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "MemoryBudget":
+        on_exceed = config.get("on_exceed", "warn")
+        if on_exceed not in ("warn", "error"):
+            raise ValueError(f"memory_budget.on_exceed must be 'warn' or 'error', not {on_exceed!r}")
+        default = config.get("default")
+        return cls(
+            None if default is None else parse_size(default),
+            {mod: parse_size(size) for mod, size in config.get("modules", {}).items()},
+            on_exceed,
+        )
+
+    def limit(self, module: str) -> Optional[int]:
+        return self.modules.get(module, self.default)
+
+    def exceeded(self, record: ModuleProfile) -> bool:
+        limit = self.limit(record.module)
+        return limit is not None and record.retained > limit
+
+    def check(self, record: ModuleProfile) -> None:
+        """超出预算时按 on_exceed 发出警告或抛出 MemoryBudgetExceeded"""
+        if not self.exceeded(record):
+            return
+        error = MemoryBudgetExceeded(record, self.limit(record.module))
+        if self.on_exceed == "error":
+            raise error
+        warnings.warn(str(error), MemoryBudgetWarning)
+
+
+def current_rss() -> Optional[int]:
+    """当前进程的常驻内存, 单位为字节; 无法获取时返回 None"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class LoadProfiler:
+    """在 `require_modules` 中记录每个模块的加载耗时与内存变化.
+
+    分析期间替换 `builtins.__import__`, 将 require 中首次导入外部模块 (含其间接导入) 的耗时计入 deps_time;
+    `require_modules` 的 workers 预先导入的依赖, 其耗时计入加载列表中第一个直接导入它的模块."""
+
+    def __init__(self, trace_memory: bool = True, budget: Optional[MemoryBudget] = None):
+        self.trace_memory: bool = trace_memory
+        self.budget: Optional[MemoryBudget] = budget
+        self.records: Dict[str, ModuleProfile] = {}
+        self.warm_times: Dict[str, float] = {}
+        """预导入的依赖及其耗时, 由 `require_modules` 填入"""
+        self._started_tracing: bool = False
+        self._original_import: Optional[Callable[..., Any]] = None
+        self._current: Optional[ModuleProfile] = None
+        self._thread: Optional[int] = None
+        self._in_dep: bool = False
+
+    def start(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+
+    def stop(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name: str, globals=None, locals=None, fromlist=(), level: int = 0) -> Any:
+        record = self._current
+        if (
+            record is None
+            or self._in_dep
+            or level
+            or name in sys.modules
+            or name.partition(".")[0] == record.module.partition(".")[0]
+            or threading.get_ident() != self._thread
+        ):
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._in_dep = True  # 只计最外层, 依赖内部的导入已包含在其中
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            record.deps_time += time.perf_counter() - start
+            self._in_dep = False
+
+    def require(self, saya: "Saya", module: str, env: Any, external: Iterable[str] = ()) -> Any:
+        record = self.records[module] = ModuleProfile(module)
+        for dep in sorted(external):
+            if dep in self.warm_times:
+                record.deps_time += self.warm_times.pop(dep)
+        warm_time = record.deps_time
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+                tracemalloc.reset_peak()
+            base_memory = tracemalloc.get_traced_memory()[0]
+        base_overhead = tracemalloc.get_tracemalloc_memory() if tracing else 0
+        base_rss = current_rss()
+        self._current, self._thread = record, threading.get_ident()
+        start = time.perf_counter()
+        try:
+            channel = saya.require(module, env)
+        except Exception as e:
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._current = None
+            record.wall_time = time.perf_counter() - start + warm_time
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                record.memory = current - base_memory
+                if hasattr(tracemalloc, "reset_peak"):
+                    record.peak_memory = peak - base_memory
+            if base_rss is not None and (rss := current_rss()) is not None:
+                overhead = tracemalloc.get_tracemalloc_memory() - base_overhead if tracing else 0
+                record.rss = rss - base_rss - overhead  # tracemalloc 的记录本身也会增加 RSS
+        if self.budget:
+            self.budget.check(record)
+        return channel
+
+    def report(self, key: str = "wall_time") -> List[ModuleProfile]:
+        """按指定字段降序排列的记录"""
+        return sorted(self.records.values(), key=lambda r: getattr(r, key) or 0, reverse=True)
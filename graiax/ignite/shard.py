@@ -0,0 +1,282 @@
+"""将 Saya 模块分片到多个工作进程.
+
+每个工作进程拥有独立的 Broadcast 与 Saya, 只 require 分配给它的模块.
+主进程把选定类型的事件通过管道 (POSIX 上为 Unix socket) 转发给所有工作进程;
+工作进程中的模块通过 `remote(name)` 取得主进程中对象 (如 Ariadne 实例) 的代理, 方法调用在主进程中执行并返回结果.
+
+事件与调用的参数, 返回值都需要可以被 pickle. 工作进程以 spawn 方式启动,
+因此启动脚本需要放在 `if __name__ == "__main__":` 之下, 模块也必须能在新的解释器中导入."""
+import asyncio
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Type
+
+from loguru import logger
+
+from .graph import build_graph, components, topological_order
+
+if TYPE_CHECKING:
+    from graia.broadcast import Broadcast
+
+
+class ShardError(RuntimeError):
+    """工作进程未能启动或已退出"""
+
+
+def partition_modules(modules: List[str], workers: int) -> List[List[str]]:
+    """按导入关系将模块分为互不相关的组, 再尽量均匀地分配给 workers 个工作进程.
+
+    每个分片内的模块按导入依赖的拓扑顺序排列."""
+    graph = build_graph(modules)
+    rank = {mod: i for i, mod in enumerate(topological_order(graph))}
+    groups = sorted(components(graph), key=len, reverse=True)
+    shards: List[List[str]] = [[] for _ in range(max(1, workers))]
+    for group in groups:
+        min(shards, key=len).extend(sorted(group, key=rank.__getitem__))
+    return [shard for shard in shards if shard]
+
+
+async def recv(conn: Connection, executor: Executor) -> Any:
+    """在 executor 的线程中等待管道消息, 不阻塞事件循环; 对端关闭时抛出 EOFError.
+
+    等待期间会一直占用一个线程, 因此使用专门的 executor, 以免占满事件循环默认的线程池."""
+    return await asyncio.get_running_loop().run_in_executor(executor, conn.recv)
+
+
+def picklable_error(error: BaseException) -> BaseException:
+    import pickle
+
+    try:
+        pickle.loads(pickle.dumps(error))
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+    return error
+
+
+# 工作进程一侧
+
+
+_connection: Optional[Connection] = None
+_pending: Dict[int, "asyncio.Future[Any]"] = {}
+_call_ids = itertools.count()
+
+
+class RemoteObject:
+    """主进程中对象的代理, 方法调用会被发送到主进程执行"""
+
+    def __init__(self, name: str):
+        self._name: str = name
+
+    def __getattr__(self, method: str):
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            if _connection is None:
+                raise ShardError("remote() can only be used inside a shard worker")
+            call_id = next(_call_ids)
+            future = _pending[call_id] = asyncio.get_running_loop().create_future()
+            _connection.send(("call", call_id, self._name, method, args, kwargs))
+            return await future
+
+        call.__name__ = method
+        return call
+
+    def __repr__(self) -> str:
+        return f"RemoteObject({self._name!r})"
+
+
+def remote(name: str) -> RemoteObject:
+    """取得主进程通过 `ShardManager.expose` 暴露的对象的代理"""
+    return RemoteObject(name)
+
+
+async def serve_shard(conn: Connection, modules: List[str], env: Dict[str, Any]) -> None:
+    global _connection
+    from . import create_saya
+
+    _connection = conn
+    saya = create_saya()
+    states: Dict[str, Optional[str]] = {}
+    for mod in topological_order(build_graph(modules)):  # 分片可能由用户手动指定, 依赖需先于使用者加载
+        try:
+            saya.require(mod, env.get(mod, None))
+            states[mod] = None
+        except Exception as e:
+            logger.exception(f"shard failed to load {mod}")
+            states[mod] = f"{type(e).__name__}: {e}"
+    conn.send(("ready", os.getpid(), states))
+    executor = ThreadPoolExecutor(1, thread_name_prefix="ignite-shard-recv")
+    while True:
+        try:
+            message = await recv(conn, executor)
+        except (EOFError, OSError):
+            break
+        kind = message[0]
+        if kind == "event":
+            saya.broadcast.postEvent(message[1])
+        elif kind == "result":
+            _, call_id, ok, value = message
+            future = _pending.pop(call_id, None)
+            if future is None or future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        elif kind == "stop":
+            break
+    executor.shutdown(wait=False)
+
+
+def worker_main(conn: Connection, modules: List[str], env: Dict[str, Any]) -> None:
+    """工作进程入口"""
+    asyncio.run(serve_shard(conn, modules, env))
+
+
+# 主进程一侧
+
+
+class Shard:
+    def __init__(self, name: str, modules: List[str]):
+        self.name: str = name
+        self.modules: List[str] = modules
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.conn: Optional[Connection] = None
+        self.states: Dict[str, Optional[str]] = {}
+        """模块名到错误信息的映射, 加载成功的模块为 None"""
+        self.alive: bool = False
+
+
+class ShardManager:
+    """启动并管理工作进程, 向其转发事件并执行其发回的调用.
+
+    Example:
+
+        manager = ShardManager(app.broadcast, {"image": ["modules.image"], "parse": ["modules.parse"]})
+        manager.expose("app", app)
+        manager.forward(GroupMessage, FriendMessage)
+        await manager.start()
+    """
+
+    def __init__(
+        self,
+        broadcast: "Broadcast",
+        shards: Dict[str, List[str]],
+        env: Optional[Dict[str, Any]] = None,
+    ):
+        self.broadcast: "Broadcast" = broadcast
+        self.shards: Dict[str, Shard] = {name: Shard(name, modules) for name, modules in shards.items()}
+        self.env: Dict[str, Any] = env or {}
+        self.exposed: Dict[str, Any] = {}
+        self.tasks: List["asyncio.Task[None]"] = []
+        self.stopping: bool = False
+        self.executor: Optional[ThreadPoolExecutor] = None
+        """每个分片在其中占用一个线程等待消息"""
+
+    def expose(self, name: str, obj: Any) -> None:
+        """允许工作进程通过 `remote(name)` 调用 obj 的方法"""
+        self.exposed[name] = obj
+
+    def forward(self, *event_types: Type) -> None:
+        """将这些类型的事件转发给所有工作进程"""
+        from graia.broadcast.interfaces.dispatcher import DispatcherInterface
+
+        for event_type in event_types:
+
+            @self.broadcast.receiver(event_type)
+            async def forward_event(interface: DispatcherInterface):
+                self.dispatch(interface.event)
+
+    def dispatch(self, event: Any) -> None:
+        """直接向所有工作进程发送事件"""
+        for shard in self.shards.values():
+            if shard.alive:
+                try:
+                    shard.conn.send(("event", event))
+                except OSError:
+                    shard.alive = False
+
+    async def start(self, timeout: Optional[float] = 60) -> Dict[str, Dict[str, Optional[str]]]:
+        """启动全部工作进程并等待其加载完模块, 返回每个分片的模块加载结果"""
+        ctx = multiprocessing.get_context("spawn")  # 避免在已有线程与事件循环的进程中 fork
+        self.executor = ThreadPoolExecutor(len(self.shards) or 1, thread_name_prefix="ignite-shard-recv")
+        for shard in self.shards.values():
+            parent, child = ctx.Pipe()
+            env = {mod: self.env[mod] for mod in shard.modules if mod in self.env}
+            shard.process = ctx.Process(
+                target=worker_main,
+                args=(child, shard.modules, env),
+                name=f"ignite-shard-{shard.name}",
+                daemon=True,
+            )
+            shard.process.start()
+            child.close()
+            shard.conn = parent
+
+        async def wait_ready(shard: Shard) -> Tuple[str, Dict[str, Optional[str]]]:
+            try:
+                kind, _, states = await recv(shard.conn, self.executor)
+            except (EOFError, OSError) as e:
+                raise ShardError(f"shard {shard.name} exited during startup") from e
+            shard.states, shard.alive = states, True
+            return shard.name, states
+
+        results = await asyncio.wait_for(asyncio.gather(*map(wait_ready, self.shards.values())), timeout)
+        self.tasks = [
+            asyncio.get_running_loop().create_task(self.serve(shard)) for shard in self.shards.values()
+        ]
+        return dict(results)
+
+    async def serve(self, shard: Shard) -> None:
+        """处理工作进程发回的调用"""
+        while True:
+            try:
+                message = await recv(shard.conn, self.executor)
+            except (EOFError, OSError):
+                break
+            if message[0] == "call":
+                asyncio.get_running_loop().create_task(self.call(shard, *message[1:]))
+        shard.alive = False
+        if not self.stopping:
+            logger.warning(f"shard {shard.name} exited")
+
+    async def call(
+        self, shard: Shard, call_id: int, name: str, method: str, args: tuple, kwargs: dict
+    ) -> None:
+        try:
+            result = getattr(self.exposed[name], method)(*args, **kwargs)
+            if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+                result = await result
+            reply = ("result", call_id, True, result)
+        except Exception as e:
+            reply = ("result", call_id, False, picklable_error(e))
+        try:
+            shard.conn.send(reply)
+        except OSError:
+            shard.alive = False
+        except Exception as e:  # 返回值无法 pickle
+            shard.conn.send(("result", call_id, False, picklable_error(e)))
+
+    async def stop(self, timeout: float = 5) -> None:
+        """通知工作进程退出并等待, 超时后强制结束"""
+        self.stopping = True
+        for shard in self.shards.values():
+            if shard.alive:
+                try:
+                    shard.conn.send(("stop",))
+                except OSError:
+                    pass
+        loop = asyncio.get_running_loop()
+        for shard in self.shards.values():
+            if shard.process is None:
+                continue
+            await loop.run_in_executor(None, shard.process.join, timeout)
+            if shard.process.is_alive():
+                shard.process.terminate()
+            shard.alive = False
+            shard.conn.close()
+        for task in self.tasks:
+            task.cancel()
+        if self.executor is not None:  # 工作进程退出后, 等待消息的线程随之结束
+            self.executor.shutdown(wait=False)
@@ -0,0 +1,244 @@
+"""基于 watchgod 的 Saya 模块热重载.
+
+需要安装可选依赖: `graiax-ignite[fwatch]`."""
+import os
+import sys
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from .graph import ModuleNode, build_graph, build_node, parse_imports, topological_order
+
+try:
+    from watchgod import PythonWatcher, awatch
+except ImportError as e:
+    raise ImportError(
+        "hot reload requires watchgod, install it with `pip install graiax-ignite[fwatch]`"
+    ) from e
+
+if TYPE_CHECKING:
+    from graia.saya import Saya
+
+
+class ModuleReloader:
+    """将变更的文件映射到受影响的模块, 只重载这些模块及依赖它们的模块.
+
+    项目模块的文件与导入关系在创建时建立一次, 之后只随变更与重载的模块增量更新,
+    每次重载的耗时与 sys.modules 的大小无关."""
+
+    def __init__(
+        self, saya: "Saya", modules: List[str], env: Optional[Dict[str, Any]] = None, root: str = "."
+    ):
+        self.saya: "Saya" = saya
+        self.modules: Set[str] = set(modules)
+        self.env: Dict[str, Any] = env or {}
+        self.root: str = os.path.realpath(root)
+        self.graph: Dict[str, ModuleNode] = build_graph(modules)
+        self._imports: Dict[str, Tuple[int, Set[str]]] = {}
+        self.paths: Dict[str, str] = {}
+        """项目模块到源文件的映射"""
+        self.files: Dict[str, Set[str]] = {}
+        """源文件到项目模块的映射"""
+        self.imports: Dict[str, Set[str]] = {}
+        """项目模块中出现的绝对导入名"""
+        self.imported_by: Dict[str, Set[str]] = {}
+        """导入名 (及其各级父包) 到导入了它的项目模块的反向映射"""
+        for name, node in self.graph.items():
+            if node.path:
+                self.track(name, os.path.realpath(node.path), node.imports)
+        for name, module in list(sys.modules.items()):
+            self.track_module(name, module)
+
+    def in_root(self, path: str) -> bool:
+        try:
+            return os.path.commonpath([self.root, path]) == self.root
+        except ValueError:  # 不同驱动器
+            return False
+
+    def module_imports(self, name: str, path: str) -> Set[str]:
+        """项目中非加载列表模块的导入, 按 mtime 缓存"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            if (cached := self._imports.get(path)) and cached[0] == mtime:
+                return cached[1]
+            with open(path, encoding="utf-8") as f:
+                imports = parse_imports(f.read(), name, os.path.basename(path) == "__init__.py")
+        except (OSError, SyntaxError, ValueError):
+            return set()
+        self._imports[path] = (mtime, imports)
+        return imports
+
+    def track(self, name: str, path: str, imports: Set[str]) -> None:
+        """记录项目模块的源文件与导入, 替换之前的记录"""
+        self.untrack(name)
+        self.paths[name] = path
+        self.files.setdefault(path, set()).add(name)
+        self.imports[name] = imports
+        for imp in imports:
+            parts = imp.split(".")
+            for i in range(len(parts)):
+                self.imported_by.setdefault(".".join(parts[: i + 1]), set()).add(name)
+
+    def untrack(self, name: str) -> None:
+        if (path := self.paths.pop(name, None)) is not None:
+            self.files[path].discard(name)
+        for imp in self.imports.pop(name, ()):
+            parts = imp.split(".")
+            for i in range(len(parts)):
+                self.imported_by.get(".".join(parts[: i + 1]), set()).discard(name)
+
+    def track_module(self, name: str, module: Any) -> bool:
+        """记录根目录下已导入的辅助模块, 返回该模块是否为项目模块"""
+        if name in self.paths:
+            return True
+        path = getattr(module, "__file__", None)
+        if name in self.modules or not path:
+            return False
+        path = os.path.realpath(path)
+        if not path.endswith(".py") or not self.in_root(path):
+            return False
+        self.track(name, path, self.module_imports(name, path))
+        return True
+
+    def track_imports(self, names: Iterable[str]) -> None:
+        """重载后更新模块的记录, 并记录它们新导入的辅助模块"""
+        stack = list(names)
+        seen = set(stack)
+        while stack:
+            name = stack.pop()
+            if name in self.modules:
+                node = self.graph[name]
+                if node.path:
+                    self.track(name, os.path.realpath(node.path), node.imports)
+            elif (module := sys.modules.get(name)) is None:
+                self.untrack(name)
+                continue
+            else:
+                self.untrack(name)
+                if not self.track_module(name, module):
+                    continue
+            for imp in self.imports.get(name, ()):
+                if imp not in seen and imp not in self.paths and imp in sys.modules:
+                    seen.add(imp)
+                    stack.append(imp)
+
+    def discover(self, path: str) -> Set[str]:
+        """由 sys.path 推断尚未记录的文件对应的模块名, 并记录其中已导入的模块"""
+        names: Set[str] = set()
+        if not path.endswith(".py"):
+            return names
+        for entry in sys.path:
+            entry = os.path.realpath(entry or ".")
+            try:
+                rel = os.path.relpath(path[:-3], entry)
+            except ValueError:  # 不同驱动器
+                continue
+            parts = rel.split(os.sep)
+            if parts[-1] == "__init__":
+                parts.pop()
+            if not parts or not all(part.isidentifier() for part in parts):
+                continue
+            name = ".".join(parts)
+            if (module := sys.modules.get(name)) is not None and self.track_module(name, module):
+                names.add(name)
+        return names
+
+    def importers(self, changed: Set[str]) -> Set[str]:
+        """项目中直接或间接导入了变更模块的辅助模块 (如 helper -> helper -> 插件中间的 helper)"""
+        found = set(changed)
+        stack = list(changed)
+        while stack:
+            for name in self.imported_by.get(stack.pop(), ()):
+                if name not in found and name not in self.modules:
+                    found.add(name)
+                    stack.append(name)
+        return found - set(changed)
+
+    def local_modules(self, files: Set[str]) -> Dict[str, str]:
+        """找出变更文件对应的加载列表模块与辅助模块"""
+        found: Dict[str, str] = {}
+        for path in files:
+            found.update((name, path) for name in self.files.get(path) or self.discover(path))
+        return found
+
+    def affected(self, changed: Iterable[str]) -> List[str]:
+        """由变更的模块求出需要重载的加载列表模块, 依赖在前"""
+        changed = set(changed)
+        targets = {mod for mod in self.modules if mod in changed}
+        targets.update(
+            name for mod in changed for name in self.imported_by.get(mod, ()) if name in self.modules
+        )
+        dependents: Dict[str, Set[str]] = {name: set() for name in self.graph}
+        for name, node in self.graph.items():
+            for dep in node.depends:
+                dependents[dep].add(name)
+        stack = list(targets)
+        while stack:
+            for dependent in dependents[stack.pop()] - targets:
+                targets.add(dependent)
+                stack.append(dependent)
+        return [mod for mod in topological_order(self.graph) if mod in targets]
+
+    @staticmethod
+    def forget(name: str) -> None:
+        """从 sys.modules 与父包的属性中移除模块, 使 `from pkg import mod` 不再得到旧的模块对象"""
+        module = sys.modules.pop(name, None)
+        parent, _, child = name.rpartition(".")
+        if module is not None and parent and getattr(sys.modules.get(parent), child, None) is module:
+            delattr(sys.modules[parent], child)
+
+    def reload(self, files: Iterable[str]) -> List[str]:
+        """重载变更文件影响到的模块, 返回成功重载的加载列表模块"""
+        files = {os.path.realpath(f) for f in files}
+        changed = set(self.local_modules({f for f in files if self.in_root(f)}))
+        for name in changed:
+            if name in self.modules:  # 只重新解析变更的模块
+                self.graph[name] = build_node(name, self.modules)
+        self.track_imports(changed)
+        changed |= self.importers(changed)  # 这些辅助模块仍引用着旧的模块对象, 也需要重新导入
+        targets = self.affected(changed)
+        for mod in reversed(targets):
+            if channel := self.saya.channels.get(mod):
+                self.saya.uninstall_channel(channel)
+        for name in changed:
+            self.forget(name)
+        reloaded = []
+        for mod in targets:  # 一个模块失败时继续加载其余模块
+            self.forget(mod)
+            try:
+                self.saya.require(mod, self.env.get(mod, None))
+            except Exception:
+                logger.exception(f"hot reload failed: {mod}")
+            else:
+                reloaded.append(mod)
+        self.track_imports(changed | set(targets))
+        return reloaded
+
+
+async def watch_modules(
+    saya: "Saya",
+    modules: List[str],
+    env: Optional[Dict[str, Any]] = None,
+    path: str = ".",
+    debounce: int = 1600,
+    stop_event: Any = None,
+) -> None:
+    """监视目录并热重载变更的模块.
+
+    Args:
+        saya (Saya): Saya 实例
+        modules (List[str]): 加载列表, 应与传给 `require_modules` 的一致
+        env (Dict[str, Any], optional): 模块名到 require_env 的映射
+        path (str, optional): 监视的目录
+        debounce (int, optional): 合并连续保存的时间窗口, 单位为毫秒
+        stop_event (asyncio.Event, optional): 设置后停止监视
+    """
+    reloader = ModuleReloader(saya, modules, env, path)
+    async for changes in awatch(path, watcher_cls=PythonWatcher, debounce=debounce, stop_event=stop_event):
+        try:
+            reloaded = reloader.reload(file for _, file in changes)
+        except Exception:
+            logger.exception("hot reload failed")
+            continue
+        if reloaded:
+            logger.info(f"hot reloaded: {', '.join(reloaded)}")
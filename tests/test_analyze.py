@@ -0,0 +1,57 @@
+"""静态识别 Saya 模块: 不导入代码, 结果按文件内容缓存, 并丢弃已不存在的条目."""
+import json
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+from graiax.cli import analyze
+from graiax.cli.util import cache_dir
+
+SOURCES = {
+    "current": "from graia.saya import Channel\n\nchannel = Channel.current()\n",
+    "decorated": (
+        "from graia.ariadne.util.saya import listen\n\n\n"
+        "@listen(object)\nasync def on_message():\n    ...\n"
+    ),
+    "aliased": "import graia.saya as saya\n\nchannel = saya.Channel.current()\n",
+    "plain": (
+        "def listen(event):\n    return lambda func: func\n\n\n"
+        "@listen(object)\nasync def on_message():\n    ...\n"
+    ),
+    "broken": "def (:\n",
+}
+
+
+@pytest.fixture
+def paths(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Dict[str, Path]:
+    monkeypatch.setenv("GRAIAX_CACHE_DIR", str(tmp_path.joinpath("cache")))
+    result = {}
+    for name, source in SOURCES.items():
+        result[name] = tmp_path.joinpath(f"{name}.py")
+        result[name].write_text(source)
+    return result
+
+
+def test_detects_saya_modules(paths: Dict[str, Path]):
+    assert analyze.find_saya_modules(paths) == ["aliased", "current", "decorated"]
+
+
+def test_cache_reuse_and_pruning(paths: Dict[str, Path], monkeypatch: pytest.MonkeyPatch):
+    analyze.find_saya_modules(paths)
+    parsed = []
+    parse = analyze.is_saya_source
+    monkeypatch.setattr(analyze, "is_saya_source", lambda source: parsed.append(source) or parse(source))
+    assert analyze.find_saya_modules(paths) == ["aliased", "current", "decorated"]
+    assert parsed == []
+
+    paths["plain"].write_text(SOURCES["current"] + "# changed\n")
+    del paths["broken"]
+    assert analyze.find_saya_modules(paths) == ["aliased", "current", "decorated", "plain"]
+    assert len(parsed) == 1
+    assert len(json.loads(cache_dir("saya-modules.json").read_text())) == 4
+
+
+def test_unreadable_file_is_not_saya(paths: Dict[str, Path], tmp_path: Path):
+    paths["missing"] = tmp_path.joinpath("missing.py")
+    assert analyze.find_saya_modules(paths) == ["aliased", "current", "decorated"]
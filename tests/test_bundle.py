@@ -0,0 +1,63 @@
+"""模块包: 打包后即使删除源码, 也能从 zip 中按依赖顺序加载模块."""
+import json
+import shutil
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("graia.saya")
+
+from graiax.ignite import create_saya  # noqa: E402
+from graiax.ignite.bundle import (  # noqa: E402
+    MANIFEST_NAME,
+    BundleError,
+    build_bundle,
+    require_bundle,
+)
+
+CHANNEL = "from graia.saya import Channel\n\nchannel = Channel.current()\n"
+
+FILES = {
+    "__init__.py": "",
+    "helper.py": "VALUE = 42\n",
+    # a_plugin 依赖 z_base, 清单中的顺序应由依赖决定而不是加载列表或字母顺序
+    "a_plugin.py": "from bbot.z_base import VALUE\n" + CHANNEL,
+    "z_base.py": "from bbot.helper import VALUE\n" + CHANNEL,
+}
+
+
+@pytest.fixture
+def bundle(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    root = tmp_path.joinpath("src")
+    root.joinpath("bbot").mkdir(parents=True)
+    for name, source in FILES.items():
+        root.joinpath("bbot", name).write_text(source, encoding="utf-8")
+    output = tmp_path.joinpath("bot.zip")
+    build_bundle(["bbot.a_plugin", "bbot.z_base"], output, str(root))
+    shutil.rmtree(root)  # 只保留打包后的文件
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    yield output
+    for name in [name for name in sys.modules if name == "bbot" or name.startswith("bbot.")]:
+        del sys.modules[name]
+
+
+def test_require_from_bundle(bundle: Path):
+    saya = create_saya()
+    with saya.module_context():
+        channels = require_bundle(saya, bundle)
+    assert list(channels) == ["bbot.z_base", "bbot.a_plugin"]
+    assert sys.modules["bbot.a_plugin"].VALUE == 42
+    assert sys.modules["bbot.helper"].__file__.startswith(str(bundle))
+
+
+def test_rejects_other_interpreter(bundle: Path):
+    with zipfile.ZipFile(bundle) as zf:
+        manifest = json.loads(zf.read(MANIFEST_NAME))
+    manifest["magic"] = "00000000"
+    other = bundle.with_name("other.zip")
+    with zipfile.ZipFile(other, "w") as zf:
+        zf.writestr(MANIFEST_NAME, json.dumps(manifest))
+    with pytest.raises(BundleError):
+        require_bundle(create_saya(), other)
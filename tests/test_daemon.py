@@ -0,0 +1,84 @@
+"""后台预热进程: 停滞的连接不会阻塞其他调用, 启动脚本与 Python 客户端得到相同的结果, 无法一致执行时回退."""
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator
+
+import pytest
+
+from graiax.cli import daemon
+
+ROOT = Path(__file__).resolve().parent.parent
+
+pytestmark = pytest.mark.skipif(not daemon.supported(), reason="needs Unix socket fd passing")
+
+
+def run_graiax(env: Dict[str, str], *args: str, client: str = "") -> subprocess.CompletedProcess:
+    code = "import sys; from graiax.cli import main; sys.argv[0] = 'graiax'; main()"
+    cmd = [client] if client else [sys.executable, "-c", code]
+    return subprocess.run([*cmd, *args], env=env, capture_output=True, text=True, timeout=30)
+
+
+@pytest.fixture
+def env(tmp_path: Path) -> Iterator[Dict[str, str]]:
+    runtime = tmp_path.joinpath("run")
+    runtime.mkdir(mode=0o700)
+    env = dict(os.environ, XDG_RUNTIME_DIR=str(runtime), GRAIAX_CACHE_DIR=str(tmp_path.joinpath("cache")))
+    env["PYTHONPATH"] = str(ROOT)
+    env.pop("GRAIAX_NO_DAEMON", None)
+    assert run_graiax(env, "daemon", "start").returncode == 0
+    yield env
+    run_graiax(env, "daemon", "stop")
+
+
+def daemon_socket(env: Dict[str, str]) -> str:
+    code = "from graiax.cli.daemon import socket_path; print(socket_path())"
+    return subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def test_stalled_client_does_not_block(env: Dict[str, str]):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled:
+        stalled.connect(daemon_socket(env))  # 连接后不发送任何内容
+        start = time.monotonic()
+        result = run_graiax(env, "--help")
+        assert result.returncode == 0 and "GraiaCommunity CLI" in result.stdout
+        assert time.monotonic() - start < daemon.REQUEST_TIMEOUT + 5
+
+
+def test_client_script(env: Dict[str, str], tmp_path: Path):
+    client = str(tmp_path.joinpath("graiax"))
+    assert run_graiax(env, "daemon", "client", "-o", client).returncode == 0
+    result = run_graiax(env, "--help", client=client)
+    assert result.returncode == 0
+    assert result.stdout == run_graiax(env, "--help").stdout
+    assert run_graiax(env, "nosuchcommand", client=client).returncode == 2
+
+    fallback = dict(env, GRAIAX_NO_DAEMON="1")  # 不使用后台进程时交给完整的 graiax 执行
+    assert run_graiax(fallback, "--help", client=client).stdout == result.stdout
+
+
+def test_falls_back_when_not_equivalent(env: Dict[str, str], tmp_path: Path):
+    extra = tmp_path.joinpath("extra")
+    extra.mkdir()
+    code = "import sys; from graiax.cli.daemon import forward; print(forward(sys.argv))"
+
+    def forward(env: Dict[str, str], *args: str) -> str:
+        cmd = [sys.executable, "-c", code, *args]
+        return subprocess.run(cmd, env=env, capture_output=True, text=True, timeout=30).stdout.strip()
+
+    assert forward(env, "--version") == "2"  # 由后台进程执行, argparse 报告未知参数
+    assert forward(dict(env, PYTHONPATH=f"{extra}:{ROOT}"), "--version") == "None"
+    assert forward(dict(env, VIRTUAL_ENV=str(extra)), "--version") == "None"
+    assert forward(env, "init", "--help") == "None"  # 需要终端交互的命令不转发
+
+
+def test_client_does_not_create_runtime_dir(tmp_path: Path):
+    env = dict(os.environ, XDG_RUNTIME_DIR=str(tmp_path), PYTHONPATH=str(ROOT))
+    env.pop("GRAIAX_NO_DAEMON", None)
+    assert run_graiax(env, "--help").returncode == 0
+    assert list(tmp_path.iterdir()) == []
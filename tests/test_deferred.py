@@ -0,0 +1,75 @@
+"""延迟加载: 只在 attach 的事件触发后开始加载, 按依赖顺序加载, 加载期间事件循环仍可调度其他任务."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("graia.saya")
+
+from creart import it  # noqa: E402
+from graia.broadcast.entities.dispatcher import BaseDispatcher  # noqa: E402
+from graia.broadcast.entities.event import Dispatchable  # noqa: E402
+from graia.broadcast.interfaces.dispatcher import DispatcherInterface  # noqa: E402
+
+from graiax.ignite import create_saya  # noqa: E402
+from graiax.ignite.deferred import FAILED, LOADED, PENDING, DeferredLoader  # noqa: E402
+
+CHANNEL = "from graia.saya import Channel\n\nfrom dbot.log import LOG\n\nchannel = Channel.current()\n"
+
+FILES = {
+    "__init__.py": "",
+    "log.py": "LOG = []\n",
+    # a_user 依赖 z_base, 应在其之后加载
+    "a_user.py": CHANNEL + "from dbot.z_base import VALUE\n\nLOG.append(__name__)\n",
+    "z_base.py": CHANNEL + "VALUE = 1\nLOG.append(__name__)\n",
+    "broken.py": "raise RuntimeError('broken')\n",
+    "after_broken.py": CHANNEL + "import dbot.broken\n",
+}
+
+
+class Launched(Dispatchable):
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: DispatcherInterface):
+            pass
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    root = tmp_path.joinpath("dbot")
+    root.mkdir()
+    for name, source in FILES.items():
+        root.joinpath(name).write_text(source, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    for name in [name for name in sys.modules if name == "dbot" or name.startswith("dbot.")]:
+        del sys.modules[name]
+
+
+def test_loads_after_attach_event(project: Path):
+    saya = create_saya()
+    loader = DeferredLoader(saya, ["dbot.a_user", "dbot.z_base", "dbot.after_broken"])
+    ticks = []
+
+    async def run():
+        loader.attach(saya.broadcast, Launched)
+        assert not await loader.wait_ready(0.2)  # 事件触发前不会开始加载
+        assert loader.task is None and set(loader.states.values()) == {PENDING}
+
+        async def tick():
+            while not loader.ready:
+                ticks.append(loader.status()[LOADED])
+                await asyncio.sleep(0)
+
+        ticker = asyncio.get_running_loop().create_task(tick())
+        saya.broadcast.postEvent(Launched())
+        assert await loader.wait_ready(10)
+        await ticker
+
+    with saya.module_context():
+        it(asyncio.AbstractEventLoop).run_until_complete(run())
+    assert sys.modules["dbot.log"].LOG == ["dbot.z_base", "dbot.a_user"]
+    assert loader.states == {"dbot.z_base": LOADED, "dbot.a_user": LOADED, "dbot.after_broken": FAILED}
+    assert isinstance(loader.errors["dbot.after_broken"], RuntimeError)
+    assert 1 in ticks  # 两个模块之间让出了事件循环
@@ -0,0 +1,71 @@
+"""环境仓库: 存入时去掉项目自身的安装, 原环境保持不变; 取出时替换已有的虚拟环境."""
+import json
+from pathlib import Path
+
+import pytest
+
+from graiax.cli import envstore
+
+
+@pytest.fixture
+def venv(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("GRAIAX_CACHE_DIR", str(tmp_path.joinpath("cache")))
+    project = tmp_path.joinpath("bot1")
+    project.mkdir()
+    venv = tmp_path.joinpath("venv")
+    site = venv.joinpath("lib", "python3.11", "site-packages")
+    site.mkdir(parents=True)
+    venv.joinpath("bin").mkdir()
+    venv.joinpath("pyvenv.cfg").write_text("home = /usr/bin\n")
+    venv.joinpath("bin", "bot1").write_text(f"#!{venv}/bin/python\n")
+    site.joinpath("_bot1.pth").write_text(f"{project}\n")
+    dist_info = site.joinpath("bot1-0.1.0.dist-info")
+    dist_info.mkdir()
+    dist_info.joinpath("direct_url.json").write_text(
+        json.dumps({"url": project.as_uri(), "dir_info": {"editable": True}})
+    )
+    dist_info.joinpath("RECORD").write_text(
+        "../../../bin/bot1,,\n_bot1.pth,,\nbot1-0.1.0.dist-info/RECORD,,\n"
+    )
+    site.joinpath("dep.py").write_text("")
+    site.joinpath("dep-1.0.dist-info").mkdir()
+    return venv
+
+
+def test_store_drops_root_project(venv: Path):
+    project = venv.parent.joinpath("bot1")
+    before = sorted(venv.rglob("*"))
+    env = envstore.store("0123456789abcdef", "pdm", venv, "3.11", project)
+    assert env is not None
+    stored = {str(p.relative_to(env.venv)) for p in env.venv.rglob("*")}
+    assert not any("bot1" in name for name in stored)
+    assert "lib/python3.11/site-packages/dep.py" in stored
+    assert sorted(venv.rglob("*")) == before
+
+    target = venv.parent.joinpath("bot2", ".venv")
+    env.provision(target)
+    assert not target.joinpath("bin", "bot1").exists()
+
+
+def test_provision_replaces_existing_venv(venv: Path):
+    env = envstore.store("0123456789abcdef", "pdm", venv, "3.11")
+    target = venv.parent.joinpath("bot2", ".venv")
+    target.joinpath("lib").mkdir(parents=True)
+    target.joinpath("pyvenv.cfg").write_text("home = /usr/bin\n")
+    target.joinpath("lib", "stale.py").write_text("")
+    env.provision(target)
+    assert not target.joinpath("lib", "stale.py").exists()
+    assert target.joinpath("lib", "python3.11", "site-packages", "dep.py").exists()
+
+    other = venv.parent.joinpath("bot3", ".venv")
+    other.mkdir(parents=True)
+    other.joinpath("data.txt").write_text("")
+    with pytest.raises(FileExistsError):
+        env.provision(other)
+    assert other.joinpath("data.txt").exists()
+
+
+def test_digest_uses_project_python(tmp_path: Path):
+    lock_file = tmp_path.joinpath("pdm.lock")
+    lock_file.write_text("")
+    assert envstore.env_digest("pdm", lock_file, "3.11") != envstore.env_digest("pdm", lock_file, "3.12")
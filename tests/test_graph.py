@@ -0,0 +1,93 @@
+"""加载列表依赖图: 只有模块加载时执行的导入才算依赖, 循环导入回退到加载列表顺序,
+没有 `sys.stdlib_module_names` 时按模块位置识别标准库."""
+import sys
+from pathlib import Path
+
+import pytest
+
+from graiax.ignite import graph as graph_module
+from graiax.ignite.graph import (
+    ImportCycleError,
+    ImportCycleWarning,
+    build_graph,
+    parse_imports,
+    topological_order,
+)
+
+
+def make_package(root: Path, modules: dict) -> str:
+    root.joinpath("bot").mkdir()
+    root.joinpath("bot", "__init__.py").touch()
+    for name, source in modules.items():
+        root.joinpath("bot", f"{name}.py").write_text(source, encoding="utf-8")
+    return str(root)
+
+
+def test_load_time_imports_only():
+    source = """
+import a
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    import b
+else:
+    import c
+try:
+    import d
+except ImportError:
+    import e
+class K:
+    import f
+def func():
+    import g
+async def coro():
+    import h
+"""
+    assert parse_imports(source, "bot.x", False) == {
+        "a",
+        "typing",
+        "typing.TYPE_CHECKING",
+        "c",
+        "d",
+        "e",
+        "f",
+    }
+
+
+def test_type_checking_import_is_not_a_cycle(tmp_path: Path):
+    root = make_package(
+        tmp_path,
+        {
+            "a": "from typing import TYPE_CHECKING\nif TYPE_CHECKING:\n    from bot.b import X\n",
+            "b": "import bot.a\nX = 1\n",
+        },
+    )
+    graph = build_graph(["bot.b", "bot.a"], [root])
+    assert graph["bot.a"].depends == set()
+    assert topological_order(graph, strict=True) == ["bot.a", "bot.b"]
+
+
+def test_cycle_falls_back_to_load_list_order(tmp_path: Path):
+    root = make_package(tmp_path, {"a": "import bot.b\n", "b": "import bot.a\n", "c": "import bot.a\n"})
+    graph = build_graph(["bot.c", "bot.b", "bot.a"], [root])
+    with pytest.warns(ImportCycleWarning):
+        assert topological_order(graph) == ["bot.b", "bot.a", "bot.c"]
+    with pytest.raises(ImportCycleError):
+        topological_order(graph, strict=True)
+
+
+@pytest.fixture
+def legacy_stdlib(monkeypatch: pytest.MonkeyPatch):
+    """模拟 3.8 / 3.9: 只有内置模块名可用"""
+    if hasattr(sys, "stdlib_module_names"):
+        monkeypatch.delattr(sys, "stdlib_module_names")
+    monkeypatch.setattr(graph_module, "STDLIB_MODULES", frozenset(sys.builtin_module_names))
+    graph_module.is_stdlib.cache_clear()
+    yield
+    graph_module.is_stdlib.cache_clear()
+
+
+def test_stdlib_without_module_names(tmp_path: Path, legacy_stdlib):
+    root = make_package(
+        tmp_path, {"a": "import json\nimport asyncio.events\nimport os.path\nimport pytest\n"}
+    )
+    assert build_graph(["bot.a"], [root])["bot.a"].external == {"pytest"}
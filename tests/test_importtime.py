@@ -0,0 +1,67 @@
+"""导入耗时归属: 按标记切分 importtime 输出, 拆分为项目代码, 标准库与第三方包的耗时."""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from graiax.cli.importtime import (
+    MARKER,
+    STARTUP,
+    attribute,
+    parse_trace,
+    shared_packages,
+    trace_modules,
+)
+
+TRACE = [
+    "import time: self [us] | cumulative | imported package",
+    "import time:       100 |        100 | site",
+    f"{MARKER} begin bot.a",
+    "import time:        50 |         50 |     json.decoder",
+    "import time:        20 |         70 |   json",
+    "import time:        30 |        100 | bot.helper",
+    "import time:       400 |        400 |     yarl._url",
+    "import time:       100 |        500 |   yarl",
+    "import time:       200 |        700 | aiohttp",
+    f"{MARKER} end bot.a 1000",
+    f"{MARKER} begin bot.b",
+    f'{MARKER} fail bot.b 30 {json.dumps("ImportError: missing")}',
+]
+
+
+def test_parse_trace():
+    startup, a, b = parse_trace(TRACE)
+    assert startup.module == STARTUP and [node.name for node in startup.roots] == ["site"]
+    assert a.module == "bot.a" and [node.name for node in a.roots] == ["bot.helper", "aiohttp"]
+    helper = a.roots[0]
+    assert [child.name for child in helper.children] == ["json"]
+    assert [child.name for child in helper.children[0].children] == ["json.decoder"]
+    assert a.elapsed == 1000 and a.cumulative == 800 and a.untraced == 200
+    assert b.error == "ImportError: missing" and not b.roots
+
+
+def test_attribute_and_shared_packages():
+    _, a, b = parse_trace(TRACE)
+    cost = attribute(a, {"bot"})
+    assert (cost.total, cost.own, cost.stdlib) == (1000, 200 + 30, 70)  # 未被追踪的部分计入模块自身
+    assert cost.third_party == {"aiohttp": 700}  # yarl 由 aiohttp 导入, 计入 aiohttp
+    packages = shared_packages([cost, attribute(b, {"bot"})], {"bot.a": set(), "bot.b": {"aiohttp.web"}})
+    assert [(p.package, p.cost, p.paid_by, p.used_by) for p in packages] == [
+        ("aiohttp", 700, "bot.a", ["bot.a", "bot.b"])
+    ]
+
+
+def test_trace_modules(tmp_path: Path):
+    pytest.importorskip("graia.saya")
+    tmp_path.joinpath("tbot").mkdir()
+    tmp_path.joinpath("tbot", "__init__.py").write_text("")
+    tmp_path.joinpath("tbot", "plugin.py").write_text(
+        "import colorsys\n\nfrom graia.saya import Channel\n\nchannel = Channel.current()\n"
+    )
+    code, segments, stderr = trace_modules(["tbot.plugin"], str(tmp_path), sys.executable)
+    assert code == 0, stderr
+    segment = segments[-1]
+    assert segment.module == "tbot.plugin" and segment.error is None
+    cost = attribute(segment, {"tbot"})
+    assert "colorsys" not in cost.third_party and cost.stdlib > 0
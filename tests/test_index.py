@@ -0,0 +1,70 @@
+"""模块索引: 按目录 mtime 增量更新, 排除规则遵循 gitignore 的通配符语义."""
+import os
+from pathlib import Path
+
+import pytest
+
+from graiax.cli.index import ExcludeRules, ModuleIndex
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("GRAIAX_CACHE_DIR", str(tmp_path.joinpath("cache")))
+    root = tmp_path.joinpath("bot")
+    for path in [
+        "modules/__init__.py",
+        "modules/ping.py",
+        "modules/admin/__init__.py",
+        "modules/admin/ban.py",
+    ]:
+        root.joinpath(path).parent.mkdir(parents=True, exist_ok=True)
+        root.joinpath(path).write_text("")
+    return root
+
+
+def test_refresh_rescans_changed_dirs(project: Path, monkeypatch: pytest.MonkeyPatch):
+    ModuleIndex.load(project, ExcludeRules([])).refresh().save()
+    index = ModuleIndex.load(project, ExcludeRules([]))
+    assert not index.changed
+
+    scanned = []
+    scan_dir = ModuleIndex.scan_dir
+    monkeypatch.setattr(
+        ModuleIndex, "scan_dir", lambda self, rel, *args: scanned.append(rel) or scan_dir(self, rel, *args)
+    )
+    assert index.refresh().modules() == ["modules", "modules.admin", "modules.admin.ban", "modules.ping"]
+    assert scanned == [] and not index.changed
+
+    admin = project.joinpath("modules", "admin")
+    admin.joinpath("kick.py").write_text("")
+    stat = admin.stat()
+    os.utime(admin, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))  # 文件系统的 mtime 精度可能不足
+    assert "modules.admin.kick" in index.refresh().modules()
+    assert scanned == ["modules/admin"] and index.changed
+
+
+@pytest.mark.parametrize(
+    "pattern, path, is_dir, excluded",
+    [
+        ("ping.py", "modules/ping.py", False, True),
+        ("modules/*.py", "modules/ping.py", False, True),
+        ("modules/*.py", "modules/admin/ban.py", False, False),  # `*` 不匹配 `/`
+        ("**/ban.py", "ban.py", False, True),  # `**/` 可以匹配零层目录
+        ("**/ban.py", "modules/admin/ban.py", False, True),
+        ("modules/**/ban.py", "modules/ban.py", False, True),
+        ("/ping.py", "modules/ping.py", False, False),
+        ("admin/", "modules/admin", True, True),
+        ("admin/", "admin", False, False),
+        ("modules/**", "modules/admin", True, True),
+        ("p?ng.py", "modules/ping.py", False, True),
+        ("[!p]ing.py", "modules/ping.py", False, False),
+    ],
+)
+def test_exclude_rules(pattern: str, path: str, is_dir: bool, excluded: bool):
+    assert ExcludeRules([pattern]).excluded(path, is_dir) is excluded
+
+
+def test_negated_rules(project: Path):
+    rules = ExcludeRules(["*.py", "!ping.py"])
+    index = ModuleIndex(project, rules).refresh()
+    assert index.modules() == ["modules", "modules.admin", "modules.ping"]
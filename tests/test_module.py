@@ -0,0 +1,54 @@
+"""模块检查: 每个模块在独立的进程中导入, 失败, 崩溃与超时互不影响."""
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("graia.saya")
+
+from graiax.cli.command.module import check_modules  # noqa: E402
+
+FILES = {
+    "__init__.py": "",
+    "good.py": """\
+from graia.saya import Channel
+
+channel = Channel.current()
+""",
+    "plain.py": "VALUE = 1\n",
+    "broken.py": "raise RuntimeError('boom')\n",
+    "crash.py": "import os\nos._exit(3)\n",
+    "hang.py": "import time\ntime.sleep(60)\n",
+    # 导入时修改全局状态, 在同一进程中检查会影响之后的模块
+    "polluter.py": "import sys\nsys.modules['cbot.plain'] = None\n",
+}
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    root = tmp_path.joinpath("cbot")
+    root.mkdir()
+    for name, source in FILES.items():
+        root.joinpath(name).write_text(source, encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_results_are_isolated(project: Path):
+    modules = ["cbot.polluter", "cbot.good", "cbot.broken", "cbot.crash", "cbot.plain"]
+    results = check_modules(modules, 1, 30)
+    assert set(results) == set(modules)
+    assert results["cbot.good"]["ok"] and results["cbot.good"]["channel"]
+    assert results["cbot.plain"]["ok"] and not results["cbot.plain"]["channel"]
+    assert results["cbot.polluter"]["ok"]
+    assert not results["cbot.broken"]["ok"]
+    assert results["cbot.broken"]["error"] == "RuntimeError: boom"
+    assert not results["cbot.crash"]["ok"] and "(3)" in results["cbot.crash"]["error"]
+
+
+def test_timeout_kills_only_the_stuck_module(project: Path):
+    start = time.monotonic()
+    results = check_modules(["cbot.hang", "cbot.good"], 2, 2)
+    assert time.monotonic() - start < 30
+    assert not results["cbot.hang"]["ok"] and results["cbot.hang"]["time"] == 2
+    assert results["cbot.good"]["ok"]
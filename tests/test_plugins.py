@@ -0,0 +1,58 @@
+"""入口点插件: 读取所属包的说明, 并在命令所在的类中查找 `_init`."""
+import sys
+from pathlib import Path
+
+import pytest
+
+from graiax.cli import plugins
+
+SOURCE = '''\
+class Tool:
+    @staticmethod
+    def run(args):
+        """run the tool"""
+        CALLS.append(args.level)
+
+    @staticmethod
+    def run_init(parser):
+        parser.add_argument("--level", type=int, default=0)
+
+
+def run(args):
+    raise AssertionError("module-level run must not be used")
+
+
+CALLS = []
+'''
+
+
+@pytest.fixture
+def installed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    tmp_path.joinpath("gxplug.py").write_text(SOURCE, encoding="utf-8")
+    dist_info = tmp_path.joinpath("gxplug-1.0.dist-info")
+    dist_info.mkdir()
+    dist_info.joinpath("METADATA").write_text(
+        "Metadata-Version: 2.1\nName: gxplug\nVersion: 1.0\nSummary: Example graiax plugin\n"
+    )
+    dist_info.joinpath("entry_points.txt").write_text(
+        f"[{plugins.ENTRY_POINT_GROUP}]\ngxtool = gxplug:Tool.run\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    sys.modules.pop("gxplug", None)
+
+
+def test_scan_reads_distribution_metadata(installed: Path):
+    found = {spec["name"]: spec for spec in plugins.scan_entry_points()}
+    assert found["gxtool"] == {
+        "name": "gxtool",
+        "ref": "gxplug:Tool.run",
+        "help": "Example graiax plugin",
+        "dist": "gxplug",
+    }
+
+
+def test_run_plugin_uses_init_next_to_method(installed: Path):
+    spec = {spec["name"]: spec for spec in plugins.scan_entry_points()}["gxtool"]
+    plugins.run_plugin(spec, ["--level", "3"])
+    assert sys.modules["gxplug"].CALLS == [3]
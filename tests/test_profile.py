@@ -0,0 +1,48 @@
+"""加载分析: 不使用 tracemalloc 时仍按 RSS 统计内存并检查预算."""
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("graia.saya")
+
+from graiax.ignite import create_saya, require_modules  # noqa: E402
+from graiax.ignite.profile import (  # noqa: E402
+    LoadProfiler,
+    MemoryBudget,
+    MemoryBudgetExceeded,
+    current_rss,
+)
+
+pytestmark = pytest.mark.skipif(current_rss() is None, reason="RSS is only available on Linux")
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    root = tmp_path.joinpath("pbot")
+    root.mkdir()
+    root.joinpath("__init__.py").write_text("")
+    # 写入每一页, 使其计入 RSS
+    root.joinpath("heavy.py").write_text("DATA = bytearray(b'x' * (64 * 1024 * 1024))\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    for name in [name for name in sys.modules if name == "pbot" or name.startswith("pbot.")]:
+        del sys.modules[name]
+
+
+def test_rss_without_tracemalloc(project: Path):
+    saya = create_saya()
+    profiler = LoadProfiler(trace_memory=False)
+    with saya.module_context():
+        require_modules(saya, ["pbot.heavy"], profiler=profiler)
+    record = profiler.records["pbot.heavy"]
+    assert record.memory is None
+    assert record.rss is not None and record.retained > 32 * 1024 * 1024
+
+
+def test_budget_without_tracemalloc(project: Path):
+    saya = create_saya()
+    profiler = LoadProfiler(trace_memory=False)
+    budget = MemoryBudget(default=16 * 1024 * 1024, on_exceed="error")
+    with saya.module_context(), pytest.raises(MemoryBudgetExceeded):
+        require_modules(saya, ["pbot.heavy"], profiler=profiler, budget=budget)
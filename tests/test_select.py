@@ -0,0 +1,83 @@
+"""选择提示: 只渲染可见的窗口, 未变化时复用已渲染的内容; 输入字符筛选选项, 已选择的选项不受筛选影响."""
+from typing import List
+
+import pytest
+
+pytest.importorskip("prompt_toolkit")
+
+from prompt_toolkit.application import create_app_session  # noqa: E402
+from prompt_toolkit.input import create_pipe_input  # noqa: E402
+from prompt_toolkit.output import DummyOutput  # noqa: E402
+
+from graiax.cli.prompt import Choice  # noqa: E402
+from graiax.cli.prompt.search import ChoiceFilter  # noqa: E402
+from graiax.cli.prompt.select import SelectPrompt  # noqa: E402
+
+
+def make_prompt(count: int, height: int = 10) -> SelectPrompt:
+    prompt = SelectPrompt("modules", [Choice(f"module{i}", i) for i in range(count)])
+    prompt.height = height
+    return prompt
+
+
+def rendered(prompt: SelectPrompt) -> List[str]:
+    return [text.strip() for style, text in prompt.make_choice_prompt() if "option_" in style]
+
+
+def test_renders_visible_window_only():
+    prompt = make_prompt(10000)
+    assert rendered(prompt) == [f"module{i}" for i in range(9)]
+    for _ in range(12):
+        prompt.move_down()
+    assert rendered(prompt)[-2] == "module12"
+    prompt.move_up()
+    prompt.jump(0)
+    prompt.move_up()  # 回绕到最后一项
+    assert rendered(prompt)[-1] == "module9999"
+
+
+def test_window_is_reused_until_changed():
+    prompt = make_prompt(100)
+    first = prompt.make_choice_prompt()
+    assert prompt.make_choice_prompt() is first
+    prompt.toggle(1)
+    second = prompt.make_choice_prompt()
+    assert second is not first
+    assert ("class:option_selected", "module1\n") in second
+    prompt.toggle(1)
+    assert (
+        prompt.get_result() == []
+        and ("class:option_selected", "module1\n") not in prompt.make_choice_prompt()
+    )
+
+
+def test_filter_ranking_and_backspace():
+    names = ["graia-ariadne", "graiax-ignite", "ariadne-util", "black"]
+    search = ChoiceFilter(names)
+    assert search.match("ariadne") == [2, 0]  # 子串匹配, 匹配位置靠前的优先
+    assert search.match("gra") == [0, 1]
+    assert search.match("gign") == [1]  # 子序列匹配
+    assert search.match("g") == [0, 1]  # 删除字符时回退到之前的结果
+    assert search.match("ia") == [2, 0, 1]
+    assert search.match("") == [0, 1, 2, 3]
+    assert search.match("xyz") == []
+
+
+def test_selection_survives_filtering():
+    prompt = SelectPrompt("modules", [Choice(name) for name in ["alpha", "beta", "gamma", "delta"]])
+    prompt.set_query("ta")
+    assert [prompt.choices[i].name for i in prompt.view] == ["beta", "delta"]
+    prompt.toggle(prompt.view[1])
+    prompt.set_query("")
+    assert [choice.name for choice in prompt.get_result()] == ["delta"]
+
+
+def test_type_to_filter_keys():
+    prompt = SelectPrompt("modules", [Choice(name, name) for name in ["alpha", "beta", "gamma", "delta"]])
+    with create_pipe_input() as pipe, create_app_session(input=pipe, output=DummyOutput()):
+        pipe.send_text("gm ")  # 筛选出 gamma 并选择
+        pipe.send_text("\x7f\x7f")  # 退格清空筛选
+        pipe.send_text("\x1b[B ")  # 下移到 beta 并选择
+        pipe.send_text("\r")
+        result = prompt.prompt()
+    assert [choice.data for choice in result] == ["gamma", "beta"]
@@ -0,0 +1,135 @@
+"""分片: 分组内按依赖顺序加载, 并用本地的替身事件源驱动工作进程."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("graia.saya")
+
+from creart import it  # noqa: E402
+from graia.broadcast import Broadcast  # noqa: E402
+
+from graiax.ignite.shard import ShardManager, partition_modules  # noqa: E402
+
+FILES = {
+    "__init__.py": "",
+    "events.py": """\
+from graia.broadcast.entities.dispatcher import BaseDispatcher
+from graia.broadcast.entities.event import Dispatchable
+from graia.broadcast.interfaces.dispatcher import DispatcherInterface
+
+
+class Ping(Dispatchable):
+    def __init__(self, value):
+        self.value = value
+
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: DispatcherInterface):
+            if interface.name == "value":
+                return interface.event.value
+""",
+    # a_user 依赖 z_base, 按字母顺序会先加载 a_user, z_base 的监听器因此被归入 a_user 的 channel
+    "z_base.py": """\
+from graia.saya import Channel
+from graia.saya.builtins.broadcast.schema import ListenerSchema
+
+from graiax.ignite.shard import remote
+from sbot.events import Ping
+
+channel = Channel.current()
+FACTOR = 2
+
+
+@channel.use(ListenerSchema(listening_events=[Ping]))
+async def on_ping(value: int):
+    await remote("sink").record(channel.module, value)
+""",
+    "a_user.py": """\
+from graia.saya import Channel
+from graia.saya.builtins.broadcast.schema import ListenerSchema
+
+from graiax.ignite.shard import remote
+from sbot.events import Ping
+from sbot.z_base import FACTOR
+
+channel = Channel.current()
+
+
+@channel.use(ListenerSchema(listening_events=[Ping]))
+async def on_ping(value: int):
+    await remote("sink").record(channel.module, value * FACTOR)
+""",
+    "other.py": """\
+from graia.saya import Channel
+from graia.saya.builtins.broadcast.schema import ListenerSchema
+
+from graiax.ignite.shard import remote
+from sbot.events import Ping
+
+channel = Channel.current()
+
+
+@channel.use(ListenerSchema(listening_events=[Ping]))
+async def on_ping(value: int):
+    await remote("sink").record(channel.module, -value)
+""",
+}
+
+
+class Sink:
+    """主进程中暴露给工作进程的对象, 收集各模块处理事件的结果"""
+
+    def __init__(self, expected: int):
+        self.records = []
+        self.expected = expected
+        self.done = asyncio.Event()
+
+    async def record(self, module: str, value: int) -> None:
+        self.records.append((module, value))
+        if len(self.records) >= self.expected:
+            self.done.set()
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    root = tmp_path.joinpath("sbot")
+    root.mkdir()
+    for name, source in FILES.items():
+        root.joinpath(name).write_text(source, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))  # spawn 的工作进程会继承 sys.path
+    yield tmp_path
+    for name in [name for name in sys.modules if name == "sbot" or name.startswith("sbot.")]:
+        del sys.modules[name]
+
+
+def test_partition_orders_dependencies_first(project: Path):
+    shards = partition_modules(["sbot.a_user", "sbot.z_base", "sbot.other"], 2)
+    assert shards == [["sbot.z_base", "sbot.a_user"], ["sbot.other"]]
+
+
+def test_shards_handle_local_events(project: Path):
+    from sbot.events import Ping
+
+    async def run():
+        broadcast = Broadcast()
+        shards = partition_modules(["sbot.a_user", "sbot.z_base", "sbot.other"], 2)
+        manager = ShardManager(broadcast, {str(i): modules for i, modules in enumerate(shards)})
+        sink = Sink(expected=3)
+        manager.expose("sink", sink)
+        manager.forward(Ping)
+        try:
+            states = await manager.start(timeout=30)
+            assert states == {
+                "0": {"sbot.z_base": None, "sbot.a_user": None},
+                "1": {"sbot.other": None},
+            }
+            broadcast.postEvent(Ping(21))  # 替身事件源: 直接在主进程的 Broadcast 上投递事件
+            await asyncio.wait_for(sink.done.wait(), 30)
+        finally:
+            await manager.stop()
+        return sorted(sink.records)
+
+    loop = it(asyncio.AbstractEventLoop)  # 与 Broadcast 使用同一个事件循环, 不关闭以免影响之后的测试
+    assert loop.run_until_complete(run()) == [("sbot.a_user", 42), ("sbot.other", -21), ("sbot.z_base", 21)]
@@ -0,0 +1,95 @@
+"""`graiax --help` 的启动开销: 只允许导入有限数量的模块, 不得导入子命令的重依赖.
+无法记录参数定义的子命令改为在启动时导入, 不影响其他命令."""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import types
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from graiax.cli import command
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, sys
+baseline = set(sys.modules)
+sys.argv = ["graiax", "--help"]
+from graiax.cli import main
+try:
+    main()
+except SystemExit:
+    pass
+sys.stderr.write(json.dumps(sorted(set(sys.modules) - baseline)))
+"""
+
+# 第三方依赖在任何情况下都只应在执行子命令时导入
+HEAVY = ["tomlkit", "prompt_toolkit", "graia"]
+
+# 相对空解释器新增的模块数上限, 留出不同 Python 版本标准库的差异
+COLD_BUDGET = 250  # 需要导入全部子命令模块以生成清单, 并扫描入口点
+WARM_BUDGET = 80  # 只读取缓存的清单与插件索引
+
+
+def new_modules(tmp_path: Path) -> List[str]:
+    cache, cwd = tmp_path.joinpath("cache"), tmp_path.joinpath("cwd")
+    cwd.mkdir(exist_ok=True)
+    env = dict(os.environ, GRAIAX_CACHE_DIR=str(cache), GRAIAX_NO_DAEMON="1", PYTHONPATH=str(ROOT))
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, cwd=cwd, capture_output=True, text=True, check=True
+    )
+    assert "GraiaCommunity CLI" in proc.stdout
+    return json.loads(proc.stderr.splitlines()[-1])
+
+
+def imported(modules: List[str], packages: List[str]) -> List[str]:
+    return [mod for mod in modules if any(mod == pkg or mod.startswith(f"{pkg}.") for pkg in packages)]
+
+
+def test_help_cold(tmp_path: Path):
+    modules = new_modules(tmp_path)
+    assert not imported(modules, HEAVY)
+    assert len(modules) <= COLD_BUDGET, f"--help imported {len(modules)} modules"
+
+
+def test_help_warm(tmp_path: Path):
+    new_modules(tmp_path)  # 生成命令清单与插件索引缓存
+    modules = new_modules(tmp_path)
+    lazy = HEAVY + ["graiax.cli.command.init", "importlib.metadata", "asyncio", "multiprocessing"]
+    assert not imported(modules, lazy)
+    assert not [mod for mod in modules if mod.startswith("graiax.cli.command.")]
+    assert len(modules) <= WARM_BUDGET, f"--help imported {len(modules)} modules: {modules}"
+
+
+def test_unrecordable_arguments(monkeypatch: pytest.MonkeyPatch):
+    def exclusive_init(parser):
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument("--fast", action="store_true")
+        group.add_argument("--slow", action="store_true")
+
+    def output_init(parser):
+        parser.add_argument("--output", type=Path, default=Path("out"))
+
+    for name, init in [("exclusive", exclusive_init), ("output", output_init)]:
+        module = types.ModuleType(f"{command.__name__}.{name}")
+        setattr(module, name, lambda args: None)
+        setattr(module, f"{name}_init", init)
+        monkeypatch.setitem(sys.modules, module.__name__, module)
+    monkeypatch.setattr(command, "commands", ["exclusive", "output"])
+
+    manifest = command.build_manifest()
+    assert [spec["arguments"] for spec in manifest] == [None, None]
+    json.dumps(manifest)
+
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers()
+    for spec in manifest:
+        command.init_parser(spec, sub.add_parser(spec["name"]))
+    assert parser.parse_args(["exclusive", "--fast"]).fast
+    assert parser.parse_args(["output"]).output == Path("out")
+    with pytest.raises(SystemExit):
+        parser.parse_args(["exclusive", "--fast", "--slow"])
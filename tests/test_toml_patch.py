@@ -0,0 +1,72 @@
+"""局部修改 [tool.graiax].load: 只改写 load 数组, 其余内容逐字节保留, 无法确定结构时回退为完整解析."""
+from typing import List
+
+import pytest
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+
+from graiax.cli.toml_patch import inject_load
+
+HEAD = '[project]\nname = "bot"  # [tool.graiax]\ndependencies = [\n    "graia-ariadne",  # load = []\n]\n\n'
+
+
+def load(text: str) -> List[str]:
+    return tomllib.loads(text)["tool"]["graiax"]["load"]
+
+
+def test_multiline_array_with_comments():
+    text = HEAD + '[tool.graiax]\nload = [\n    "modules.a",  # 第一个模块\n    # "modules.old",\n]\n'
+    text += "\n[tool.other]\nx = 1\n"
+    patched, local = inject_load(text, ["modules.b", "modules.a"])
+    assert local
+    assert load(patched) == ["modules.a", "modules.b"]
+    assert patched.startswith(HEAD) and patched.endswith("\n]\n\n[tool.other]\nx = 1\n")
+    assert '# "modules.old",' in patched and "# 第一个模块" in patched
+
+
+def test_inline_array():
+    text = HEAD + '[tool.graiax]\nload = ["modules.a"]  # 已有注释\n'
+    patched, local = inject_load(text, ["modules.b"], "modules which will be loaded by graia-saya")
+    assert local
+    assert patched == HEAD + '[tool.graiax]\nload = ["modules.a", "modules.b"]  # 已有注释\n'
+
+
+def test_inline_array_without_trailing_comma():
+    text = '[tool.graiax]\nload = [\n    "modules.a"\n]\n'
+    patched, local = inject_load(text, ["modules.b"])
+    assert local and load(patched) == ["modules.a", "modules.b"]
+
+
+def test_missing_table():
+    patched, local = inject_load(HEAD.rstrip("\n") + "\n", ["modules.a"], "comment")
+    assert local
+    assert patched.startswith(HEAD.rstrip("\n") + "\n\n[tool.graiax]\n")
+    assert load(patched) == ["modules.a"]
+
+    text = HEAD + "[tool.graiax]\nother = true\n"
+    patched, local = inject_load(text, ["modules.a"])
+    assert local and load(patched) == ["modules.a"] and tomllib.loads(patched)["tool"]["graiax"]["other"]
+
+
+def test_crlf_is_preserved():
+    text = (HEAD + '[tool.graiax]\nload = [\n    "modules.a",\n]\n').replace("\n", "\r\n")
+    patched, local = inject_load(text, ["modules.b"])
+    assert local
+    assert "\n" not in patched.replace("\r\n", "")
+    assert load(patched) == ["modules.a", "modules.b"]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        'tool.graiax.load = ["modules.a"]\n',  # 点号键
+        '[tool]\ngraiax = { load = ["modules.a"] }\n',  # 内联表
+    ],
+)
+def test_ambiguous_layout_falls_back(text: str):
+    patched, local = inject_load(text, ["modules.b"])
+    assert not local
+    assert load(patched) == ["modules.a", "modules.b"]
@@ -0,0 +1,92 @@
+"""热重载: 变更的文件映射到受影响的模块, 包括经由辅助模块的间接导入,
+重载后新导入的辅助模块同样会被跟踪."""
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("watchgod")
+pytest.importorskip("graia.saya")
+
+from graiax.ignite import create_saya, require_modules  # noqa: E402
+from graiax.ignite.watch import ModuleReloader  # noqa: E402
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    root = tmp_path.joinpath("bot")
+    root.joinpath("wbot").mkdir(parents=True)
+    files = {
+        "__init__.py": "",
+        "helper2.py": "VALUE = 1\n",
+        "helper1.py": "from wbot.helper2 import VALUE\n",
+        "plugin.py": "from wbot.helper1 import VALUE\n",
+        "other.py": "X = 1\n",
+    }
+    for name, source in files.items():
+        root.joinpath("wbot", name).write_text(source, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(root))
+    yield root
+    for name in [name for name in sys.modules if name == "wbot" or name.startswith("wbot.")]:
+        del sys.modules[name]
+
+
+def test_reload_through_helper_chain(project: Path):
+    saya = create_saya()
+    modules = ["wbot.plugin", "wbot.other"]
+    with saya.module_context():
+        require_modules(saya, modules)
+        reloader = ModuleReloader(saya, modules, root=str(project))
+        project.joinpath("wbot", "helper2.py").write_text("VALUE = 2\n", encoding="utf-8")
+        assert reloader.reload([str(project.joinpath("wbot", "helper2.py"))]) == ["wbot.plugin"]
+    assert sys.modules["wbot.plugin"].VALUE == 2
+
+
+def test_ignores_files_outside_root(project: Path):
+    sibling = project.parent.joinpath("bot2")
+    sibling.mkdir()
+    reloader = ModuleReloader(create_saya(), ["wbot.plugin"], root=str(project))
+    assert not reloader.in_root(str(sibling.joinpath("wbot", "plugin.py")))
+    assert reloader.in_root(str(project.joinpath("wbot", "plugin.py")))
+
+
+def test_failed_module_does_not_stop_batch(project: Path):
+    saya = create_saya()
+    modules = ["wbot.plugin", "wbot.other"]
+    with saya.module_context():
+        require_modules(saya, modules)
+        reloader = ModuleReloader(saya, modules, root=str(project))
+        project.joinpath("wbot", "plugin.py").write_text("raise RuntimeError('broken')\n", encoding="utf-8")
+        project.joinpath("wbot", "other.py").write_text("X = 2\n", encoding="utf-8")
+        files = [str(project.joinpath("wbot", name)) for name in ("plugin.py", "other.py")]
+        assert reloader.reload(files) == ["wbot.other"]
+    assert "wbot.other" in saya.channels
+    assert sys.modules["wbot.other"].X == 2
+
+
+def test_tracks_helpers_imported_after_reload(project: Path):
+    saya = create_saya()
+    modules = ["wbot.plugin", "wbot.other"]
+    with saya.module_context():
+        require_modules(saya, modules)
+        reloader = ModuleReloader(saya, modules, root=str(project))
+        helper3 = project.joinpath("wbot", "helper3.py")
+        helper3.write_text("VALUE = 3\n", encoding="utf-8")
+        plugin = project.joinpath("wbot", "plugin.py")
+        plugin.write_text("from wbot.helper3 import VALUE\n", encoding="utf-8")
+        assert reloader.reload([str(plugin)]) == ["wbot.plugin"]
+        helper3.write_text("VALUE = 4\n", encoding="utf-8")
+        assert reloader.reload([str(helper3)]) == ["wbot.plugin"]
+    assert sys.modules["wbot.plugin"].VALUE == 4
+    assert reloader.imported_by["wbot.helper3"] == {"wbot.plugin"}
+
+
+def test_forget_removes_parent_attribute(project: Path):
+    import wbot.helper2
+
+    old = wbot.helper2
+    ModuleReloader.forget("wbot.helper2")
+    assert not hasattr(sys.modules["wbot"], "helper2")
+    from wbot import helper2
+
+    assert helper2 is not old
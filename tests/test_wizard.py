@@ -0,0 +1,47 @@
+"""向导: 多次提问复用同一个 Application 与已缓存的样式, 两次提问之间的按键被忽略."""
+import asyncio
+
+import pytest
+
+pytest.importorskip("prompt_toolkit")
+
+from prompt_toolkit.application import create_app_session  # noqa: E402
+from prompt_toolkit.input import create_pipe_input  # noqa: E402
+from prompt_toolkit.output import DummyOutput  # noqa: E402
+
+from graiax.cli.prompt.boolean import BooleanPrompt  # noqa: E402
+from graiax.cli.prompt.text import TextPrompt  # noqa: E402
+from graiax.cli.prompt.wizard import Wizard  # noqa: E402
+
+
+def test_steps_share_one_application():
+    async def run():
+        answers, tasks = [], []
+        async with Wizard() as wizard:
+            pipe.send_text("bot\r")
+            answers.append(await TextPrompt("name").prompt_async())
+            tasks.append(wizard.task)
+            pipe.send_text("n\r")
+            answers.append(await BooleanPrompt("install").prompt_async(default=True))
+            tasks.append(wizard.task)
+            pipe.send_text("\r")  # 使用默认值
+            answers.append(await BooleanPrompt("confirm", default=True).prompt_async())
+            tasks.append(wizard.task)
+            assert Wizard.current() is wizard
+        assert Wizard.current() is None and tasks[0].done()
+        return answers, tasks
+
+    with create_pipe_input() as pipe, create_app_session(input=pipe, output=DummyOutput()):
+        loop = asyncio.new_event_loop()
+        try:
+            answers, tasks = loop.run_until_complete(run())
+        finally:
+            loop.close()
+    assert answers == ["bot", False, True]
+    assert tasks[0] is tasks[1] is tasks[2]
+
+
+def test_merged_style_is_cached():
+    first, second = BooleanPrompt("a"), BooleanPrompt("b")
+    assert first.get_style() is second.get_style()
+    assert TextPrompt("c").get_style() is not first.get_style()